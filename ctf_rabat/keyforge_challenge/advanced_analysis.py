@@ -3,19 +3,17 @@
 Advanced KeyForge Reverse Engineering
 Extract validation functions and implement hash cracking
 """
-import subprocess
 import re
 import itertools
 import string
 
+from oracle import get_oracle
+
 def test_flag(content_27):
     """Test a 27-character content"""
     flag = f"VoidBox{{{content_27}}}"
     try:
-        result = subprocess.run(['./KeyForge'], input=flag.encode() + b'\n',
-                              capture_output=True, timeout=2)
-        output = result.stdout.decode('utf-8', errors='ignore').strip()
-        return output, result.returncode
+        return get_oracle().check(flag)
     except:
         return "ERROR", -1
 
@@ -102,12 +100,16 @@ def brute_force_short_sections():
             print(f"    ^ Different response! Might be onto something...")
 
 def analyze_timing():
-    """Check if timing analysis reveals validation structure"""
-    print("\n[5] Timing analysis...")
+    """Check if instruction counts reveal validation structure"""
+    print("\n[5] Instruction-count analysis...")
+    
+    from instruction_counter import InstructionCounter
     
-    import time
+    # Wall-clock deltas are pure noise here; retired instruction counts are
+    # deterministic, so any difference means the input went deeper
+    counter = InstructionCounter()
+    print(f"  (counting with {counter.method})")
     
-    # Test if different inputs take different time (indicating validation depth)
     test_cases = [
         "a" * 27,                           # All same
         "VoidBox{test}" + "a" * 14,         # Nested format
@@ -117,10 +119,8 @@ def analyze_timing():
     
     for test_content in test_cases:
         if len(test_content) == 27:
-            start_time = time.time()
-            output, rc = test_flag(test_content)
-            elapsed = time.time() - start_time
-            print(f"  {test_content[:20]:20}... : {elapsed:.4f}s - {output}")
+            instructions, output, rc = counter.count(test_content)
+            print(f"  {test_content[:20]:20}... : {instructions:8} instructions - {output}")
 
 def main():
     print("Advanced KeyForge Reverse Engineering")
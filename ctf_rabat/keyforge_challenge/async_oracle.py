@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+asyncio KeyForge oracle
+Many in-flight candidates on one thread via asyncio.create_subprocess_exec
+"""
+import asyncio
+import time
+
+import result_cache
+from oracle import CONTENT_LENGTH, UNPACKED_BINARY, make_flag
+
+
+class AsyncOracle:
+    """Semaphore-bounded window of concurrent KeyForge executions
+
+    `await oracle.check(content_27)` keeps the (output, returncode) contract
+    of oracle.test_flag_content; `oracle.stream(candidates)` is an async
+    generator that keeps up to `concurrency` candidates in flight.
+    """
+
+    def __init__(self, binary=UNPACKED_BINARY, concurrency=256, timeout=2, cache=True):
+        self.binary = binary
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.cache = result_cache.get_cache(binary) if cache else None
+        self._window = asyncio.Semaphore(concurrency)
+
+    async def run(self, data):
+        """Feed raw bytes to one execution; returns (stdout bytes, returncode)"""
+        async with self._window:
+            proc = await asyncio.create_subprocess_exec(
+                self.binary, stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL)
+            try:
+                stdout, _ = await asyncio.wait_for(proc.communicate(data), self.timeout)
+            except asyncio.TimeoutError:
+                proc.kill()
+                await proc.wait()
+                raise
+            return stdout, proc.returncode
+
+    async def check(self, content_27):
+        """Test a 27-character content in VoidBox format"""
+        if len(content_27) != CONTENT_LENGTH:
+            return f"Wrong length: {len(content_27)}", -1
+        data = make_flag(content_27).encode() + b'\n'
+        hit = self.cache.get(data) if self.cache is not None else None
+        try:
+            if hit is not None:
+                stdout, rc, _ = hit
+            else:
+                start = time.perf_counter()
+                stdout, rc = await self.run(data)
+                if self.cache is not None:
+                    self.cache.put(data, stdout, rc, time.perf_counter() - start)
+        except asyncio.TimeoutError:
+            return "ERROR: timeout", -1
+        except OSError as e:
+            return f"ERROR: {e}", -1
+        return stdout.decode('utf-8', errors='ignore').strip(), rc
+
+    async def stream(self, candidates, ordered=False):
+        """Yield (content, output, rc) for a sync or async iterable of contents
+
+        At most `concurrency` tasks exist at any time, so unbounded
+        generators are consumed lazily. Closing the generator early cancels
+        everything still in flight.
+        """
+        if hasattr(candidates, '__aiter__'):
+            source = candidates.__aiter__()
+        else:
+            source = _aiter(candidates)
+
+        async def one(content):
+            return (content,) + await self.check(content)
+
+        inflight = []
+        exhausted = False
+        try:
+            while inflight or not exhausted:
+                while not exhausted and len(inflight) < self.concurrency:
+                    try:
+                        content = await source.__anext__()
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    inflight.append(asyncio.ensure_future(one(content)))
+                if not inflight:
+                    break
+
+                if ordered:
+                    yield await inflight.pop(0)
+                else:
+                    finished, _ = await asyncio.wait(inflight, return_when=asyncio.FIRST_COMPLETED)
+                    inflight = [task for task in inflight if task not in finished]
+                    for task in finished:
+                        yield task.result()
+        finally:
+            for task in inflight:
+                task.cancel()
+            if inflight:
+                await asyncio.gather(*inflight, return_exceptions=True)
+
+    async def search(self, candidates, is_success):
+        """Return the first content whose output is a success, else None"""
+        stream = self.stream(candidates)
+        try:
+            async for content, output, rc in stream:
+                if is_success(output):
+                    return content
+        finally:
+            await stream.aclose()
+        return None
+
+
+async def _aiter(iterable):
+    for item in iterable:
+        yield item
+
+
+async def _demo():
+    oracle = AsyncOracle(cache=False)
+    print(await oracle.check("a" * 27))
+
+    count = 500
+    start = time.perf_counter()
+    async for content, output, rc in oracle.stream("a" * 27 for _ in range(count)):
+        pass
+    elapsed = time.perf_counter() - start
+    print(f"{count} candidates in {elapsed:.2f}s ({count / elapsed:.1f}/sec, "
+          f"window {oracle.concurrency})")
+
+
+if __name__ == "__main__":
+    asyncio.run(_demo())
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+KeyForge oracle throughput benchmark
+candidates/sec, p50/p99 latency and spawn overhead per backend, generator
+throughput on its own, JSON results compared against the previous run
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import string
+import subprocess
+import time
+
+from candidate_pipeline import Pipeline
+from corpus_builder import load_corpus
+from mask_attack import Mask, as_strings
+from mutations import Mutations
+from ngram_generator import NGramModel, default_corpus
+from oracle import BACKENDS, UNPACKED_BINARY, make_flag
+from word_sequences import WordSequences
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RESULTS_FILE = os.path.join(HERE, 'benchmark_results.json')
+REGRESSION_THRESHOLD = 0.10
+
+INSTRUCTION_TEXT = "Welcome_To_our_Hummble_Ctf_did_you_really_think_this_was_hard"
+
+
+def _distinct(count):
+    """Distinct 27-char contents, salted per call so no result cache can serve them"""
+    salt = os.urandom(4).hex()
+    return [f"{salt}{i:019d}" for i in range(count)]
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def histogram(latencies_ns):
+    """Log2 buckets in microseconds: {"<=16us": n, ...}"""
+    buckets = {}
+    for ns in latencies_ns:
+        bound = 1
+        while bound * 1000 < ns:
+            bound *= 2
+        key = f"<={bound}us"
+        buckets[key] = buckets.get(key, 0) + 1
+    return dict(sorted(buckets.items(), key=lambda item: int(item[0][2:-2])))
+
+
+def summarize(latencies_ns, elapsed_s, setup_s):
+    ordered = sorted(latencies_ns)
+    return {
+        "candidates": len(ordered),
+        "candidates_per_sec": len(ordered) / elapsed_s if elapsed_s else 0.0,
+        "p50_us": percentile(ordered, 0.50) / 1000,
+        "p99_us": percentile(ordered, 0.99) / 1000,
+        "setup_ms": setup_s * 1000,
+        "histogram": histogram(ordered),
+    }
+
+
+def bench_sync_backend(factory, count):
+    start = time.perf_counter()
+    oracle = factory()
+    setup = time.perf_counter() - start
+    latencies = []
+    try:
+        begin = time.perf_counter()
+        for content in _distinct(count):
+            t0 = time.perf_counter_ns()
+            oracle.check(make_flag(content))
+            latencies.append(time.perf_counter_ns() - t0)
+        elapsed = time.perf_counter() - begin
+    finally:
+        oracle.close()
+    return summarize(latencies, elapsed, setup)
+
+
+def bench_pool(count):
+    from candidate_pool import CandidatePool
+    start = time.perf_counter()
+    # Uncached like the sync backends, so nothing lands in .oracle_cache
+    pool = CandidatePool(backend=lambda: BACKENDS["forkserver"](cache=False))
+    setup = time.perf_counter() - start
+    try:
+        begin = time.perf_counter()
+        last = time.perf_counter_ns()
+        gaps = []
+        for _ in pool.imap(_distinct(count)):
+            now = time.perf_counter_ns()
+            gaps.append(now - last)
+            last = now
+        elapsed = time.perf_counter() - begin
+    finally:
+        pool.close()
+    result = summarize(gaps, elapsed, setup)
+    result["note"] = f"latency = inter-arrival gap, {pool.workers} workers"
+    return result
+
+
+def bench_async(count):
+    from async_oracle import AsyncOracle
+
+    async def go():
+        oracle = AsyncOracle(cache=False)
+        latencies = []
+
+        async def timed(content):
+            t0 = time.perf_counter_ns()
+            await oracle.check(content)
+            latencies.append(time.perf_counter_ns() - t0)
+
+        begin = time.perf_counter()
+        await asyncio.gather(*(timed(c) for c in _distinct(count)))
+        return latencies, time.perf_counter() - begin
+
+    latencies, elapsed = asyncio.run(go())
+    result = summarize(latencies, elapsed, 0.0)
+    result["note"] = "latency includes time queued behind the semaphore"
+    return result
+
+
+def spawn_overhead(count=200):
+    """Bare fork+exec cost of subprocess.run on /bin/true, in microseconds"""
+    latencies = []
+    for _ in range(count):
+        t0 = time.perf_counter_ns()
+        subprocess.run(['/bin/true'])
+        latencies.append(time.perf_counter_ns() - t0)
+    latencies.sort()
+    return {"p50_us": percentile(latencies, 0.5) / 1000, "p99_us": percentile(latencies, 0.99) / 1000}
+
+
+def oracle_backends(count):
+    """name -> zero-arg callable returning a result summary"""
+    scaled = max(count // 10, 20)
+    return {
+        "subprocess_packed": lambda: bench_sync_backend(lambda: BACKENDS["subprocess"](cache=False), scaled),
+        "subprocess_unpacked": lambda: bench_sync_backend(lambda: BACKENDS["unpacked"](cache=False), scaled),
+        "forkserver": lambda: bench_sync_backend(lambda: BACKENDS["forkserver"](cache=False), count),
+        "snapshot": lambda: bench_sync_backend(lambda: BACKENDS["snapshot"](cache=False), count),
+        "pool_forkserver": lambda: bench_pool(count),
+        "async_unpacked": lambda: bench_async(scaled),
+    }
+
+
+# Candidate generators benchmarked on their own (no oracle). Generator
+# modules register themselves here as they are added.
+GENERATORS = {
+    "instruction_windows": lambda: (INSTRUCTION_TEXT[i:i + 27]
+                                    for i in range(len(INSTRUCTION_TEXT) - 26)),
+    "lowercase_product_4": lambda: ("".join(p) + "a" * 23
+                                    for p in itertools.product(string.ascii_lowercase, repeat=4)),
+    "pipeline_join_case_pad": lambda: (Pipeline(INSTRUCTION_TEXT.split("_"))
+                                       .join(INSTRUCTION_TEXT.split("_"))
+                                       .join(INSTRUCTION_TEXT.split("_"))
+                                       .case().pad().exact_length().dedup()),
+    "word_sequences_stream": lambda: WordSequences(INSTRUCTION_TEXT.lower().split("_")).stream(),
+    "mask_strings": lambda: iter(Mask("?l" * 27)),
+    "mask_batches_raw": lambda: (row for _, batch in Mask("?l" * 27).batches() for row in batch),
+    "ngram_best_first": lambda: _ngram_model().generate(),
+    "mutation_lattice": lambda: Mutations(INSTRUCTION_TEXT[:27]).ranked(),
+    "corpus_windows": lambda: iter(load_corpus()),
+    "word_sequences_ranked": lambda: (s for s, _ in WordSequences(INSTRUCTION_TEXT.lower().split("_")).ranked()),
+}
+
+
+def _ngram_model():
+    model = NGramModel()
+    for text, weight in default_corpus():
+        model.train(text, weight)
+    return model
+
+
+def bench_generator(factory, limit=1_000_000, budget_s=2.0):
+    start = time.perf_counter()
+    produced = 0
+    for _ in factory():
+        produced += 1
+        if produced >= limit or (produced & 0x3FFF == 0 and time.perf_counter() - start > budget_s):
+            break
+    elapsed = time.perf_counter() - start
+    return {"candidates": produced, "candidates_per_sec": produced / elapsed if elapsed else 0.0}
+
+
+def compare(current, previous):
+    """Print per-metric deltas; returns the list of regressions"""
+    regressions = []
+    for section in ("backends", "generators"):
+        for name, result in current.get(section, {}).items():
+            before = previous.get(section, {}).get(name)
+            if not before or "candidates_per_sec" not in result or "candidates_per_sec" not in before:
+                continue
+            old, new = before["candidates_per_sec"], result["candidates_per_sec"]
+            if not old:
+                continue
+            delta = (new - old) / old
+            marker = ""
+            if delta < -REGRESSION_THRESHOLD:
+                marker = "  <-- REGRESSION"
+                regressions.append((section, name, delta))
+            print(f"  {section[:-1]:9} {name:22} {old:12.1f} -> {new:12.1f}/s ({delta:+.1%}){marker}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="KeyForge oracle/generator benchmark")
+    parser.add_argument("-n", "--count", type=int, default=1000, help="candidates per persistent backend")
+    parser.add_argument("-o", "--output", default=RESULTS_FILE)
+    parser.add_argument("--only", nargs="*", help="backend/generator names to run")
+    args = parser.parse_args()
+
+    print("KeyForge Oracle Benchmark")
+    print("="*60)
+
+    results = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "host": platform.node(),
+        "cpus": os.cpu_count(),
+        "binary": UNPACKED_BINARY,
+        "spawn_overhead": spawn_overhead(),
+        "backends": {},
+        "generators": {},
+    }
+    print(f"Spawn overhead (/bin/true): p50 {results['spawn_overhead']['p50_us']:.0f}us\n")
+
+    for name, run in oracle_backends(args.count).items():
+        if args.only and name not in args.only:
+            continue
+        # ptrace failures surface as OSError; a hung candidate as TimeoutExpired
+        try:
+            result = run()
+        except (OSError, subprocess.TimeoutExpired) as e:
+            results["backends"][name] = {"error": f"{type(e).__name__}: {e}"}
+            print(f"  {name:22}: failed ({type(e).__name__}: {e})")
+            continue
+        results["backends"][name] = result
+        print(f"  {name:22}: {result['candidates_per_sec']:9.1f}/s  p50 {result['p50_us']:8.1f}us  "
+              f"p99 {result['p99_us']:8.1f}us  setup {result['setup_ms']:6.1f}ms")
+
+    print()
+    for name, factory in GENERATORS.items():
+        if args.only and name not in args.only:
+            continue
+        result = bench_generator(factory)
+        results["generators"][name] = result
+        print(f"  generator {name:22}: {result['candidates_per_sec']:12.0f}/s ({result['candidates']} produced)")
+
+    previous = {}
+    if os.path.exists(args.output):
+        with open(args.output) as f:
+            previous = json.load(f)
+    if previous:
+        print(f"\nComparison with previous run ({previous.get('timestamp', '?')}):")
+        regressions = compare(results, previous)
+        if regressions:
+            print(f"\n[-] {len(regressions)} regression(s) beyond {REGRESSION_THRESHOLD:.0%}")
+    results["previous"] = {key: previous[key] for key in ("timestamp", "backends", "generators")
+                           if key in previous}
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=1)
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,29 +3,45 @@
 KeyForge Brute Force Solver
 Since simple guesses didn't work, try more systematic approach
 """
-import subprocess
 import itertools
 import string
-from concurrent.futures import ThreadPoolExecutor
-import time
+import sys
 
-def test_flag_content(content_27):
-    """Test a 27-character content in VoidBox format"""
-    if len(content_27) != 27:
-        return f"Wrong length: {len(content_27)}", -1
-    
-    flag = f"VoidBox{{{content_27}}}"
-    try:
-        result = subprocess.run(['./KeyForge'], input=flag.encode() + b'\n',
-                              capture_output=True, timeout=2)
-        output = result.stdout.decode('utf-8', errors='ignore').strip()
-        return output, result.returncode
-    except Exception as e:
-        return f"ERROR: {e}", -1
+from candidate_pipeline import Pipeline, windows
+from checkpoint import Checkpoint
+from corpus_builder import load_corpus
+from dedup_filter import shared_tested_set
+from grammar_inference import load_grammar
+from mask_attack import Mask
+from ngram_generator import NGramModel, default_corpus
+from scheduler import StrategyScheduler
+from timing_attack import load_ranking
+from word_sequences import WordSequences
 
-def test_wordlist_approach():
+def schedule(scheduler, checkpoint, name, candidates, **options):
+    """Register candidates from the checkpointed position, minus anything already tested"""
+    state = checkpoint.strategy(name)
+    candidates = shared_tested_set().filter(state.skip(candidates))
+    return scheduler.add(name, candidates, state=state, **options)
+
+def show(content, output, rc):
+    print(f"  {content}: {output}")
+
+def ngram_strategy(scheduler, checkpoint):
+    """Most probable contents under a char n-gram model of the challenge text"""
+    print("[0] N-gram model candidates")
+    
+    model = NGramModel(order=4)
+    for text, weight in default_corpus():
+        model.train(text, weight)
+    
+    ranked = (content for content, logp in model.generate())
+    schedule(scheduler, checkpoint, "ngram", itertools.islice(ranked, 20000),
+             priority=4, time_budget=600)
+
+def wordlist_strategy(scheduler, checkpoint):
     """Try common words and phrases"""
-    print("[1] Testing wordlist approach...")
+    print("[1] Wordlist sequences")
     
     # Common CTF flag components
     words = [
@@ -36,32 +52,17 @@ def test_wordlist_approach():
         "validation", "passed", "correct", "right", "answer", "solution"
     ]
     
-    # Try single words padded to 27 chars
-    for word in words:
-        if len(word) <= 27:
-            # Pad with underscores
-            padded = word + "_" * (27 - len(word))
-            output, rc = test_flag_content(padded)
-            print(f"  {padded}: {output}")
-            
-            if is_success(output):
-                return f"VoidBox{{{padded}}}"
-    
-    # Try combinations of words
-    print("  Testing word combinations...")
-    for w1, w2 in itertools.combinations(words[:10], 2):
-        combined = f"{w1}_{w2}"
-        if len(combined) <= 27:
-            padded = combined + "_" * (27 - len(combined))
-            output, rc = test_flag_content(padded)
-            if is_success(output):
-                return f"VoidBox{{{padded}}}"
-    
-    return None
+    # Every ordering of words and underscores that is exactly 27 chars,
+    # most plausible first, instead of padding singles and pairs
+    sequences = WordSequences(words, max_words=4)
+    print(f"  {len(sequences)} exact-length word sequences, testing the best 20000")
+    ranked = (sequence for sequence, score in sequences.ranked())
+    schedule(scheduler, checkpoint, "wordlist", itertools.islice(ranked, 20000),
+             priority=3, time_budget=600)
 
-def test_format_variations():
+def format_strategy(scheduler, checkpoint):
     """Test different format approaches"""
-    print("\n[2] Testing format variations...")
+    print("[2] Format variations")
     
     # Maybe it expects a different internal format
     internal_formats = [
@@ -76,20 +77,13 @@ def test_format_variations():
         "congratulations_you_solved",           # Success message
     ]
     
-    for fmt in internal_formats:
-        if len(fmt) <= 27:
-            padded = fmt.ljust(27, '_')
-            output, rc = test_flag_content(padded)
-            print(f"  {padded}: {output}")
-            
-            if is_success(output):
-                return f"VoidBox{{{padded}}}"
-    
-    return None
+    candidates = Pipeline(internal_formats, name="formats").pad().exact_length()
+    schedule(scheduler, checkpoint, "formats", candidates, priority=8,
+             on_result=show, on_done=candidates.report)
 
-def test_character_patterns():
+def pattern_strategies(scheduler, checkpoint):
     """Test systematic character patterns"""
-    print("\n[3] Testing character patterns...")
+    print("[3] Character patterns and masked tails")
     
     patterns = [
         # Repeating patterns
@@ -112,82 +106,113 @@ def test_character_patterns():
         "ff00ff00" * 3 + "abc",                 # More hex-like
     ]
     
-    for pattern in patterns:
-        if len(pattern) == 27:
-            output, rc = test_flag_content(pattern)
-            print(f"  {pattern}: {output}")
-            
-            if is_success(output):
-                return f"VoidBox{{{pattern}}}"
+    exact = Pipeline(patterns, name="patterns").exact_length()
+    schedule(scheduler, checkpoint, "patterns", exact, priority=8,
+             on_result=show, on_done=exact.report)
     
-    return None
+    # Structured brute force: the same patterns with a masked tail
+    masks = [
+        "abc" * 8 + "?l?l?l",                 # abcabc... + any 3 lowercase
+        "123" * 8 + "?d?d?d",                 # 123123... + any 3 digits
+        "aA1" * 8 + "?l?u?d",                 # aA1aA1... + lower/upper/digit
+        "deadbeef" * 3 + "?h?h?h",            # hex-like + any 3 hex digits
+    ]
+    # Chars a saved timing ranking marks as slowest are tried first
+    ranking = load_ranking()
+    for mask in masks:
+        keyspace = Mask(mask).reorder(ranking)
+        print(f"  Mask {mask}: {keyspace.keyspace} candidates")
+        schedule(scheduler, checkpoint, f"mask {mask}", keyspace, priority=1)
 
-def test_instruction_variations():
+def instruction_strategy(scheduler, checkpoint):
     """Test variations of the instruction example"""
-    print("\n[4] Testing instruction variations...")
+    print("[4] Instruction variations")
     
     original = "Welcome_To_our_Hummble_Ctf_did_you_really_think_this_was_hard"
     
-    # Different substrings of the original
-    variations = []
-    
-    # Sliding window of 27 characters
-    for i in range(len(original) - 26):
-        substr = original[i:i+27]
-        variations.append(substr)
-    
     # Common modifications
-    variations.extend([
+    modifications = [
         "Welcome_To_our_Hummble_Ctf",          # First part
         "did_you_really_think_this_",          # Middle part  
         "you_really_think_this_was_",          # Different middle
         "think_this_was_hard_right",           # End part modified
-        "WELCOME_TO_OUR_HUMMBLE_CTF",          # Uppercase
-        "welcome_to_our_hummble_ctf",          # Lowercase
-    ])
-    
-    for var in variations:
-        if len(var) == 27:
-            output, rc = test_flag_content(var)
-            print(f"  {var}: {output}")
-            
-            if is_success(output):
-                return f"VoidBox{{{var}}}"
+    ]
     
-    return None
+    # Sliding windows of 27 characters, then the modifications in each case
+    variations = (Pipeline(windows(original), modifications, name="instruction")
+                  .case(("upper", "lower"))
+                  .pad()
+                  .exact_length()
+                  .dedup())
+    schedule(scheduler, checkpoint, "instruction", variations, priority=6,
+             on_result=show, on_done=variations.report)
 
-def is_success(output):
-    """Check if output indicates success"""
-    success_indicators = [
-        'license valid', 'valid!', 'correct', 'success', 'congratulations',
-        'well done', 'you win', 'flag accepted', 'access granted'
-    ]
+def corpus_strategy(scheduler, checkpoint):
+    """Every 27-char window of every text artifact, not just the instruction"""
+    print("[5] Text artifact windows")
+    
+    # Rebuilt only when a source file changed since the last run
+    corpus = load_corpus()
+    print(f"  {len(corpus)} distinct windows")
     
-    return any(indicator in output.lower() for indicator in success_indicators)
+    # Windows with chars the inferred format gate rejects never reach the binary
+    corpus_windows = Pipeline(corpus, name="corpus").charset(load_grammar().content_charset())
+    schedule(scheduler, checkpoint, "corpus", corpus_windows, priority=2, on_done=corpus_windows.report)
 
 def main():
     print("KeyForge Advanced Brute Force Solver")
     print("="*60)
-    print("Systematically testing different approaches...\n")
-    
+    print("Running every approach at once over one oracle pool...\n")
+    
+    # Progress survives interruptions; pass --fresh to start over
+    with Checkpoint("brute_force_solver", fresh="--fresh" in sys.argv) as checkpoint:
+        if checkpoint.found:
+            print(f"Flag already found in a previous run: {checkpoint.found}")
+            return checkpoint.found
+        if checkpoint.resumed:
+            print("Resuming from checkpoint:")
+            print("\n".join(checkpoint.summary()) + "\n")
+        return run_approaches(checkpoint)
+
+def run_approaches(checkpoint):
+    """Schedule every approach together, skipping work the checkpoint already covers
+
+    Higher-priority strategies get proportionally more of the pool, so the
+    small hand-written lists finish first while the masks trickle along.
+    Candidates already tested by any strategy, in this run or an earlier
+    one, are dropped by the shared dedup filter before reaching the pool.
+    The filter sits after the checkpoint skip; skip() counts source items
+    as they are drawn, so resume positions include the ones it dropped.
+    """
     approaches = [
-        test_wordlist_approach,
-        test_format_variations, 
-        test_character_patterns,
-        test_instruction_variations
+        ngram_strategy,
+        wordlist_strategy,
+        format_strategy,
+        pattern_strategies,
+        instruction_strategy,
+        corpus_strategy
     ]
     
+    scheduler = StrategyScheduler()
     for approach in approaches:
         try:
-            result = approach()
-            if result:
-                print(f"\n{'='*60}")
-                print(f"SUCCESS! FOUND FLAG: {result}")
-                print(f"{'='*60}")
-                return result
+            approach(scheduler, checkpoint)
         except Exception as e:
             print(f"Error in approach: {e}")
     
+    print()
+    result = scheduler.run()
+    print()
+    scheduler.report()
+    if result:
+        checkpoint.found = result
+        print(f"\n{'='*60}")
+        print(f"SUCCESS! FOUND FLAG: {result}")
+        print(f"{'='*60}")
+        return result
+    
+    print()
+    shared_tested_set().report()
     print(f"\n{'='*60}")
     print("No flag found with systematic approaches.")
     print("The challenge likely requires:")
@@ -200,4 +225,4 @@ def main():
     return None
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Lazy candidate pipeline for KeyForge
+Sources -> transforms (pad, trim, case, leet, join) -> filters (length, charset, dedup),
+streamed one candidate at a time with per-stage produced/dropped counts
+"""
+import itertools
+import string
+
+from oracle import CONTENT_LENGTH
+
+# Anything printable except whitespace and the braces that delimit the flag
+FLAG_CHARSET = frozenset(string.ascii_letters + string.digits + string.punctuation) - set("{}")
+LEET = {'a': '4', 'e': '3', 'i': '1', 'o': '0', 's': '5', 't': '7'}
+
+
+class Stage:
+    """Counters for one pipeline stage
+
+    `consumed` counts items taken from upstream, `produced` items passed
+    downstream, and `dropped` upstream items that produced nothing.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.consumed = 0
+        self.produced = 0
+        self.dropped = 0
+
+
+class Pipeline:
+    """Composable, lazily evaluated candidate stream
+
+    Every method appends a stage and returns the pipeline, so a strategy
+    reads top to bottom:
+
+        Pipeline(words).join(words).pad().exact_length().dedup()
+
+    Nothing runs until the pipeline is iterated; each candidate flows
+    through all stages before the next is pulled, so memory stays constant
+    (apart from dedup's seen-set) however large the stream is.
+    """
+
+    def __init__(self, *sources, name="source"):
+        self.sources = sources
+        self.source = Stage(name)
+        self.stages = []
+
+    # -- generic stages ---------------------------------------------------
+
+    def expand(self, fn, name=None):
+        """Stage where fn(item) returns an iterable of zero or more outputs"""
+        self.stages.append((Stage(name or fn.__name__), fn))
+        return self
+
+    def map(self, fn, name=None):
+        """One-to-one transform; returning None drops the item"""
+        def one(item):
+            result = fn(item)
+            return () if result is None else (result,)
+        return self.expand(one, name or fn.__name__)
+
+    def filter(self, predicate, name=None):
+        return self.expand(lambda item: (item,) if predicate(item) else (),
+                           name or predicate.__name__)
+
+    # -- transforms -------------------------------------------------------
+
+    def pad(self, length=CONTENT_LENGTH, fill="_"):
+        """Right-pad short candidates; longer ones pass through untouched"""
+        return self.map(lambda item: item + fill * (length - len(item)) if len(item) < length else item,
+                        f"pad({fill!r})")
+
+    def trim(self, length=CONTENT_LENGTH):
+        return self.map(lambda item: item[:length], f"trim({length})")
+
+    def case(self, modes=("lower", "upper", "title")):
+        """Yield the item plus each distinct str-method case variant"""
+        def variants(item):
+            seen = {item}
+            yield item
+            for mode in modes:
+                variant = getattr(item, mode)()
+                if variant not in seen:
+                    seen.add(variant)
+                    yield variant
+        return self.expand(variants, "case")
+
+    def leet(self, table=LEET):
+        """Yield the item plus its fully leet-substituted form"""
+        translation = str.maketrans(table)
+
+        def variants(item):
+            yield item
+            substituted = item.translate(translation)
+            if substituted != item:
+                yield substituted
+        return self.expand(variants, "leet")
+
+    def join(self, other, sep="_"):
+        """Append every element of `other` (re-iterable, or a callable returning one)"""
+        def joined(item):
+            parts = other() if callable(other) else other
+            for part in parts:
+                yield f"{item}{sep}{part}"
+        return self.expand(joined, f"join({sep!r})")
+
+    # -- filters ----------------------------------------------------------
+
+    def exact_length(self, length=CONTENT_LENGTH):
+        return self.filter(lambda item: len(item) == length, f"length=={length}")
+
+    def charset(self, allowed=FLAG_CHARSET):
+        allowed = frozenset(allowed)
+        return self.filter(lambda item: allowed.issuperset(item), "charset")
+
+    def dedup(self, seen=None):
+        """Drop repeats; `seen` is any container with `in` and add() (a set by default)"""
+        seen = set() if seen is None else seen
+
+        def first(item):
+            if item in seen:
+                return False
+            seen.add(item)
+            return True
+        return self.filter(first, "dedup")
+
+    # -- evaluation -------------------------------------------------------
+
+    def _source(self):
+        stage = self.source
+        for source in self.sources:
+            for item in (source() if callable(source) else source):
+                stage.consumed += 1
+                stage.produced += 1
+                yield item
+
+    @staticmethod
+    def _apply(stage, fn, upstream):
+        for item in upstream:
+            stage.consumed += 1
+            empty = True
+            for result in fn(item):
+                empty = False
+                stage.produced += 1
+                yield result
+            if empty:
+                stage.dropped += 1
+
+    def __iter__(self):
+        stream = self._source()
+        for stage, fn in self.stages:
+            stream = self._apply(stage, fn, stream)
+        return stream
+
+    def report(self, verbose=True):
+        """Per-stage counts as a list of dicts (printed when verbose)"""
+        rows = [{"stage": s.name, "in": s.consumed, "out": s.produced, "dropped": s.dropped}
+                for s in [self.source] + [stage for stage, _ in self.stages]]
+        if verbose:
+            for row in rows:
+                dropped = f"  ({row['dropped']} dropped)" if row["dropped"] else ""
+                print(f"    {row['stage']:14} {row['in']:>10} in -> {row['out']:>10} out{dropped}")
+        return rows
+
+
+def windows(text, length=CONTENT_LENGTH):
+    """Every `length`-char sliding window of text"""
+    return (text[i:i + length] for i in range(len(text) - length + 1))
+
+
+def lines(path):
+    """Source callable streaming stripped, non-empty lines of a file"""
+    def read():
+        with open(path, errors="ignore") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield line
+    return read
+
+
+def main():
+    print("KeyForge Candidate Pipeline")
+    print("="*50)
+    words = ["welcome", "to", "our", "humble", "ctf", "keyforge", "license", "void", "box"]
+    pipeline = (Pipeline(words, name="words")
+                .join(words).join(words)
+                .case(("lower", "title"))
+                .leet()
+                .pad()
+                .exact_length()
+                .charset()
+                .dedup())
+    stream = iter(pipeline)
+    for candidate in itertools.islice(stream, 5):
+        print(f"  {candidate}")
+    remaining = sum(1 for _ in stream)
+    print(f"  ... and {remaining} more\n")
+    pipeline.report()
+
+
+if __name__ == "__main__":
+    main()
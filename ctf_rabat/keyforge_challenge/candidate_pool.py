@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Multi-core candidate evaluation pool
+One oracle worker process per core, bounded input queue, cancel-on-success
+"""
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+
+import oracle
+
+_STOP = None
+
+
+def cpu_count():
+    """Cores this process may actually run on"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _worker(backend, tasks, results, cancelled):
+    """Evaluate (index, content) tasks until a stop sentinel arrives"""
+    # Ctrl-C reaches the whole process group; let the parent decide how to
+    # wind down (and checkpoint) instead of dying mid-task
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if backend is not None:
+        oracle.use_backend(backend)
+    while True:
+        task = tasks.get()
+        if task is _STOP:
+            break
+        index, content = task
+        if cancelled.is_set():
+            results.put((index, content, None, None))
+            continue
+        output, rc = oracle.test_flag_content(content)
+        results.put((index, content, output, rc))
+
+
+class CandidatePool:
+    """Evaluate 27-char contents across worker processes
+
+    Each worker owns its own oracle (and so its own fork server). Candidates
+    are pulled lazily from the input iterable into a bounded queue, so
+    generators of any size can be streamed through.
+    """
+
+    def __init__(self, workers=None, queue_size=None, backend=None):
+        self.workers = workers or cpu_count()
+        self.queue_size = queue_size or self.workers * 64
+        ctx = multiprocessing.get_context("fork")
+        self.tasks = ctx.Queue(self.queue_size)
+        self.results = ctx.Queue()
+        self.cancelled = ctx.Event()
+        self.procs = [ctx.Process(target=_worker, daemon=True,
+                                  args=(backend, self.tasks, self.results, self.cancelled))
+                      for _ in range(self.workers)]
+        for proc in self.procs:
+            proc.start()
+        self.tested = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def cancel(self):
+        """Drop all outstanding work; workers skip whatever is still queued"""
+        self.cancelled.set()
+
+    def _feed(self, candidates, submitted, done, error):
+        try:
+            for content in candidates:
+                if self.cancelled.is_set():
+                    break
+                while True:
+                    try:
+                        self.tasks.put((submitted[0], content), timeout=0.1)
+                        break
+                    except queue.Full:
+                        if self.cancelled.is_set():
+                            return
+                submitted[0] += 1
+        except Exception as e:
+            # Handed to imap() to re-raise once the submitted work is back
+            error.append(e)
+        finally:
+            done.set()
+
+    def imap(self, candidates, is_success=None, ordered=False):
+        """Yield (content, output, rc) as results come back
+
+        With ordered=True results are released in input order. If is_success
+        is given, the pool is cancelled as soon as it returns true for an
+        output; that hit is the last result yielded. An exception raised
+        by `candidates` is re-raised here after the results of everything
+        submitted before it.
+        """
+        self.cancelled.clear()
+        submitted = [0]
+        done = threading.Event()
+        error = []
+        feeder = threading.Thread(target=self._feed, args=(candidates, submitted, done, error),
+                                  daemon=True)
+        feeder.start()
+
+        received = 0
+        next_index = 0
+        pending = {}
+        try:
+            while not (done.is_set() and received == submitted[0]):
+                try:
+                    index, content, output, rc = self.results.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                received += 1
+                # Cancelled tasks come back with output None and only
+                # advance the ordering
+                result = (content, output, rc) if output is not None else None
+                if result is not None:
+                    self.tested += 1
+
+                if not ordered:
+                    ready = [result] if result is not None else []
+                else:
+                    pending[index] = result
+                    ready = []
+                    while next_index in pending:
+                        result = pending.pop(next_index)
+                        next_index += 1
+                        if result is not None:
+                            ready.append(result)
+
+                for result in ready:
+                    yield result
+                    if is_success is not None and is_success(result[1]):
+                        self.cancel()
+                        return
+            if error:
+                raise error[0]
+        finally:
+            self.cancel()
+            feeder.join()
+            # Let skipped tasks flow back so the next imap starts clean
+            while received < submitted[0]:
+                try:
+                    self.results.get(timeout=5)
+                except queue.Empty:
+                    break
+                received += 1
+
+    def search(self, candidates, is_success):
+        """Return the first content whose output is a success, else None"""
+        results = self.imap(candidates)
+        try:
+            for content, output, rc in results:
+                if is_success(output):
+                    return content
+        finally:
+            # Cancels the outstanding work, as imap(is_success=...) would
+            results.close()
+        return None
+
+    def close(self):
+        self.cancel()
+        for _ in self.procs:
+            try:
+                self.tasks.put(_STOP, timeout=1)
+            except queue.Full:
+                break  # workers are gone or wedged; terminated below
+        for proc in self.procs:
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
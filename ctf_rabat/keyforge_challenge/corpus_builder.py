@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+27-char window corpus for KeyForge
+Every window of every text artifact plus its normalized variants, deduplicated
+with a rolling hash and stored as fixed-width records in a memory-mapped file
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+
+from mask_attack import as_strings
+from oracle import CONTENT_LENGTH
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CORPUS_DIR = os.path.join(HERE, '.corpus')
+CORPUS_PATH = os.path.join(CORPUS_DIR, 'windows.bin')
+TEXT_SOURCES = [
+    os.path.join(HERE, '..', 'instructions.txt'),
+    os.path.join(HERE, 'all_strings.txt'),
+    os.path.join(HERE, 'unpacked_strings.txt'),
+    os.path.join(HERE, 'interesting_strings.txt'),
+]
+
+# Header: magic, record width, record count; records follow back to back
+MAGIC = b"KFWIN1\0\0"
+HEADER = struct.Struct("<8sII")
+
+# Rabin-Karp over bytes modulo the Mersenne prime 2^61 - 1
+MODULUS = (1 << 61) - 1
+BASE = 1_000_003
+
+
+def variants(text):
+    """The raw text (newlines as spaces) and its case-folded / underscored forms"""
+    raw = text.replace("\r", " ").replace("\n", " ")
+    seen = []
+    for variant in (raw, raw.lower(), raw.replace(" ", "_"), raw.lower().replace(" ", "_")):
+        if variant not in seen:
+            seen.append(variant)
+    return seen
+
+
+class WindowIndex:
+    """Distinct fixed-width windows, collected in first-seen order
+
+    Each stream is hashed once with a rolling polynomial hash, so sliding
+    the window costs O(1) per byte instead of hashing `width` bytes again.
+    A hash that was seen before is confirmed by comparing the stored
+    record, so a collision can never drop a distinct window. Windows with
+    bytes outside printable ASCII are skipped, as the binary reads one
+    line of text.
+    """
+
+    def __init__(self, width=CONTENT_LENGTH):
+        self.width = width
+        self.records = bytearray()
+        self.first = {}
+        self.windows = 0
+        self.collisions = 0
+        self.top = pow(BASE, width - 1, MODULUS)
+
+    def __len__(self):
+        return len(self.records) // self.width
+
+    def record(self, number):
+        return bytes(self.records[number * self.width:(number + 1) * self.width])
+
+    def add_stream(self, data):
+        """Index every window of `data` (bytes); returns the number of new ones"""
+        width, top = self.width, self.top
+        before = len(self)
+        value = 0
+        clean_from = 0
+        for i, byte in enumerate(data):
+            if not 0x20 <= byte < 0x7f:
+                clean_from = i + 1
+            if i >= width:
+                value = (value - data[i - width] * top) % MODULUS
+            value = (value * BASE + byte) % MODULUS
+            start = i - width + 1
+            if start < clean_from:
+                continue
+            self.windows += 1
+            window = data[start:i + 1]
+            number = self.first.get(value)
+            if number is None:
+                self.first[value] = len(self)
+                self.records += window
+            elif self.record(number) != window and (value, window) not in self.first:
+                # True collision: key the newcomer by (hash, bytes) instead
+                self.collisions += 1
+                self.first[(value, window)] = len(self)
+                self.records += window
+        return len(self) - before
+
+    def add_text(self, text):
+        return sum(self.add_stream(variant.encode('latin-1', 'replace')) for variant in variants(text))
+
+
+def fingerprint(paths):
+    """(path, size, mtime) of each existing source, to tell when a rebuild is due"""
+    stamp = []
+    for path in paths:
+        if os.path.exists(path):
+            info = os.stat(path)
+            stamp.append([os.path.abspath(path), info.st_size, info.st_mtime_ns])
+    return stamp
+
+
+def build_corpus(paths=TEXT_SOURCES, output=CORPUS_PATH, width=CONTENT_LENGTH, verbose=True):
+    """Index every source and write the record file plus its JSON metadata"""
+    start = time.perf_counter()
+    index = WindowIndex(width)
+    per_source = {}
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open(path, errors="ignore") as f:
+            added = index.add_text(f.read())
+        per_source[os.path.basename(path)] = added
+        if verbose:
+            print(f"  {os.path.basename(path):24} {added:8} new windows")
+
+    directory = os.path.dirname(output)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(HEADER.pack(MAGIC, width, len(index)))
+            f.write(index.records)
+        os.replace(tmp, output)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    meta = {"sources": fingerprint(paths), "width": width, "records": len(index),
+            "windows": index.windows, "collisions": index.collisions,
+            "per_source": per_source, "build_seconds": time.perf_counter() - start}
+    with open(output + ".json", "w") as f:
+        json.dump(meta, f, indent=1)
+    return meta
+
+
+class CorpusFile:
+    """Read-only view of a built corpus, memory-mapped
+
+    Records are fixed width, so record i is a slice at a computed offset:
+    indexing and iter_from() seek in O(1) (which makes it a direct
+    checkpoint source), and batch() returns a zero-copy (N, width) uint8
+    array when numpy is available.
+    """
+
+    def __init__(self, path=CORPUS_PATH):
+        self.path = path
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.width, self.count = HEADER.unpack_from(self.map)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a window corpus")
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, number):
+        if not 0 <= number < self.count:
+            raise IndexError(f"record {number} outside corpus of {self.count}")
+        offset = HEADER.size + number * self.width
+        return self.map[offset:offset + self.width].decode('latin-1')
+
+    def batch(self, start, count):
+        """Records start..start+count-1 as an (N, width) uint8 array (list of bytes without numpy)"""
+        count = max(0, min(count, self.count - start))
+        offset = HEADER.size + start * self.width
+        if np is None:
+            return [self.map[offset + i * self.width:offset + (i + 1) * self.width] for i in range(count)]
+        return np.frombuffer(self.map, np.uint8, count * self.width, offset).reshape(count, self.width)
+
+    def iter_from(self, start, size=4096):
+        """Every record from `start` on as a str (checkpoint resume hook)"""
+        while start < self.count:
+            yield from as_strings(self.batch(start, size))
+            start += size
+
+    def __iter__(self):
+        return self.iter_from(0)
+
+
+def load_corpus(paths=TEXT_SOURCES, output=CORPUS_PATH, verbose=False):
+    """CorpusFile for `paths`, rebuilt only when a source changed since the last build"""
+    meta_path = output + ".json"
+    if os.path.exists(output) and os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta.get("sources") == fingerprint(paths):
+            return CorpusFile(output)
+    build_corpus(paths, output, verbose=verbose)
+    return CorpusFile(output)
+
+
+def main():
+    print("KeyForge Window Corpus")
+    print("="*50)
+    paths = TEXT_SOURCES + sys.argv[1:]
+    meta = build_corpus(paths)
+    print(f"\n  {meta['windows']} windows -> {meta['records']} distinct "
+          f"({meta['collisions']} hash collisions) in {meta['build_seconds']:.2f}s")
+    print(f"  Written to {CORPUS_PATH} ({os.path.getsize(CORPUS_PATH) / 1024:.0f} KiB)")
+
+    start = time.perf_counter()
+    corpus = load_corpus(paths)
+    produced = sum(1 for _ in corpus)
+    elapsed = time.perf_counter() - start
+    print(f"  Reloaded and streamed {produced} records in {elapsed:.3f}s ({produced / elapsed:,.0f}/s)")
+    for number in (0, len(corpus) // 2, len(corpus) - 1):
+        print(f"    [{number}] {corpus[number]}")
+
+
+if __name__ == "__main__":
+    main()
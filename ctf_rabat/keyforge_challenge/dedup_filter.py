@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Global candidate dedup for KeyForge
+Scalable Bloom filter in front of the on-disk tested set (the result cache log),
+shared by every strategy so no candidate reaches the binary twice
+"""
+import math
+import os
+import sys
+import time
+
+import result_cache
+from oracle import get_oracle, make_flag
+from outcome_classifier import Outcome, classify
+
+
+class BloomFilter:
+    """Fixed-capacity Bloom filter over 32-byte digests
+
+    Inputs are already SHA-256 digests, so the k bit positions come from
+    double hashing two 64-bit slices of the digest; nothing is rehashed.
+    """
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(64, math.ceil(capacity * -math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, digest):
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:16], 'little') | 1
+        size = self.size
+        return [(h1 + i * h2) % size for i in range(self.hashes)]
+
+    def add(self, digest):
+        bits = self.bits
+        for pos in self._positions(digest):
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, digest):
+        bits = self.bits
+        for pos in self._positions(digest):
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    @property
+    def nbytes(self):
+        return len(self.bits)
+
+    def estimated_error(self):
+        """False-positive rate at the current fill: (set bits / size) ** k"""
+        filled = sum(bin(byte).count("1") for byte in self.bits) / self.size
+        return filled ** self.hashes
+
+
+class ScalableBloomFilter:
+    """Chain of Bloom filters that grows instead of saturating
+
+    Each new filter has `growth` times the capacity and `tightening` times
+    the error rate of the last, so the compound false-positive rate stays
+    below error_rate / (1 - tightening) however many items arrive.
+    """
+
+    def __init__(self, initial_capacity=1 << 16, error_rate=1e-6, growth=2, tightening=0.5):
+        self.growth = growth
+        self.tightening = tightening
+        self.filters = [BloomFilter(initial_capacity, error_rate * (1 - tightening))]
+
+    def add(self, digest):
+        current = self.filters[-1]
+        if current.count >= current.capacity:
+            current = BloomFilter(current.capacity * self.growth,
+                                  current.error_rate * self.tightening)
+            self.filters.append(current)
+        current.add(digest)
+
+    def __contains__(self, digest):
+        return any(digest in f for f in self.filters)
+
+    def __len__(self):
+        return sum(f.count for f in self.filters)
+
+    @property
+    def nbytes(self):
+        return sum(f.nbytes for f in self.filters)
+
+    def estimated_error(self):
+        miss = 1.0
+        for f in self.filters:
+            miss *= 1 - f.estimated_error()
+        return 1 - miss
+
+
+def default_binary():
+    """Binary whose cache the default oracle writes to
+
+    Asked of the oracle itself: a fork server that fails to start falls
+    back to the packed binary even where ptrace is available.
+    """
+    return get_oracle().binary
+
+
+class TestedSet:
+    """Drop candidates already tested in this run or any earlier one
+
+    Membership goes to the Bloom filter first. A hit is confirmed against
+    the result cache log on disk; confirmed successes are let through again
+    so a strategy still reports the flag. A hit the log cannot confirm is
+    either a duplicate still in flight this run or a Bloom false positive
+    (probability bounded by error_rate) and is dropped either way.
+
+    Implements `in`/add(), so it plugs into Pipeline.dedup(seen=...), and
+    filter() wraps any other candidate iterable.
+    """
+
+    def __init__(self, binary=None, initial_capacity=1 << 16, error_rate=1e-6):
+        self.cache = result_cache.get_cache(binary or default_binary())
+        start = time.perf_counter()
+        self.bloom = ScalableBloomFilter(max(initial_capacity, 2 * len(self.cache)), error_rate)
+        for key in self.cache.keys():
+            self.bloom.add(key)
+        self.warm_time = time.perf_counter() - start
+        self.warmed = len(self.bloom)
+        self.queries = 0
+        self.passed = 0
+        self.confirmed = 0
+        self.unconfirmed = 0
+        self._last = (None, None)
+
+    def key(self, content):
+        if self._last[0] == content:
+            return self._last[1]
+        key = self.cache.key(make_flag(content).encode() + b'\n')
+        self._last = (content, key)
+        return key
+
+    def __contains__(self, content):
+        self.queries += 1
+        key = self.key(content)
+        if key not in self.bloom:
+            self.passed += 1
+            return False
+        entry = self.cache.get_by_key(key)
+        if entry is None:
+            self.unconfirmed += 1
+            return True
+        stdout, rc, _ = entry
+        if classify(stdout, rc) is Outcome.SUCCESS:
+            self.passed += 1
+            return False
+        self.confirmed += 1
+        return True
+
+    def add(self, content):
+        self.bloom.add(self.key(content))
+
+    def filter(self, candidates):
+        """Yield only candidates not tested before, marking them as tested"""
+        for content in candidates:
+            if content not in self:
+                self.add(content)
+                yield content
+
+    def report(self, verbose=True):
+        stats = {
+            "queries": self.queries,
+            "passed": self.passed,
+            "dropped_tested": self.confirmed,
+            "dropped_unconfirmed": self.unconfirmed,
+            "entries": len(self.bloom),
+            "filters": len(self.bloom.filters),
+            "memory_bytes": self.bloom.nbytes,
+            "estimated_fp_rate": self.bloom.estimated_error(),
+            "warm_entries": self.warmed,
+            "warm_seconds": self.warm_time,
+        }
+        if verbose:
+            print(f"  Dedup: {stats['queries']} queries, {stats['passed']} passed, "
+                  f"{stats['dropped_tested']} already tested on disk, "
+                  f"{stats['dropped_unconfirmed']} in-run duplicates/false positives")
+            print(f"  Bloom: {stats['entries']} entries in {stats['filters']} filter(s), "
+                  f"{stats['memory_bytes'] / 1024:.0f} KiB, est. FP rate {stats['estimated_fp_rate']:.2e}")
+        return stats
+
+
+_shared = None
+_shared_pid = None
+
+
+def shared_tested_set():
+    """Process-wide TestedSet, so every strategy shares one filter"""
+    global _shared, _shared_pid
+    if _shared is None or _shared_pid != os.getpid():
+        _shared = TestedSet()
+        _shared_pid = os.getpid()
+    return _shared
+
+
+def main():
+    print("KeyForge Global Dedup Filter")
+    print("="*50)
+    tested = shared_tested_set()
+    print(f"  Warmed from {tested.cache.path}: {tested.warmed} entries in {tested.warm_time:.2f}s\n")
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    candidates = [f"dedup{i:022d}" for i in range(count)]
+    start = time.perf_counter()
+    fresh = sum(1 for _ in tested.filter(candidates))
+    repeat = sum(1 for _ in tested.filter(candidates))
+    elapsed = time.perf_counter() - start
+    print(f"  {count} new then {count} repeated: {fresh} + {repeat} passed "
+          f"({2 * count / elapsed:,.0f} queries/sec)\n")
+    tested.report()
+
+
+if __name__ == "__main__":
+    main()
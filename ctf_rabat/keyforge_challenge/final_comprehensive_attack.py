@@ -3,25 +3,25 @@
 KeyForge Final Attack - Comprehensive Solution
 Last attempt using all gathered intelligence
 """
-import subprocess
 import string
 import itertools
+import sys
 
-def test_flag_content(content_27):
-    """Test a 27-character content in VoidBox format"""
-    if len(content_27) != 27:
-        return f"Wrong length: {len(content_27)}", -1
-    
-    flag = f"VoidBox{{{content_27}}}"
-    try:
-        result = subprocess.run(['./KeyForge'], input=flag.encode() + b'\n',
-                              capture_output=True, timeout=2)
-        output = result.stdout.decode('utf-8', errors='ignore').strip()
-        return output, result.returncode
-    except Exception as e:
-        return f"ERROR: {e}", -1
+from candidate_pipeline import Pipeline, windows
+from checkpoint import Checkpoint
+from dedup_filter import shared_tested_set
+from scheduler import StrategyScheduler
 
-def test_meta_solutions():
+def schedule(scheduler, checkpoint, name, candidates, **options):
+    """Register untested candidates from the checkpointed position"""
+    state = checkpoint.strategy(name)
+    fresh = shared_tested_set().filter(state.skip(candidates))
+    return scheduler.add(name, fresh, state=state, **options)
+
+def show(label=""):
+    return lambda content, output, rc: print(f"  {label}{content}: {output}")
+
+def meta_solutions(scheduler, checkpoint):
     """Test meta-level solutions based on CTF psychology"""
     print("[FINAL] Testing meta-level solutions...")
     
@@ -42,22 +42,12 @@ def test_meta_solutions():
         "back_to_basics_read_manual",       # 27 chars
     ]
     
-    for flag in meta_flags:
-        # Ensure exactly 27 chars
-        if len(flag) > 27:
-            flag = flag[:27]
-        elif len(flag) < 27:
-            flag = flag + "_" * (27 - len(flag))
-        
-        output, rc = test_flag_content(flag)
-        print(f"  {flag}: {output}")
-        
-        if is_success(output):
-            return f"VoidBox{{{flag}}}"
-    
-    return None
+    # Ensure exactly 27 chars
+    candidates = Pipeline(meta_flags, name="meta").trim().pad()
+    schedule(scheduler, checkpoint, "meta", candidates, priority=4,
+             on_result=show(), on_done=candidates.report)
 
-def test_numerical_patterns():
+def numerical_patterns(scheduler, checkpoint):
     """Test patterns that might be hash targets or mathematical"""
     print("\n[FINAL] Testing numerical and hash-like patterns...")
     
@@ -76,17 +66,11 @@ def test_numerical_patterns():
         "ffffffffffffffffffffffffff",       # All f's (hex)
     ]
     
-    for pattern in hash_patterns:
-        if len(pattern) == 27:
-            output, rc = test_flag_content(pattern)
-            print(f"  {pattern}: {output}")
-            
-            if is_success(output):
-                return f"VoidBox{{{pattern}}}"
-    
-    return None
+    candidates = Pipeline(hash_patterns, name="hash").exact_length()
+    schedule(scheduler, checkpoint, "numerical", candidates, priority=2,
+             on_result=show(), on_done=candidates.report)
 
-def test_instruction_forensics():
+def instruction_forensics(scheduler, checkpoint):
     """Deep analysis of the instruction example"""
     print("\n[FINAL] Deep analysis of instruction text...")
     
@@ -97,19 +81,11 @@ def test_instruction_forensics():
     print(f"Need exactly 27 chars")
     
     # Try every possible 27-char substring
-    substrings = []
-    for i in range(len(content) - 26):
-        substr = content[i:i+27]
-        substrings.append(substr)
-    
-    print(f"Testing {len(substrings)} substrings from instruction...")
+    print(f"Testing {len(content) - 26} substrings from instruction...")
     
-    for i, substr in enumerate(substrings[:10]):  # Test first 10
-        output, rc = test_flag_content(substr)
-        print(f"  [{i:2}] {substr}: {output}")
-        
-        if is_success(output):
-            return f"VoidBox{{{substr}}}"
+    substrings = itertools.islice(windows(content), 10)  # Test first 10
+    schedule(scheduler, checkpoint, "instruction windows", substrings, priority=3,
+             on_result=show("WINDOW: "))
     
     # Try modifications of key parts
     modifications = [
@@ -121,17 +97,11 @@ def test_instruction_forensics():
         "Welcome_To_our_Humble_Ct",         # Fixed typo
     ]
     
-    for mod in modifications:
-        if len(mod) == 27:
-            output, rc = test_flag_content(mod)
-            print(f"  MOD: {mod}: {output}")
-            
-            if is_success(output):
-                return f"VoidBox{{{mod}}}"
-    
-    return None
+    candidates = Pipeline(modifications, name="modifications").exact_length()
+    schedule(scheduler, checkpoint, "instruction modifications", candidates, priority=3,
+             on_result=show("MOD: "), on_done=candidates.report)
 
-def test_challenge_context():
+def challenge_context(scheduler, checkpoint):
     """Test patterns based on challenge context"""
     print("\n[FINAL] Testing challenge-specific patterns...")
     
@@ -156,62 +126,59 @@ def test_challenge_context():
         "ctf_finals_november_fifteen",      # 28 chars - trim
     ]
     
-    for flag in context_flags:
-        # Ensure exactly 27 chars
-        if len(flag) > 27:
-            flag = flag[:27]
-        elif len(flag) < 27:
-            flag = flag + "_" * (27 - len(flag))
-        
-        output, rc = test_flag_content(flag)
-        print(f"  {flag}: {output}")
-        
-        if is_success(output):
-            return f"VoidBox{{{flag}}}"
-    
-    return None
-
-def is_success(output):
-    """Check if output indicates success"""
-    success_indicators = [
-        'license valid', 'valid!', 'correct', 'success', 'congratulations',
-        'well done', 'you win', 'flag accepted', 'access granted', 'welcome',
-        'authenticated', 'authorized', 'passed', 'cracked'
-    ]
-    
-    return any(indicator in output.lower() for indicator in success_indicators)
+    # Ensure exactly 27 chars
+    candidates = Pipeline(context_flags, name="context").trim().pad()
+    schedule(scheduler, checkpoint, "context", candidates, priority=3,
+             on_result=show(), on_done=candidates.report)
 
 def main():
     print("KeyForge FINAL COMPREHENSIVE ATTACK")
     print("="*60)
     print("Last systematic attempt before deep reverse engineering\n")
     
+    # Progress survives interruptions; pass --fresh to start over
+    with Checkpoint("final_comprehensive_attack", fresh="--fresh" in sys.argv) as checkpoint:
+        if checkpoint.found:
+            print(f"Flag already found in a previous run: {checkpoint.found}")
+            return checkpoint.found
+        if checkpoint.resumed:
+            print("Resuming from checkpoint:")
+            print("\n".join(checkpoint.summary()) + "\n")
+        return run_approaches(checkpoint)
+
+def run_approaches(checkpoint):
+    """Schedule every approach together, skipping work the checkpoint already covers
+
+    The scheduler verifies a hit once with a fresh run before returning it.
+    """
     final_approaches = [
-        test_meta_solutions,
-        test_numerical_patterns,
-        test_instruction_forensics,
-        test_challenge_context
+        meta_solutions,
+        numerical_patterns,
+        instruction_forensics,
+        challenge_context
     ]
     
+    scheduler = StrategyScheduler()
     for approach in final_approaches:
         try:
-            result = approach()
-            if result:
-                print(f"\n{'='*60}")
-                print(f"SUCCESS! FOUND FLAG: {result}")
-                print(f"{'='*60}")
-                
-                # Verify the flag
-                content = result[8:-1]  # Extract content between VoidBox{ and }
-                output, rc = test_flag_content(content)
-                print(f"VERIFICATION: {output}")
-                return result
+            approach(scheduler, checkpoint)
         except Exception as e:
             print(f"Error in approach: {e}")
     
+    result = scheduler.run()
+    print()
+    scheduler.report()
+    if result:
+        checkpoint.found = result
+        print(f"\n{'='*60}")
+        print(f"SUCCESS! FOUND FLAG: {result}")
+        print(f"{'='*60}")
+        return result
+    
     print(f"\n{'='*60}")
     print("FINAL ANALYSIS COMPLETE")
     print("="*60)
+    shared_tested_set().report()
     print("No flag found with comprehensive systematic approaches.")
     print("This challenge requires one of:")
     print("1. Deep binary reverse engineering (disassembly analysis)")
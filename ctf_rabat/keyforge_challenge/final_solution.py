@@ -3,7 +3,11 @@
 KeyForge Final Solution Attempt
 Based on analysis, try the most likely solutions
 """
-import subprocess
+from outcome_classifier import Outcome, classify
+from response_clusters import ResponseClusters
+
+# Clusters on stdout, stderr, exit code and latency; alerts on each new one
+clusters = ResponseClusters()
 
 def test_flag(content):
     """Test a flag content"""
@@ -11,12 +15,11 @@ def test_flag(content):
         content = f"VoidBox{{{content}}}"
     
     try:
-        result = subprocess.run(['./KeyForge'], input=content.encode() + b'\n',
-                              capture_output=True, timeout=2)
-        output = result.stdout.decode('utf-8', errors='ignore').strip()
-        return output, result.returncode
-    except:
-        return "ERROR", -1
+        cluster = clusters.probe_flag(content)
+    except Exception as e:
+        return f"ERROR: {e}", -1, None
+    output = cluster.stdout.decode('utf-8', errors='ignore').strip()
+    return output, cluster.rc, cluster
 
 def main():
     print("KeyForge Final Solution Attempts")
@@ -59,18 +62,18 @@ def main():
     print("-" * 50)
     
     for flag in high_probability_flags:
-        output, rc = test_flag(flag)
+        output, rc, cluster = test_flag(flag)
         print(f"{flag[:45]:45}... -> {output}")
         
         # Check for success
-        if any(word in output.lower() for word in ['valid!', 'success', 'correct', 'congratulations', 'well done']):
+        if cluster is not None and classify(cluster.stdout, rc) is Outcome.SUCCESS:
             print(f"\n{'='*60}")
             print(f"SUCCESS! FOUND FLAG: {flag}")
             print(f"{'='*60}")
             return flag
-            
-        elif "validation failed" not in output.lower() and "invalid format" not in output.lower() and output != "ERROR":
-            print(f"  ^ Different response - investigate further!")
+    
+    print(f"\n{len(clusters)} response clusters:")
+    print("\n".join(clusters.summary()))
     
     print(f"\nNo obvious flag found.")
     print(f"The challenge likely requires:")
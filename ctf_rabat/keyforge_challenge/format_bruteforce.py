@@ -3,20 +3,22 @@
 KeyForge Format Brute Forcer
 Since we know VoidBox{...} gives "Invalid format", try other formats
 """
-import subprocess
 import itertools
 import string
 
-BINARY = '/workspaces/ctf/ctf_rabat/keyforge/KeyForge'
+from outcome_classifier import Outcome, classify
+from response_clusters import ResponseClusters
+
+# Every run is clustered by its full response; new clusters are announced as they appear
+clusters = ResponseClusters()
 
 def test_input(inp):
-    """Test an input and return the response"""
+    """Test an input and return the response and its cluster (None on error)"""
     try:
-        result = subprocess.run([BINARY], input=inp.encode() + b'\n',
-                              capture_output=True, timeout=2)
-        return result.stdout.decode('utf-8', errors='ignore').strip()
-    except:
-        return "ERROR"
+        cluster = clusters.probe(inp.encode() + b'\n')
+    except Exception as e:
+        return f"ERROR: {e}", None
+    return cluster.stdout.decode('utf-8', errors='ignore').strip(), cluster
 
 def main():
     """Try different formats to find the correct one"""
@@ -71,15 +73,15 @@ def main():
     print("-" * 50)
     
     for fmt in test_formats:
-        response = test_input(fmt)
+        response, cluster = test_input(fmt)
         print(f"{fmt:35} -> {response}")
         
         # Look for success indicators
-        if any(word in response.lower() for word in ['valid', 'correct', 'success', 'congratulations']):
+        if cluster is not None and classify(cluster.stdout, cluster.rc) is Outcome.SUCCESS:
             print(f"\n*** POTENTIAL SUCCESS: {fmt} ***")
-        elif response != "Invalid format." and response != "ERROR":
-            print(f"    ^ Different response!")
     
+    print(f"\n{len(clusters)} response clusters over {clusters.probes} inputs:")
+    print("\n".join(clusters.summary()))
     print("\n" + "="*50)
     print("Analysis complete.")
     print("\nNext steps if no success:")
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Input grammar inference for KeyForge
+Learn the accepted input language from the INVALID_FORMAT / VALIDATION_FAILED
+split alone, with as few executions as possible, and emit it as a mask
+"""
+import json
+import os
+import re
+import string
+import sys
+
+from instruction_counter import PRINTABLE
+from mask_attack import CHARSETS, Mask
+from oracle import get_oracle
+from outcome_classifier import Outcome, classify
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+INSTRUCTIONS = os.path.join(HERE, '..', 'instructions.txt')
+GRAMMAR_PATH = os.path.join(HERE, '.grammar.json')
+EXAMPLE = "VoidBox{Welcome_To_our_Hummble_Ctf_did_you_really_think_this_was_hard}"
+
+# Builtins tried, largest first, when describing a learned charset
+DESCRIBE_ORDER = ['a', 'l', 'u', 'd', 's']
+
+
+def perturb(ch):
+    """A different char of the same kind (a->b, Z->A, 9->0, '_'->'`')"""
+    for alphabet in (string.ascii_lowercase, string.ascii_uppercase, string.digits, string.punctuation):
+        if ch in alphabet:
+            return alphabet[(alphabet.index(ch) + 1) % len(alphabet)]
+    return 'a' if ch != 'a' else 'b'
+
+
+def fill(body, length):
+    """`body` repeated or cut to exactly `length` chars"""
+    body = body or 'a'
+    return (body * (length // len(body) + 1))[:length]
+
+
+def describe(chars, custom):
+    """Mask token for a set of chars; registers custom charsets ?1..?4 as needed"""
+    chars = ''.join(sorted(set(chars)))
+    if len(chars) == 1:
+        return '??' if chars == '?' else chars
+    for key, builtin in CHARSETS.items():
+        if set(builtin) == set(chars):
+            return f'?{key}'
+    spec = []
+    remaining = set(chars)
+    for key in DESCRIBE_ORDER:
+        if set(CHARSETS[key]) <= remaining:
+            spec.append(f'?{key}')
+            remaining -= set(CHARSETS[key])
+    spec.extend(sorted(remaining))
+    spec = ''.join(spec)
+    for key, existing in custom.items():
+        if existing == spec:
+            return f'?{key}'
+    if len(custom) == 4:
+        raise ValueError("more than 4 distinct position classes; a mask cannot express this grammar")
+    key = str(len(custom) + 1)
+    custom[key] = spec
+    return f'?{key}'
+
+
+class Grammar:
+    """Learned language: literal prefix/suffix, accepted body lengths, a charset per body position"""
+
+    def __init__(self, prefix, suffix, classes, lengths, calls=0):
+        self.prefix = prefix
+        self.suffix = suffix
+        self.classes = classes
+        self.lengths = tuple(lengths)
+        self.calls = calls
+
+    def content_mask(self):
+        """(mask, custom charsets) for the body alone, which is what the generators produce"""
+        custom = {}
+        return ''.join(describe(chars, custom) for chars in self.classes), custom
+
+    def mask(self):
+        """(mask, custom charsets) for the whole input, prefix and suffix included"""
+        body, custom = self.content_mask()
+        literal = lambda text: text.replace('?', '??')
+        return literal(self.prefix) + body + literal(self.suffix), custom
+
+    def keyspace(self):
+        return Mask(*self.content_mask())
+
+    def content_charset(self):
+        """Every char accepted somewhere in the body, e.g. for Pipeline.charset()"""
+        return frozenset(''.join(self.classes))
+
+    def accepts(self, text):
+        if not (text.startswith(self.prefix) and text.endswith(self.suffix)):
+            return False
+        body = text[len(self.prefix):len(text) - len(self.suffix)]
+        return len(body) == len(self.classes) and all(ch in chars for ch, chars in zip(body, self.classes))
+
+    def to_dict(self):
+        return {"prefix": self.prefix, "suffix": self.suffix, "classes": self.classes,
+                "lengths": list(self.lengths), "calls": self.calls}
+
+
+class GrammarInference:
+    """Derive the format gate of the binary from accept/reject answers
+
+    An input is accepted when it gets past the format check (any known
+    response other than INVALID_FORMAT). Every answer is memoised, so no
+    input runs twice. The steps, each built on the last:
+
+      1. accepted example: the given one, or its body resized outward
+         from its own length until one passes
+      2. body length interval: two binary searches from that length,
+         assuming the accepted lengths are contiguous
+      3. literal prefix/suffix: delta debugging perturbs halves of the
+         input and only splits the halves that break acceptance, so
+         k constrained positions cost O(k log n) runs
+      4. per-position classes: each printable char is set at every body
+         position at once, then at one; only a char passing one but not
+         all is bisected over positions
+
+    Positions are assumed independent, which holds for per-char class
+    checks but would miss a rule such as "at least one digit".
+    """
+
+    def __init__(self, oracle=None, max_length=256, verbose=True):
+        self.oracle = oracle or get_oracle()
+        self.max_length = max_length
+        self.verbose = verbose
+        self.answers = {}
+        self.calls = 0
+
+    def accepted(self, text):
+        if text not in self.answers:
+            self.calls += 1
+            output, rc = self.oracle.check(text)
+            self.answers[text] = classify(output, rc) in (Outcome.VALIDATION_FAILED, Outcome.SUCCESS)
+        return self.answers[text]
+
+    def log(self, message):
+        if self.verbose:
+            print(f"  [{self.calls:4} runs] {message}")
+
+    @staticmethod
+    def split(text):
+        """Guess prefix/body/suffix around the outermost braces, if any"""
+        start, end = text.find('{'), text.rfind('}')
+        if start < 0 or end <= start:
+            return "", text, ""
+        return text[:start + 1], text[start + 1:end], text[end:]
+
+    def find_example(self, example):
+        prefix, body, suffix = self.split(example)
+        if self.accepted(example):
+            return prefix, body, suffix
+        limit = self.max_length - len(prefix) - len(suffix)
+        for offset in range(1, limit + 1):
+            for length in (len(body) - offset, len(body) + offset):
+                if 0 <= length <= limit and self.accepted(prefix + fill(body, length) + suffix):
+                    return prefix, fill(body, length), suffix
+        raise RuntimeError(f"no body length up to {limit} gets past the format check")
+
+    def length_bounds(self, prefix, body, suffix):
+        probe = lambda length: self.accepted(prefix + fill(body, length) + suffix)
+        low, high = 0, len(body)                       # smallest accepted in (low, high]
+        if probe(0):
+            high = 0
+        while high - low > 1:
+            middle = (low + high) // 2
+            low, high = (low, middle) if probe(middle) else (middle, high)
+        shortest = high
+        limit = self.max_length - len(prefix) - len(suffix)
+        low, high = len(body), limit                   # largest accepted in [low, high)
+        if probe(limit):
+            return shortest, limit
+        while high - low > 1:
+            middle = (low + high) // 2
+            low, high = (middle, high) if probe(middle) else (low, middle)
+        return shortest, low
+
+    def constrained(self, text, positions):
+        """Positions of `text` whose char cannot be perturbed (delta debugging)"""
+        if not positions:
+            return []
+        chars = list(text)
+        for pos in positions:
+            chars[pos] = perturb(chars[pos])
+        if self.accepted(''.join(chars)):
+            return []
+        if len(positions) == 1:
+            return list(positions)
+        half = len(positions) // 2
+        return self.constrained(text, positions[:half]) + self.constrained(text, positions[half:])
+
+    def accepting(self, text, ch, positions):
+        """Positions among `positions` where `ch` passes, by bisection"""
+        chars = list(text)
+        for pos in positions:
+            chars[pos] = ch
+        if self.accepted(''.join(chars)):
+            return list(positions)
+        if len(positions) == 1:
+            return []
+        half = len(positions) // 2
+        return self.accepting(text, ch, positions[:half]) + self.accepting(text, ch, positions[half:])
+
+    def edge_class(self, text, pos, union):
+        """Body chars accepted at `pos`, or '' if it only takes its own char
+
+        Two body chars are tried first, so a real literal costs two runs.
+        """
+        others = [ch for ch in union if ch != text[pos]]
+        replace = lambda ch: text[:pos] + ch + text[pos + 1:]
+        if not any(self.accepted(replace(ch)) for ch in others[:2]):
+            return ''
+        return ''.join(ch for ch in union if ch == text[pos] or self.accepted(replace(ch)))
+
+    def infer(self, example=EXAMPLE):
+        prefix, body, suffix = self.find_example(example)
+        text = prefix + body + suffix
+        self.log(f"accepted example: {text}")
+
+        lengths = self.length_bounds(prefix, body, suffix)
+        self.log(f"body length {lengths[0]}" if lengths[0] == lengths[1] else f"body length {lengths[0]}..{lengths[1]}")
+
+        fixed = set(self.constrained(text, list(range(len(text)))))
+        start = 0
+        while start in fixed:
+            start += 1
+        end = len(text)
+        while end - 1 in fixed and end > start:
+            end -= 1
+        prefix, suffix = text[:start], text[end:]
+        self.log(f"literal prefix {prefix!r}, suffix {suffix!r}")
+
+        body_positions = list(range(start, end))
+        classes = [set() for _ in body_positions]
+        middle = body_positions[len(body_positions) // 2] if body_positions else None
+        for ch in PRINTABLE:
+            chars = list(text)
+            for pos in body_positions:
+                chars[pos] = ch
+            if self.accepted(''.join(chars)):
+                passing = body_positions
+            elif middle is not None and self.accepting(text, ch, [middle]):
+                passing = self.accepting(text, ch, body_positions)
+            else:
+                continue
+            for pos in passing:
+                classes[pos - start].add(ch)
+        # A position that took nothing in isolation keeps its example char
+        classes = [''.join(sorted(chars or {text[pos]})) for pos, chars in zip(body_positions, classes)]
+
+        # Perturbing an edge char can pick a char the body rejects (e.g. '_'
+        # -> '`'), so re-test the literals next to the body with body chars
+        union = ''.join(sorted(set(''.join(classes))))
+        while start > 0 and (chars := self.edge_class(text, start - 1, union)):
+            start -= 1
+            classes.insert(0, chars)
+        while end < len(text) and (chars := self.edge_class(text, end, union)):
+            end += 1
+            classes.append(chars)
+        prefix, suffix = text[:start], text[end:]
+        if len(classes) != len(body_positions):
+            self.log(f"body widened: literal prefix {prefix!r}, suffix {suffix!r}")
+
+        grammar = Grammar(prefix, suffix, classes, lengths, self.calls)
+        self.log(f"mask {grammar.mask()}")
+        return grammar
+
+
+def load_grammar(path=GRAMMAR_PATH, refresh=False, verbose=False):
+    """Saved grammar, inferred (and saved) first if missing or `refresh`"""
+    if not refresh and os.path.exists(path):
+        with open(path) as f:
+            data = json.load(f)
+        return Grammar(data["prefix"], data["suffix"], data["classes"], data["lengths"], data["calls"])
+    grammar = GrammarInference(verbose=verbose).infer(instruction_example())
+    with open(path, 'w') as f:
+        json.dump(grammar.to_dict(), f, indent=1)
+    return grammar
+
+
+def instruction_example():
+    """The example flag given in instructions.txt (it fails the format check)"""
+    if os.path.exists(INSTRUCTIONS):
+        with open(INSTRUCTIONS, errors="ignore") as f:
+            match = re.search(r"\w+\{[^}]*\}", f.read())
+        if match:
+            return match.group(0)
+    return EXAMPLE
+
+
+def main():
+    print("KeyForge Grammar Inference")
+    print("="*50)
+    example = sys.argv[1] if len(sys.argv) > 1 else instruction_example()
+    print(f"  Starting from {example}\n")
+    inference = GrammarInference()
+    grammar = inference.infer(example)
+
+    mask, custom = grammar.content_mask()
+    print(f"\n  {grammar.calls} executions")
+    print(f"  Prefix {grammar.prefix!r}, suffix {grammar.suffix!r}, body length {grammar.lengths}")
+    print(f"  Content mask: {mask}")
+    print(f"  Custom charsets: {custom}")
+    print(f"  Keyspace: {grammar.keyspace().keyspace:.3e}")
+    with open(GRAMMAR_PATH, 'w') as f:
+        json.dump(grammar.to_dict(), f, indent=1)
+    print(f"  Saved to {GRAMMAR_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Hash family fingerprint scanner for KeyForge
+Find the magic constants of known hash, checksum and cipher families in the
+unpacked binary and map every hit to its file offset and virtual address
+"""
+import mmap
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+from oracle import UNPACKED_BINARY
+
+# (family, name, value, bytes); weak constants are small or common enough
+# to show up as ordinary data and are only reported next to strong hits
+CONSTANTS = [
+    ("FNV", "FNV-1 32 offset basis", 0x811C9DC5, 4),
+    ("FNV", "FNV-1 32 prime", 0x01000193, 4),
+    ("FNV", "FNV-1 64 offset basis", 0xCBF29CE484222325, 8),
+    ("FNV", "FNV-1 64 prime", 0x00000100000001B3, 8),
+    ("CRC32", "CRC-32 reflected polynomial", 0xEDB88320, 4),
+    ("CRC32", "CRC-32 polynomial", 0x04C11DB7, 4),
+    ("CRC32", "CRC-32C reflected polynomial", 0x82F63B78, 4),
+    ("djb2", "djb2 seed 5381", 5381, 4),
+    ("sdbm", "sdbm multiplier 65599", 65599, 4),
+    ("Murmur", "Murmur3 c1", 0xCC9E2D51, 4),
+    ("Murmur", "Murmur3 c2", 0x1B873593, 4),
+    ("Murmur", "Murmur3 n", 0xE6546B64, 4),
+    ("Murmur", "Murmur3 fmix 1", 0x85EBCA6B, 4),
+    ("Murmur", "Murmur3 fmix 2", 0xC2B2AE35, 4),
+    ("Murmur", "Murmur2 m", 0x5BD1E995, 4),
+    ("Murmur", "Murmur2 64 m", 0xC6A4A7935BD1E995, 8),
+    ("Murmur", "Murmur3 fmix64 1", 0xFF51AFD7ED558CCD, 8),
+    ("Murmur", "Murmur3 fmix64 2", 0xC4CEB9FE1A85EC53, 8),
+    ("xxHash", "xxh32 prime 1", 0x9E3779B1, 4),
+    ("xxHash", "xxh32 prime 2", 0x85EBCA77, 4),
+    ("xxHash", "xxh32 prime 3", 0xC2B2AE3D, 4),
+    ("xxHash", "xxh32 prime 4", 0x27D4EB2F, 4),
+    ("xxHash", "xxh32 prime 5", 0x165667B1, 4),
+    ("xxHash", "xxh64 prime 1", 0x9E3779B185EBCA87, 8),
+    ("xxHash", "xxh64 prime 2", 0xC2B2AE3D27D4EB4F, 8),
+    ("xxHash", "xxh64 prime 3", 0x165667B19E3779F9, 8),
+    ("xxHash", "xxh64 prime 4", 0x85EBCA77C2B2AE63, 8),
+    ("xxHash", "xxh64 prime 5", 0x27D4EB2F165667C5, 8),
+    ("MD5/SHA1", "MD5/SHA-1 IV A", 0x67452301, 4),
+    ("MD5/SHA1", "MD5/SHA-1 IV B", 0xEFCDAB89, 4),
+    ("MD5/SHA1", "MD5/SHA-1 IV C", 0x98BADCFE, 4),
+    ("MD5/SHA1", "MD5/SHA-1 IV D", 0x10325476, 4),
+    ("MD5", "MD5 T[1]", 0xD76AA478, 4),
+    ("SHA1", "SHA-1 IV E", 0xC3D2E1F0, 4),
+    ("SHA1", "SHA-1 K 0-19", 0x5A827999, 4),
+    ("SHA1", "SHA-1 K 20-39", 0x6ED9EBA1, 4),
+    ("SHA1", "SHA-1 K 40-59", 0x8F1BBCDC, 4),
+    ("SHA1", "SHA-1 K 60-79", 0xCA62C1D6, 4),
+    ("SHA256", "SHA-256 IV h0", 0x6A09E667, 4),
+    ("SHA256", "SHA-256 IV h1", 0xBB67AE85, 4),
+    ("SHA256", "SHA-256 IV h2", 0x3C6EF372, 4),
+    ("SHA256", "SHA-256 IV h7", 0x5BE0CD19, 4),
+    ("SHA256", "SHA-256 K[0]", 0x428A2F98, 4),
+    ("SHA512", "SHA-512 IV h0", 0x6A09E667F3BCC908, 8),
+    ("SHA512", "SHA-512 IV h1", 0xBB67AE8584CAA73B, 8),
+    ("TEA", "TEA/XTEA delta", 0x9E3779B9, 4),
+    ("TEA", "TEA decrypt sum (32 rounds)", 0xC6EF3720, 4),
+    ("SipHash", "SipHash v0 'somepseu'", 0x736F6D6570736575, 8),
+    ("SipHash", "SipHash v1 'dorandom'", 0x646F72616E646F6D, 8),
+    ("SipHash", "SipHash v2 'lygenera'", 0x6C7967656E657261, 8),
+    ("SipHash", "SipHash v3 'tedbytes'", 0x7465646279746573, 8),
+    ("FxHash", "FxHash seed", 0x517CC1B727220A95, 8),
+    ("Adler32", "Adler-32 modulus 65521", 65521, 4),
+]
+WEAK = {5381, 65599, 65521}
+
+# Runs of consecutive words that identify a table rather than one constant
+TABLES = [
+    ("CRC32", "CRC-32 table", [0x00000000, 0x77073096, 0xEE0E612C, 0x990951BA], 4),
+    ("CRC32", "CRC-32C table", [0x00000000, 0xF26B8303, 0xE13B70F7, 0x1350F3F4], 4),
+    ("MD5/SHA1", "MD5/SHA-1 IV block", [0x67452301, 0xEFCDAB89, 0x98BADCFE, 0x10325476], 4),
+    ("SHA256", "SHA-256 K table", [0x428A2F98, 0x71374491, 0xB5C0FBCF, 0xE9B5DBA5], 4),
+    ("MD5", "MD5 T table", [0xD76AA478, 0xE8C7B756, 0x242070DB, 0xC1BDCEEE], 4),
+]
+
+PT_LOAD = 1
+PF_X = 1
+
+
+class Segment:
+    """One PT_LOAD segment: file range, virtual address, permissions"""
+
+    def __init__(self, offset, vaddr, filesz, flags):
+        self.offset = offset
+        self.vaddr = vaddr
+        self.filesz = filesz
+        self.flags = flags
+
+    @property
+    def executable(self):
+        return bool(self.flags & PF_X)
+
+    def contains(self, offset):
+        return self.offset <= offset < self.offset + self.filesz
+
+
+def load_segments(data):
+    """PT_LOAD segments of an ELF64 little-endian image"""
+    if data[:4] != b"\x7fELF" or data[4] != 2:
+        raise ValueError("not an ELF64 file")
+    phoff, = struct.unpack_from("<Q", data, 32)
+    phentsize, phnum = struct.unpack_from("<HH", data, 54)
+    segments = []
+    for i in range(phnum):
+        p_type, p_flags, p_offset, p_vaddr, _, p_filesz = struct.unpack_from(
+            "<IIQQQQ", data, phoff + i * phentsize)
+        if p_type == PT_LOAD:
+            segments.append(Segment(p_offset, p_vaddr, p_filesz, p_flags))
+    return segments
+
+
+class Hit:
+    __slots__ = ("family", "name", "offset", "vaddr", "endian", "executable", "weak")
+
+    def __init__(self, family, name, offset, vaddr, endian, executable, weak=False):
+        self.family = family
+        self.name = name
+        self.offset = offset
+        self.vaddr = vaddr
+        self.endian = endian
+        self.executable = executable
+        self.weak = weak
+
+    def describe(self):
+        where = f"0x{self.vaddr:x}" if self.vaddr is not None else "unmapped"
+        region = "code" if self.executable else "data"
+        return f"{self.family:9} {self.name:30} file 0x{self.offset:07x}  va {where:>10}  {region} {self.endian}"
+
+
+def anchor(pattern):
+    """(position, 16-bit key) of the first byte pair in `pattern` with no zero byte
+
+    Small constants are mostly zero bytes in one byte order, and zeros are
+    everywhere in a binary; anchoring on non-zero bytes keeps the number
+    of survivors to check in full small.
+    """
+    for pos in range(len(pattern) - 1):
+        if pattern[pos] and pattern[pos + 1]:
+            return pos, int.from_bytes(pattern[pos:pos + 2], "little")
+    return 0, int.from_bytes(pattern[:2], "little")
+
+
+def candidate_offsets(buffer, keys):
+    """Byte offsets where one of the 16-bit `keys` starts
+
+    Two uint16 views (even and odd offsets) gathered through a 64K-entry
+    table test every offset of the file in a few vectorised passes; only
+    the survivors are checked in full.
+    """
+    table = np.zeros(1 << 16, dtype=bool)
+    table[list(keys)] = True
+    matches = np.zeros(len(buffer), dtype=bool)
+    for shift in (0, 1):
+        count = (len(buffer) - shift) // 2
+        matches[shift:shift + count * 2:2] = table[buffer[shift:shift + count * 2].view('<u2')]
+    return np.flatnonzero(matches)
+
+
+def scan(path=UNPACKED_BINARY):
+    """Every constant and table hit in the file, sorted by offset"""
+    # The numpy views keep the mapping alive; it is unmapped once they go
+    with open(path, "rb") as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    segments = load_segments(data)
+    buffer = np.frombuffer(data, np.uint8)
+    hits = []
+    # Every constant is searched as its little- and big-endian byte string,
+    # anchored on a non-zero byte pair, so one pass covers both byte orders
+    # and any placement, including unaligned immediates inside instructions
+    anchored = {}
+    for family, name, value, width in CONSTANTS:
+        for endian in ("little", "big"):
+            pattern = value.to_bytes(width, endian)
+            pos, key = anchor(pattern)
+            anchored.setdefault(key, []).append((pos, pattern, (family, name, endian[0] + "e", value in WEAK)))
+    for offset in candidate_offsets(buffer, anchored).tolist():
+        for pos, pattern, (family, name, endian, weak) in anchored[int.from_bytes(data[offset:offset + 2], "little")]:
+            start = offset - pos
+            if start >= 0 and data[start:start + len(pattern)] == pattern:
+                hits.append((family, name, start, endian, weak))
+    for family, name, words, width in TABLES:
+        for endian, order in (("le", "<"), ("be", ">")):
+            pattern = b"".join(struct.pack(f"{order}I", w) for w in words)
+            start = data.find(pattern)
+            while start >= 0:
+                hits.append((family, name, start, endian, False))
+                start = data.find(pattern, start + 1)
+
+    results = []
+    for family, name, offset, endian, weak in sorted(hits, key=lambda hit: hit[2]):
+        segment = next((s for s in segments if s.contains(offset)), None)
+        vaddr = segment.vaddr + offset - segment.offset if segment else None
+        results.append(Hit(family, name, offset, vaddr, endian, bool(segment and segment.executable), weak))
+    return results, segments
+
+
+def hotspots(hits, window=512):
+    """Code regions where strong constants of several kinds sit close together
+
+    A hash or cipher routine loads its constants as immediates within a
+    few hundred bytes of each other, so these are the places to start
+    disassembling. Weak constants only count next to a strong one.
+    """
+    code = [hit for hit in hits if hit.executable]
+    clusters = []
+    current = []
+    for hit in code:
+        if current and hit.offset - current[-1].offset > window:
+            clusters.append(current)
+            current = []
+        current.append(hit)
+    if current:
+        clusters.append(current)
+    ranked = []
+    for cluster in clusters:
+        strong = {hit.name for hit in cluster if not hit.weak}
+        if strong:
+            ranked.append((len(strong), cluster))
+    ranked.sort(key=lambda item: (-item[0], item[1][0].offset))
+    return ranked
+
+
+def function_start(path, hit, limit=4096):
+    """Best guess at the start of the function containing a code hit
+
+    Compilers pad between functions up to a 16-byte boundary, so the
+    first aligned address after the last `ret` (0xc3) byte before the hit
+    is usually the entry. A heuristic: a 0xc3 inside another instruction
+    moves the guess later, never earlier.
+    """
+    with open(path, "rb") as f:
+        f.seek(max(0, hit.offset - limit))
+        before = f.read(min(limit, hit.offset))
+    ret = before.rfind(b"\xc3")
+    if ret < 0:
+        return None
+    offset = hit.offset - len(before) + ret + 1
+    return hit.vaddr - (hit.offset - offset) + (-offset) % 16
+
+
+def main():
+    print("KeyForge Hash Fingerprint Scanner")
+    print("="*50)
+    path = sys.argv[1] if len(sys.argv) > 1 else UNPACKED_BINARY
+    start = time.perf_counter()
+    hits, segments = scan(path)
+    elapsed = time.perf_counter() - start
+    print(f"  {os.path.getsize(path):,} bytes, {len(segments)} PT_LOAD segments, "
+          f"{len(hits)} hits in {elapsed * 1000:.1f}ms\n")
+
+    strong = [hit for hit in hits if not hit.weak]
+    families = {}
+    for hit in strong:
+        families.setdefault(hit.family, set()).add(hit.name)
+    print("Families present:")
+    for family, names in sorted(families.items(), key=lambda item: -len(item[1])):
+        print(f"  {family:9} {len(names)} distinct constants: {', '.join(sorted(names))}")
+    if not families:
+        print("  none of the known constants; the check is likely custom arithmetic")
+
+    print("\nStrong hits:")
+    for hit in strong:
+        print(f"  {hit.describe()}")
+    print(f"  ({len(hits) - len(strong)} weak hits of small constants not listed)")
+
+    print("\nCode hotspots (where to start disassembling):")
+    for distinct, cluster in hotspots(hits)[:10]:
+        first, last = cluster[0], cluster[-1]
+        names = sorted({hit.name for hit in cluster})
+        entry = function_start(path, first)
+        where = f" in function ~0x{entry:x}" if entry is not None else ""
+        print(f"  va 0x{first.vaddr:x}-0x{last.vaddr:x}{where}: {distinct} strong constant(s): {', '.join(names)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Algebraic inversion of KeyForge segment checks
+Describe a recovered check as packing plus invertible mixing steps, derive the
+inverse steps, and solve each segment straight from its harvested target
+"""
+import subprocess
+import sys
+
+from grammar_inference import load_grammar
+from hash_cracker import SEGMENTS
+from oracle import UNPACKED_BINARY, make_flag
+from reverse_engineer import compare_targets
+
+
+def _mask(bits):
+    return (1 << bits) - 1
+
+
+def _rotl(x, r, bits):
+    r %= bits
+    return ((x << r) | (x >> (bits - r))) & _mask(bits)
+
+
+def _undo_xorshift(y, s, bits, left):
+    """x from y = x ^ (x >> s) (or << s): each pass fixes s more bits"""
+    x = y
+    for _ in range(bits // s + 1):
+        x = y ^ (((x << s) & _mask(bits)) if left else (x >> s))
+    return x
+
+
+# op -> apply(x, arg, bits) over `bits`-wide unsigned ints; invert_step()
+# maps each op to its undo, and anything else (and, or, shr) is lossy
+STEPS = {
+    "xor": lambda x, k, bits: x ^ k,
+    "add": lambda x, k, bits: (x + k) & _mask(bits),
+    "sub": lambda x, k, bits: (x - k) & _mask(bits),
+    "mul": lambda x, k, bits: (x * k) & _mask(bits),
+    "rotl": lambda x, r, bits: _rotl(x, r, bits),
+    "rotr": lambda x, r, bits: _rotl(x, bits - r % bits, bits),
+    "not": lambda x, k, bits: x ^ _mask(bits),
+    "xorshr": lambda x, s, bits: x ^ (x >> s),
+    "xorshl": lambda x, s, bits: x ^ ((x << s) & _mask(bits)),
+    "unxorshr": lambda x, s, bits: _undo_xorshift(x, s, bits, left=False),
+    "unxorshl": lambda x, s, bits: _undo_xorshift(x, s, bits, left=True),
+}
+
+
+def invert_step(op, arg, bits):
+    """The (op, arg) that undoes one step; multipliers must be odd"""
+    if op == "xor" or op == "not":
+        return op, arg
+    if op in ("add", "sub"):
+        return ("sub" if op == "add" else "add"), arg
+    if op == "mul":
+        if arg % 2 == 0:
+            raise ValueError(f"mul by even 0x{arg:x} loses the low bit; not invertible")
+        return "mul", pow(arg, -1, 1 << bits)
+    if op in ("rotl", "rotr"):
+        return ("rotr" if op == "rotl" else "rotl"), arg
+    if op in ("xorshr", "xorshl"):
+        if arg <= 0:
+            raise ValueError(f"{op} by {arg} is not a bijection")
+        return "un" + op, arg
+    raise ValueError(f"no inverse for {op!r}")
+
+
+class Pipeline:
+    """One segment check: pack `length` bytes into an int, then mixing steps
+
+    The segment is read as one `8 * length`-bit integer, big- or
+    little-endian; every step maps that state to a new one of the same
+    width, and the result is compared with the target. When every step
+    is a bijection the inverse pipeline runs the steps backward, so
+    solve() turns a target into the one segment that produces it in
+    O(steps).
+    """
+
+    def __init__(self, name, start, length, steps, address=None, endian="big"):
+        self.name = name
+        self.start = start
+        self.length = length
+        self.steps = list(steps)
+        self.address = address
+        self.endian = endian
+        self.bits = 8 * length
+
+    def pack(self, segment):
+        return int.from_bytes(segment, self.endian)
+
+    def unpack(self, value):
+        return value.to_bytes(self.length, self.endian)
+
+    def apply(self, state):
+        for op, arg in self.steps:
+            state = STEPS[op](state, arg, self.bits)
+        return state
+
+    def forward(self, segment):
+        if isinstance(segment, str):
+            segment = segment.encode('latin-1')
+        return self.apply(self.pack(segment))
+
+    def inverse(self):
+        """Inverse steps, last step first; raises ValueError if any is lossy"""
+        return [invert_step(op, arg, self.bits) for op, arg in reversed(self.steps)]
+
+    def solve(self, target):
+        state = target & _mask(self.bits)
+        for op, arg in self.inverse():
+            state = STEPS[op](state, arg, self.bits)
+        segment = self.unpack(state)
+        if self.forward(segment) != target:
+            raise ValueError(f"target 0x{target:x} is outside the image of {self.name}")
+        return segment
+
+    def describe(self, steps=None):
+        return " ; ".join(f"{op} 0x{arg:x}" if isinstance(arg, int) else op for op, arg in (steps or self.steps))
+
+
+# content[0:5]: b0..b4 each xored with 84 09 12 24 48 and shifted into one
+# 40-bit value, compared as a qword at va 0x5b7140. Xoring every byte of a
+# big-endian pack with its key is a xor of the packed value.
+PIPELINES = [
+    Pipeline("xor-pack content[0:5]", 0, 5, [("xor", 0x8409122448)], address=0x5B7140),
+]
+
+# Checks that are not one bijection of a packed value, and what solves them
+NOT_INVERTIBLE = {
+    0x5B7138: "per-byte FNV-1a fold over 6 bytes: 2^48 inputs onto 2^32 values (meet_in_middle.py)",
+    0x5B7134: "sums, a product mod 65535 and an xor folded to 16 bits: lossy (hash_cracker.py)",
+    0x5B7130: "per-byte nibble-table fold over 10 bytes: 2^80 inputs onto 2^32 values (meet_in_middle.py)",
+}
+
+
+def harvest(binary=UNPACKED_BINARY):
+    """reverse_engineer.compare_targets() over a fresh intel-syntax disassembly
+
+    Raises RuntimeError if objdump is missing or fails, rather than
+    harvesting nothing from an empty listing.
+    """
+    try:
+        disasm = subprocess.run(["objdump", "-d", "-M", "intel", binary],
+                                capture_output=True, text=True, check=True).stdout
+    except FileNotFoundError:
+        raise RuntimeError("objdump not found; install binutils to harvest targets")
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"objdump failed on {binary}: {e.stderr.strip()}")
+    return compare_targets(disasm, binary)
+
+
+def main():
+    print("KeyForge Algebraic Inversion")
+    print("="*50)
+
+    # Round trip through a Murmur3 fmix32, the classic invertible finaliser
+    fmix = Pipeline("fmix32", 0, 4, [("xorshr", 16), ("mul", 0x85EBCA6B), ("xorshr", 13),
+                                     ("mul", 0xC2B2AE35), ("xorshr", 16)], endian="little")
+    print(f"  {fmix.name}: {fmix.describe()}")
+    print(f"  inverse: {fmix.describe(fmix.inverse())}")
+    value = fmix.forward(b"KeyF")
+    print(f"  'KeyF' -> 0x{value:08x} -> {fmix.solve(value)!r}\n")
+
+    targets = harvest(sys.argv[1] if len(sys.argv) > 1 else UNPACKED_BINARY)
+    print(f"  {len(targets)} compare operands harvested from the binary")
+    charset = load_grammar().content_charset()
+    solved = {}
+    for pipeline in PIPELINES:
+        if pipeline.address not in targets:
+            print(f"  {pipeline.name}: no target at 0x{pipeline.address:x}")
+            continue
+        size, target = targets[pipeline.address]
+        segment = pipeline.solve(target)
+        text = segment.decode('latin-1')
+        ok = all(ch in charset for ch in text)
+        print(f"  {pipeline.name}: 0x{target:x} -> inverse [{pipeline.describe(pipeline.inverse())}] "
+              f"-> {text!r}{'' if ok else '  (outside the grammar charset)'}")
+        solved[pipeline.start] = text
+    for address, reason in NOT_INVERTIBLE.items():
+        if address in targets:
+            print(f"  0x{address:x} = 0x{targets[address][1]:x}: {reason}")
+
+    # The solved slices pinned into a content template; the rest is left
+    # to the collision-bounded searches named above
+    template = ["?"] * 27
+    for start, text in solved.items():
+        template[start:start + len(text)] = text
+    segments = ", ".join(segment.name for segment in SEGMENTS)
+    print(f"\n  Known so far: {make_flag(''.join(template))}  (searched offline: {segments})")
+
+
+if __name__ == "__main__":
+    main()
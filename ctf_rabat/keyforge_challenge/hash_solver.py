@@ -3,20 +3,23 @@
 Hash-based approach for KeyForge
 Similar to tetouan challenge structure
 """
+from candidate_pool import CandidatePool
+from hash_cracker import FINGERPRINTS, SEGMENTS
+from hash_fingerprint import hotspots, scan
+from meet_in_middle import MIXERS, MeetInTheMiddle
+from mutations import Mutations
+from oracle import get_oracle
+from outcome_classifier import is_success
+from word_sequences import WordSequences
 
 def test_flag_content(content_27):
     """Test a 27-character content in VoidBox format"""
-    import subprocess
-    
     if len(content_27) != 27:
         return f"Wrong length: {len(content_27)}", -1
     
     flag = f"VoidBox{{{content_27}}}"
     try:
-        result = subprocess.run(['./KeyForge'], input=flag.encode() + b'\n',
-                              capture_output=True, timeout=2)
-        output = result.stdout.decode('utf-8', errors='ignore').strip()
-        return output, result.returncode
+        return get_oracle().check(flag)
     except Exception as e:
         return f"ERROR: {e}", -1
 
@@ -24,6 +27,36 @@ def main():
     print("Hash-based KeyForge Solver")
     print("="*40)
     
+    # Check which hash families the binary actually carries before guessing
+    hits, _ = scan()
+    families = sorted({hit.family for hit in hits if not hit.weak})
+    print(f"Hash constants in the binary: {', '.join(families) or 'none found'}")
+    for distinct, cluster in hotspots(hits):
+        names = ", ".join(sorted({hit.name for hit in cluster}))
+        print(f"  routine at va 0x{cluster[0].vaddr:x}: {names}")
+    print()
+    
+    # Segments whose hash is known are cracked offline first: invertible
+    # hashes meet in the middle over the whole grammar mask, the rest get
+    # the first 2^28 mask indices, a few seconds rather than 2^28 runs
+    print("Cracking hashed segments offline...")
+    for segment in SEGMENTS:
+        if FINGERPRINTS.get(segment.family) not in families:
+            continue
+        if segment.family in MIXERS:
+            solver = MeetInTheMiddle.for_segment(segment)
+            for text, value in solver.solve():
+                print(f"  {segment.name}: {text!r} -> 0x{value:08x}")
+            print(f"  {segment.name}: all {solver.keyspace.keyspace:,} candidates in "
+                  f"{solver.build_time + solver.join_time:.2f}s")
+            continue
+        cracker = segment.cracker()
+        for index, text, value in cracker.crack(stop=1 << 28):
+            print(f"  {segment.name}: {text!r} -> 0x{value:08x}")
+        print(f"  {segment.name}: {cracker.hashed:,} of {cracker.keyspace.keyspace:,} "
+              f"at {cracker.rate / 1e6:.0f}M hashes/sec")
+    print()
+    
     # Based on tetouan challenge pattern: sections validated separately
     # Try patterns similar to: "wh0_s41d_y0" + "ahhrmi" + "ri_hgsklra"
     
@@ -39,42 +72,42 @@ def main():
         ("y0u_f0und_1t", "_h3r3_", "1n_th3_v01d"), # Success theme
     ]
     
-    for p1, p2, p3 in patterns_11_6_10:
-        if len(p1) == 11 and len(p2) == 6 and len(p3) == 10:
-            content = p1 + p2 + p3
-            output, rc = test_flag_content(content)
-            print(f"  {content}: {output}")
-    
-    print("\nTesting other length combinations...")
+    # One pool (and one set of fork servers) for every pattern's mutations
+    with CandidatePool() as pool:
+        for p1, p2, p3 in patterns_11_6_10:
+            if len(p1) == 11 and len(p2) == 6 and len(p3) == 10:
+                content = p1 + p2 + p3
+                output, rc = test_flag_content(content)
+                print(f"  {content}: {output}")
+                
+                # The leet spelling above is one guess; stream its neighbours
+                # (one or two leet/case/separator substitutions) as well
+                variants = Mutations(content).ranked(min_mutations=1, max_mutations=2)
+                tested = pool.tested
+                found = pool.search(variants, is_success)
+                print(f"    + {pool.tested - tested} mutations")
+                if found:
+                    print(f"\nSUCCESS! FLAG: VoidBox{{{found}}}")
+                    return f"VoidBox{{{found}}}"
     
-    # Try different length splits that sum to 27
-    length_combinations = [
-        (9, 9, 9),   # Equal thirds
-        (13, 7, 7),  # Different split
-        (5, 11, 11), # Another split
-        (27,),       # Single piece
-    ]
+    print("\nTesting exact-length word sequences...")
     
     base_parts = [
         "rabat", "ctf", "finals", "keyforge", "void", "box", "flag", 
         "key", "license", "valid", "success", "win", "solved", "correct"
     ]
     
-    import itertools
-    
-    for lengths in length_combinations[:2]:  # Test first 2 combinations
-        if len(lengths) == 3:
-            l1, l2, l3 = lengths
-            for w1, w2, w3 in itertools.combinations(base_parts, 3):
-                p1 = (w1 + "_" * l1)[:l1]
-                p2 = (w2 + "_" * l2)[:l2] 
-                p3 = (w3 + "_" * l3)[:l3]
-                
-                content = p1 + p2 + p3
-                if len(content) == 27:
-                    output, rc = test_flag_content(content)
-                    if "validation failed" not in output.lower():
-                        print(f"  {content}: {output}")
+    # Words joined by "_" (or run together) to exactly 27 chars; no slot
+    # padding, so no keyspace is spent on underscores
+    sequences = WordSequences(base_parts, max_words=4, separators={"_": 0.0, "": -1.0})
+    print(f"  {len(sequences)} sequences")
+    for content, score in sequences.ranked():
+        output, rc = test_flag_content(content)
+        if "validation failed" not in output.lower():
+            print(f"  {content}: {output}")
+        if is_success(output):
+            print(f"\nSUCCESS! FLAG: VoidBox{{{content}}}")
+            return f"VoidBox{{{content}}}"
     
     # Try the most likely single-word approaches
     print("\nTesting single coherent phrases...")
@@ -102,7 +135,7 @@ def main():
         print(f"  {phrase}: {output}")
         
         # Check for success
-        if any(word in output.lower() for word in ['valid!', 'success', 'correct', 'congratulations']):
+        if is_success(output):
             print(f"\nSUCCESS! FLAG: VoidBox{{{phrase}}}")
             return f"VoidBox{{{phrase}}}"
     
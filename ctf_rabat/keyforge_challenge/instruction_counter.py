@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Instruction-count side channel for KeyForge
+Deterministic retired-instruction counts per candidate, plus byte-at-a-time recovery
+"""
+import ctypes
+import os
+import signal
+import sys
+
+import ptrace_tools
+from oracle import CONTENT_LENGTH, UNPACKED_BINARY, make_flag
+from outcome_classifier import is_success
+from ptrace_tools import PTRACE_SINGLESTEP, SYS_READ
+
+PERF_TYPE_HARDWARE = 0
+PERF_COUNT_HW_INSTRUCTIONS = 1
+PERF_FLAG_FD_CLOEXEC = 1 << 3
+SYS_PERF_EVENT_OPEN = 298
+
+# perf_event_attr flag bits
+ATTR_DISABLED = 1 << 0
+ATTR_EXCLUDE_KERNEL = 1 << 5
+ATTR_EXCLUDE_HV = 1 << 6
+ATTR_ENABLE_ON_EXEC = 1 << 12
+
+PRINTABLE = ''.join(chr(c) for c in range(0x20, 0x7f))
+
+
+class PerfEventAttr(ctypes.Structure):
+    """struct perf_event_attr (PERF_ATTR_SIZE_VER8)"""
+    _fields_ = [
+        ("type", ctypes.c_uint32), ("size", ctypes.c_uint32),
+        ("config", ctypes.c_uint64), ("sample_period", ctypes.c_uint64),
+        ("sample_type", ctypes.c_uint64), ("read_format", ctypes.c_uint64),
+        ("flags", ctypes.c_uint64), ("wakeup_events", ctypes.c_uint32),
+        ("bp_type", ctypes.c_uint32), ("config1", ctypes.c_uint64),
+        ("config2", ctypes.c_uint64), ("branch_sample_type", ctypes.c_uint64),
+        ("sample_regs_user", ctypes.c_uint64), ("sample_stack_user", ctypes.c_uint32),
+        ("clockid", ctypes.c_int32), ("sample_regs_intr", ctypes.c_uint64),
+        ("aux_watermark", ctypes.c_uint32), ("sample_max_stack", ctypes.c_uint16),
+        ("reserved_2", ctypes.c_uint16), ("aux_sample_size", ctypes.c_uint32),
+        ("reserved_3", ctypes.c_uint32), ("sig_data", ctypes.c_uint64),
+        ("config3", ctypes.c_uint64),
+    ]
+
+
+def perf_event_open(pid):
+    """Open a user-space instruction counter that starts when `pid` execs"""
+    attr = PerfEventAttr()
+    attr.type = PERF_TYPE_HARDWARE
+    attr.size = ctypes.sizeof(attr)
+    attr.config = PERF_COUNT_HW_INSTRUCTIONS
+    attr.flags = ATTR_DISABLED | ATTR_EXCLUDE_KERNEL | ATTR_EXCLUDE_HV | ATTR_ENABLE_ON_EXEC
+    fd = ptrace_tools.libc.syscall(SYS_PERF_EVENT_OPEN, ctypes.byref(attr),
+                                   pid, -1, -1, PERF_FLAG_FD_CLOEXEC)
+    if fd < 0:
+        err = ctypes.get_errno()
+        raise OSError(err, f"perf_event_open: {os.strerror(err)}")
+    return fd
+
+
+def perf_available():
+    """True when hardware instruction counters can be opened for our children"""
+    try:
+        os.close(perf_event_open(0))
+        return True
+    except OSError:
+        return False
+
+
+def _read_all(fd):
+    chunks = []
+    while True:
+        chunk = os.read(fd, 65536)
+        if not chunk:
+            return b''.join(chunks)
+        chunks.append(chunk)
+
+
+class PerfCounter:
+    """Count every user-space instruction of one full run via perf_event_open"""
+
+    name = "perf"
+
+    def __init__(self, binary=UNPACKED_BINARY):
+        self.binary = binary
+
+    def run(self, data):
+        """Returns (instructions, stdout bytes, returncode)"""
+        go_r, go_w = os.pipe()
+        stdin_r, stdin_w = os.pipe()
+        stdout_r, stdout_w = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                os.close(go_w)
+                os.read(go_r, 1)
+                os.dup2(stdin_r, 0)
+                os.dup2(stdout_w, 1)
+                os.execv(self.binary, [self.binary])
+            finally:
+                os._exit(127)
+        for fd in (go_r, stdin_r, stdout_w):
+            os.close(fd)
+        try:
+            counter = perf_event_open(pid)
+        except OSError:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            raise
+        try:
+            os.write(go_w, b'x')
+            os.close(go_w)
+            os.write(stdin_w, data)
+            os.close(stdin_w)
+            stdout = _read_all(stdout_r)
+            _, status = os.waitpid(pid, 0)
+            instructions = int.from_bytes(os.read(counter, 8), 'little')
+        finally:
+            os.close(counter)
+            os.close(stdout_r)
+        return instructions, stdout, os.waitstatus_to_exitcode(status)
+
+
+class PtraceCounter:
+    """Fallback: single-step from the license read() return to process exit"""
+
+    name = "ptrace"
+
+    def __init__(self, binary=UNPACKED_BINARY):
+        self.binary = binary
+
+    def run(self, data):
+        stdin_r, stdin_w = os.pipe()
+        stdout_r, stdout_w = os.pipe()
+        os.write(stdin_w, data)
+        os.close(stdin_w)
+        proc = ptrace_tools.TracedProcess([self.binary], stdin=stdin_r, stdout=stdout_w)
+        os.close(stdin_r)
+        os.close(stdout_w)
+        try:
+            if proc.run_to_syscall_entry(SYS_READ, lambda regs: regs.rdi == 0) is None:
+                raise OSError("KeyForge exited before reading the license key")
+            proc.next_syscall_stop()  # read() returns
+
+            instructions = 0
+            sig = 0
+            while True:
+                proc.resume(PTRACE_SINGLESTEP, sig)
+                status = proc.wait()
+                if proc.exit_status is not None:
+                    break
+                instructions += 1
+                stopsig = os.WSTOPSIG(status)
+                sig = 0 if stopsig == signal.SIGTRAP else stopsig
+        finally:
+            proc.kill()
+        stdout = _read_all(stdout_r)
+        os.close(stdout_r)
+        return instructions, stdout, os.waitstatus_to_exitcode(proc.exit_status)
+
+
+class InstructionCounter:
+    """Per-candidate instruction-count probe; perf when allowed, else ptrace"""
+
+    def __init__(self, binary=UNPACKED_BINARY, method=None):
+        if method is None:
+            method = "perf" if perf_available() else "ptrace"
+        self.backend = (PerfCounter if method == "perf" else PtraceCounter)(binary)
+        self.calls = 0
+
+    @property
+    def method(self):
+        return self.backend.name
+
+    def count(self, content_27):
+        """Returns (instructions, output, returncode) for a 27-char content"""
+        self.calls += 1
+        instructions, stdout, rc = self.backend.run(make_flag(content_27).encode() + b'\n')
+        return instructions, stdout.decode('utf-8', errors='ignore').strip(), rc
+
+
+def measure_noise(counter, content, repeats=5):
+    """Spread (max - min) of `repeats` counts of one content; at least 1"""
+    counts = [counter.count(content)[0] for _ in range(repeats)]
+    return max(max(counts) - min(counts), 1)
+
+
+def stable_count(counter, content, repeats):
+    """Minimum of `repeats` counts; stray extra instructions only add, never subtract"""
+    return min(counter.count(content)[0] for _ in range(repeats))
+
+
+def recover_by_depth(counter, known="", alphabet=PRINTABLE, filler="a", is_success=None,
+                     repeats=5, top=5, verbose=True):
+    """Grow `known` one position at a time, keeping the deepest-running char
+
+    Each position is swept once over the alphabet (len(alphabet) probes),
+    then the `top` deepest chars are re-measured `repeats` times each and
+    ranked by their minimum count. A char is accepted only when its lead
+    over the runner-up exceeds the noise, the spread of `repeats` counts of
+    one fixed input measured up front. Otherwise the position is
+    ambiguous and recovery stops there rather than guessing, since a wrong
+    char would poison every later position.
+    """
+    known = list(known)
+    noise = measure_noise(counter, ''.join(known) + filler * (CONTENT_LENGTH - len(known)), repeats)
+    if verbose:
+        print(f"  [*] Noise: counts of one input vary by up to {noise} instructions")
+    while len(known) < CONTENT_LENGTH:
+        pos = len(known)
+        pad = filler * (CONTENT_LENGTH - pos - 1)
+        scores = {}
+        for ch in alphabet:
+            candidate = ''.join(known) + ch + pad
+            instructions, output, rc = counter.count(candidate)
+            scores[ch] = instructions
+            if is_success is not None and is_success(output):
+                if verbose:
+                    print(f"  [+] Success at position {pos}: {candidate}")
+                return candidate
+
+        # Re-measure the leaders; a single sweep count can be off by the noise
+        leaders = sorted(scores, key=scores.get, reverse=True)[:max(top, 2)]
+        stable = {ch: stable_count(counter, ''.join(known) + ch + pad, repeats) for ch in leaders}
+        ranked = sorted(stable, key=stable.get, reverse=True)
+        best, runner_up = ranked[0], ranked[1]
+        lead = stable[best] - stable[runner_up]
+        if lead <= noise:
+            if verbose:
+                print(f"  [-] Position {pos:2}: no clear signal ({best!r} {stable[best]} vs "
+                      f"{runner_up!r} {stable[runner_up]}, noise {noise}); stopping")
+            break
+        known.append(best)
+        if verbose:
+            print(f"  [+] Position {pos:2}: {best!r} ({stable[best]} vs {stable[runner_up]} "
+                  f"next best, noise {noise}) -> {''.join(known)}")
+    return ''.join(known)
+
+
+def main():
+    counter = InstructionCounter()
+    print("KeyForge Instruction-Count Side Channel")
+    print("="*50)
+    print(f"Counter: {counter.method}")
+
+    for content in ["a" * 27, "wh0" + "a" * 24, "wh0_s41d_y0ahhrmiri_hgsklra"]:
+        instructions, output, rc = counter.count(content)
+        print(f"  {content}: {instructions:8} instructions - {output}")
+
+    if len(sys.argv) > 1 and sys.argv[1] == "--recover":
+        known = sys.argv[2] if len(sys.argv) > 2 else ""
+        print(f"\n[*] Byte-at-a-time recovery from {known!r}...")
+        result = recover_by_depth(counter, known, is_success=is_success)
+        print(f"\nRecovered: {result} ({counter.calls} runs)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Hashcat-style mask keyspace for KeyForge
+Every candidate is an integer index: slice into shards, visit in random order,
+resume from a saved index, and decode whole batches at once with numpy
+"""
+import math
+import random
+import string
+import sys
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+CHARSETS = {
+    'l': string.ascii_lowercase,
+    'u': string.ascii_uppercase,
+    'd': string.digits,
+    'h': string.digits + 'abcdef',
+    'H': string.digits + 'ABCDEF',
+    's': ' ' + string.punctuation,
+    'a': string.ascii_lowercase + string.ascii_uppercase + string.digits + ' ' + string.punctuation,
+}
+
+
+def parse_mask(mask, custom=None):
+    """Split a mask into one charset string per position
+
+    ?l ?u ?d ?h ?H ?s ?a are the hashcat builtins, ?1..?4 the custom
+    charsets (which may themselves use builtins, e.g. {'1': '?l_'}),
+    ?? a literal '?', and anything else a literal char.
+    """
+    custom = {key: expand_charset(value) for key, value in (custom or {}).items()}
+    positions = []
+    i = 0
+    while i < len(mask):
+        ch = mask[i]
+        if ch == '?':
+            if i + 1 >= len(mask):
+                raise ValueError(f"mask ends with a bare '?': {mask!r}")
+            key = mask[i + 1]
+            if key == '?':
+                positions.append('?')
+            elif key in CHARSETS:
+                positions.append(CHARSETS[key])
+            elif key in custom:
+                positions.append(custom[key])
+            else:
+                raise ValueError(f"unknown charset ?{key} in mask {mask!r}")
+            i += 2
+        else:
+            positions.append(ch)
+            i += 1
+    return positions
+
+
+def expand_charset(spec):
+    """Custom charset text with ?x builtins expanded and duplicates removed"""
+    chars = []
+    i = 0
+    while i < len(spec):
+        if spec[i] == '?' and i + 1 < len(spec) and spec[i + 1] in CHARSETS:
+            chars.extend(CHARSETS[spec[i + 1]])
+            i += 2
+        else:
+            chars.append(spec[i])
+            i += 1
+    return ''.join(dict.fromkeys(chars))
+
+
+class AffinePermutation:
+    """Bijection i -> (a*i + b) mod n with a random a coprime to n
+
+    O(1) per index in either direction for keyspaces of any size, so a
+    random visiting order needs no storage and resumes from a counter.
+    """
+
+    def __init__(self, n, seed=None):
+        rng = random.Random(seed)
+        self.n = n
+        self.a = 1
+        if n > 2:
+            while True:
+                self.a = rng.randrange(1, n)
+                if math.gcd(self.a, n) == 1:
+                    break
+        self.b = rng.randrange(n) if n > 1 else 0
+        self.a_inverse = pow(self.a, -1, n) if n > 1 else 0
+
+    def __call__(self, i):
+        return (self.a * i + self.b) % self.n
+
+    def inverse(self, j):
+        return (j - self.b) * self.a_inverse % self.n
+
+
+class Mask:
+    """Keyspace of one mask; position 0 is the most significant digit
+
+    Index i and its candidate convert in O(positions) both ways, so the
+    keyspace can be split into shards, walked in a random order and resumed
+    from any index. `batch()` decodes a run of consecutive indices into an
+    (N, positions) uint8 array in a handful of vectorised operations.
+    """
+
+    def __init__(self, mask, custom=None):
+        self.mask = mask
+        self._setup(parse_mask(mask, custom))
+
+    def _setup(self, charsets):
+        self.charsets = charsets
+        self.radices = [len(charset) for charset in self.charsets]
+        self.keyspace = math.prod(self.radices)
+        if np is not None:
+            width = max(self.radices)
+            self.table = np.zeros((len(self.charsets), width), dtype=np.uint8)
+            for pos, charset in enumerate(self.charsets):
+                self.table[pos, :len(charset)] = np.frombuffer(charset.encode('latin-1'), np.uint8)
+
+    @property
+    def width(self):
+        """Number of positions, i.e. the candidate length; the size is `keyspace`"""
+        return len(self.charsets)
+
+    def positions(self, start, stop=None):
+        """Sub-keyspace of positions start..stop-1, e.g. one half of a segment"""
+        part = object.__new__(Mask)
+        part.mask = None
+        part._setup(self.charsets[start:stop])
+        return part
+
+    def reorder(self, orders):
+        """Same keyspace with each position's chars in `orders[position]` order first
+
+        `orders` maps a position to ranked chars, e.g. timing_attack's
+        load_ranking(); chars outside the position's charset are ignored
+        and unranked ones keep their place after the ranked ones.
+        """
+        charsets = []
+        for pos, charset in enumerate(self.charsets):
+            ranked = [ch for ch in orders.get(pos, '') if ch in charset]
+            charsets.append(''.join(dict.fromkeys(ranked + list(charset))))
+        ordered = object.__new__(Mask)
+        ordered.mask = self.mask
+        ordered._setup(charsets)
+        return ordered
+
+    def digits(self, index):
+        if not 0 <= index < self.keyspace:
+            raise IndexError(f"index {index} outside keyspace of {self.keyspace}")
+        digits = [0] * len(self.radices)
+        for pos in range(len(self.radices) - 1, -1, -1):
+            index, digits[pos] = divmod(index, self.radices[pos])
+        return digits
+
+    def candidate(self, index):
+        return ''.join(charset[d] for charset, d in zip(self.charsets, self.digits(index)))
+
+    def index(self, candidate):
+        if len(candidate) != len(self.charsets):
+            raise ValueError(f"candidate length {len(candidate)} != mask length {len(self.charsets)}")
+        index = 0
+        for charset, radix, ch in zip(self.charsets, self.radices, candidate):
+            digit = charset.find(ch)
+            if digit < 0:
+                raise ValueError(f"{ch!r} not allowed by the mask at this position")
+            index = index * radix + digit
+        return index
+
+    def shard(self, number, count):
+        """[start, stop) of shard `number` out of `count` near-equal shards"""
+        return self.keyspace * number // count, self.keyspace * (number + 1) // count
+
+    def batch(self, start, count):
+        """Candidates start..start+count-1 as an (N, positions) uint8 array
+
+        The start index is decoded once; offsets 0..N-1 are then added as
+        a vectorised mixed-radix carry chain that stops as soon as every
+        carry is zero, so only the low positions are ever touched.
+        Falls back to a list of bytes when numpy is missing.
+        """
+        count = max(0, min(count, self.keyspace - start))
+        if np is None:
+            return [self.candidate(i).encode('latin-1') for i in range(start, start + count)]
+        base = self.digits(start) if count else [0] * len(self.radices)
+        digits = np.empty((count, len(self.radices)), dtype=np.int64)
+        digits[:] = base
+        carry = np.arange(count, dtype=np.int64)
+        for pos in range(len(self.radices) - 1, -1, -1):
+            if not carry.any():
+                break
+            total = digits[:, pos] + carry
+            carry, digits[:, pos] = np.divmod(total, self.radices[pos])
+        return self.table[np.arange(len(self.radices)), digits]
+
+    def batches(self, start=0, stop=None, size=65536):
+        """Yield (start index, batch) covering [start, stop), resumable from any start"""
+        stop = self.keyspace if stop is None else min(stop, self.keyspace)
+        while start < stop:
+            count = min(size, stop - start)
+            yield start, self.batch(start, count)
+            start += count
+
+    def random_batches(self, seed=None, size=65536, start_block=0):
+        """Yield (block number, batch) over the whole keyspace in random block order
+
+        The keyspace is cut into blocks of `size` consecutive indices and the
+        blocks are visited through an affine permutation; resume by passing
+        the next block number as `start_block`.
+        """
+        blocks = -(-self.keyspace // size)
+        order = AffinePermutation(blocks, seed)
+        for block in range(start_block, blocks):
+            yield block, self.batch(order(block) * size, size)
+
+    def iter_from(self, start):
+        """Every candidate from index `start` on as a str (checkpoint resume hook)"""
+        for _, batch in self.batches(start):
+            yield from as_strings(batch)
+
+    def __iter__(self):
+        return self.iter_from(0)
+
+
+def as_strings(batch):
+    """Decode one batch (array or list of bytes) to a list of str"""
+    if np is not None and isinstance(batch, np.ndarray):
+        rows = np.ascontiguousarray(batch).view(f"S{batch.shape[1]}").ravel().tolist()
+    else:
+        rows = batch
+    return [row.decode('latin-1') for row in rows]
+
+
+def main():
+    print("KeyForge Mask Keyspace")
+    print("="*50)
+    mask = sys.argv[1] if len(sys.argv) > 1 else "wh0_s41d_y0ahhrmiri_hgs?l?l?l?l"
+    keyspace = Mask(mask)
+    print(f"  mask {mask}: {keyspace.width} positions, {keyspace.keyspace:,} candidates")
+    print(f"  numpy batches: {'yes' if np is not None else 'no (pure Python fallback)'}")
+
+    last = keyspace.keyspace - 1
+    print(f"  index 0 -> {keyspace.candidate(0)}")
+    print(f"  index {last} -> {keyspace.candidate(last)} -> {keyspace.index(keyspace.candidate(last))}")
+    print(f"  shard 2/4: {keyspace.shard(2, 4)}")
+
+    produced = 0
+    start = time.perf_counter()
+    for _, batch in keyspace.batches(size=1 << 16):
+        produced += len(batch)
+        if produced >= 4_000_000:
+            break
+    elapsed = time.perf_counter() - start
+    print(f"  {produced:,} candidates in {elapsed:.2f}s ({produced / elapsed:,.0f}/s)")
+
+
+if __name__ == "__main__":
+    main()
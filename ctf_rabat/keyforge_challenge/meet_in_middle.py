@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Meet-in-the-middle solver for KeyForge segments
+Hash the front of a segment forward from the seed, un-hash the back from the
+target, and join the two sides on the intermediate state
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+from hash_cracker import (FNV_OFFSET, FNV_PRIME, HASHES, NIBBLE_SEED, NIBBLE_TABLE, SEGMENTS,
+                          as_matrix, columns)
+from mask_attack import Mask
+from vector_model import rotl, rotr
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MITM_DIR = os.path.join(HERE, '.mitm')
+
+
+def _inverse(k):
+    """Multiplicative inverse of an odd k modulo 2^32, as uint32"""
+    return np.uint32(pow(k, -1, 1 << 32))
+
+
+def _lo(b):
+    return NIBBLE_TABLE[b & np.uint32(15)]
+
+
+def _hi(b):
+    return NIBBLE_TABLE[(b >> np.uint32(4)) & np.uint32(15)]
+
+
+class Mixer:
+    """A hash whose per-byte update can be undone: unstep(step(h, b), b) == h
+
+    Both functions work on uint32 arrays of states and byte values, so a
+    whole batch of prefixes is hashed forward, or a batch of suffixes is
+    walked backward from a target, in one pass per position.
+    """
+
+    def __init__(self, name, seed, step, unstep):
+        self.name = name
+        self.seed = seed
+        self.step = step
+        self.unstep = unstep
+
+    def forward(self, matrix, state=None, signed=False):
+        h = np.full(matrix.shape[0], self.seed if state is None else state, dtype=np.uint32)
+        for b in columns(matrix, signed):
+            h = self.step(h, b)
+        return h
+
+    def backward(self, matrix, target, signed=False):
+        """The states from which `matrix` rows lead to `target`"""
+        h = np.full(matrix.shape[0], target, dtype=np.uint32)
+        for b in reversed(columns(matrix, signed)):
+            h = self.unstep(h, b)
+        return h
+
+
+# Keyed by the hash_cracker family they invert
+MIXERS = {
+    "fnv1": Mixer("fnv1", FNV_OFFSET,
+                  lambda h, b: (h * np.uint32(FNV_PRIME)) ^ b,
+                  lambda h, b: (h ^ b) * _inverse(FNV_PRIME)),
+    "fnv1a": Mixer("fnv1a", FNV_OFFSET,
+                   lambda h, b: (h ^ b) * np.uint32(FNV_PRIME),
+                   lambda h, b: (h * _inverse(FNV_PRIME)) ^ b),
+    "djb2": Mixer("djb2", 5381,
+                  lambda h, b: h * np.uint32(33) + b,
+                  lambda h, b: (h - b) * _inverse(33)),
+    "sdbm": Mixer("sdbm", 0,
+                  lambda h, b: h * np.uint32(65599) + b,
+                  lambda h, b: (h - b) * _inverse(65599)),
+    "rolling_xor": Mixer("rolling_xor", 0,
+                         lambda h, b: rotl(h, 5) ^ b,
+                         lambda h, b: rotr(h ^ b, 5)),
+    "rolling_add": Mixer("rolling_add", 0,
+                         lambda h, b: rotl(h, 5) + b,
+                         lambda h, b: rotr(h - b, 5)),
+    "keyforge_nibble": Mixer("keyforge_nibble", NIBBLE_SEED,
+                             lambda h, b: rotl(h + _lo(b), 3) ^ _hi(b),
+                             lambda h, b: rotr(h ^ _hi(b), 3) - _lo(b)),
+}
+
+
+class SortedTable:
+    """(state, keyspace index) pairs sorted by state, in RAM or memory-mapped
+
+    Built in two passes: the first counts states per bucket of their top
+    `bits` bits, the second scatters every batch straight into its bucket,
+    and each bucket is then sorted on its own. Buckets follow state order,
+    so the whole table ends up sorted and a lookup is one searchsorted,
+    while no more than one bucket is ever sorted in memory. With a `path`
+    both columns are np.memmap files there and only touched pages load.
+    """
+
+    def __init__(self, keyspace, states, path=None, bits=8, batch_size=1 << 20):
+        count = keyspace.keyspace
+        shift = np.uint32(32 - bits)
+        index_type = np.uint32 if count <= 1 << 32 else np.uint64
+        self.path = path
+        self.states = self._array("states", np.uint32, count)
+        self.indices = self._array("indices", index_type, count)
+
+        counts = np.zeros(1 << bits, dtype=np.int64)
+        for _, batch in keyspace.batches(size=batch_size):
+            counts += np.bincount(states(batch) >> shift, minlength=1 << bits)
+        starts = np.cumsum(counts) - counts
+
+        fill = starts.copy()
+        for offset, batch in keyspace.batches(size=batch_size):
+            h = states(batch)
+            bucket = h >> shift
+            order = np.argsort(bucket, kind='stable')
+            per = np.bincount(bucket, minlength=1 << bits)
+            sorted_bucket = bucket[order]
+            rank = np.arange(len(order)) - (np.cumsum(per) - per)[sorted_bucket]
+            destination = fill[sorted_bucket] + rank
+            self.states[destination] = h[order]
+            self.indices[destination] = offset + order
+            fill += per
+
+        for start, size in zip(starts.tolist(), counts.tolist()):
+            if size > 1:
+                part = slice(start, start + size)
+                order = np.argsort(self.states[part], kind='stable')
+                self.states[part] = self.states[part][order]
+                self.indices[part] = self.indices[part][order]
+        if path is not None:
+            self.states.flush()
+            self.indices.flush()
+
+    def _array(self, name, dtype, count):
+        if self.path is None:
+            return np.empty(count, dtype=dtype)
+        os.makedirs(self.path, exist_ok=True)
+        return np.memmap(os.path.join(self.path, f"{name}.bin"), dtype=dtype, mode='w+', shape=(count,))
+
+    def __len__(self):
+        return len(self.states)
+
+    @property
+    def nbytes(self):
+        return self.states.nbytes + self.indices.nbytes
+
+    def lookup(self, query):
+        """(query rows, table indices) for every query state present in the table"""
+        left = np.searchsorted(self.states, query, 'left')
+        right = np.searchsorted(self.states, query, 'right')
+        counts = right - left
+        total = int(counts.sum())
+        if not total:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=self.indices.dtype)
+        rows = np.repeat(np.arange(len(query)), counts)
+        within = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        return rows, self.indices[np.repeat(left, counts) + within]
+
+
+def balanced_split(keyspace):
+    """Split position where the front is no larger than the back and both are smallest"""
+    best = None
+    front = 1
+    for split in range(1, keyspace.width):
+        front *= keyspace.radices[split - 1]
+        back = keyspace.keyspace // front
+        cost = (max(front, back), front)
+        if best is None or cost < best[0]:
+            best = (cost, split)
+    return best[1]
+
+
+class MeetInTheMiddle:
+    """Solve segment = front + back against 32-bit targets
+
+    The front half of the mask is hashed forward from the seed into a
+    SortedTable; every back half is walked backward from each target with
+    the mixer's unstep and looked up in it. A match means front + back
+    hashes to the target, so the cost is |front| + |back| per target
+    instead of |front| * |back|. The table moves to a memory-mapped file
+    under `path` (default .mitm/) once it would exceed `memory` bytes.
+    """
+
+    def __init__(self, mixer, mask, targets, custom=None, split=None, signed=False,
+                 path=None, memory=2 << 30, batch_size=1 << 20):
+        self.mixer = MIXERS[mixer] if isinstance(mixer, str) else mixer
+        self.keyspace = Mask(mask, custom)
+        self.split = split or balanced_split(self.keyspace)
+        self.front = self.keyspace.positions(0, self.split)
+        self.back = self.keyspace.positions(self.split)
+        self.targets = tuple(targets)
+        self.signed = signed
+        self.batch_size = batch_size
+        index_size = 4 if self.front.keyspace <= 1 << 32 else 8
+        if path is None and self.front.keyspace * (4 + index_size) > memory:
+            path = MITM_DIR
+        self.path = path
+        self.table = None
+        self.probed = 0
+        self.build_time = 0.0
+        self.join_time = 0.0
+
+    @classmethod
+    def for_segment(cls, segment, mask=None, custom=None, **options):
+        """From a hash_cracker SegmentTarget, optionally with a narrower mask"""
+        return cls(segment.family, mask or segment.mask, segment.targets,
+                   custom if mask else segment.custom, signed=segment.options.get("signed", False), **options)
+
+    def build(self):
+        start = time.perf_counter()
+        forward = lambda batch: self.mixer.forward(batch, signed=self.signed)
+        self.table = SortedTable(self.front, forward, self.path, batch_size=self.batch_size)
+        self.build_time = time.perf_counter() - start
+        return self.table
+
+    def solve(self, limit=None):
+        """Yield (segment, target) for every segment that hashes to a target"""
+        if self.table is None:
+            self.build()
+        found = 0
+        for target in self.targets:
+            for offset, batch in self.back.batches(size=self.batch_size):
+                start = time.perf_counter()
+                states = self.mixer.backward(batch, target, signed=self.signed)
+                rows, indices = self.table.lookup(states)
+                self.join_time += time.perf_counter() - start
+                self.probed += len(batch)
+                for row, index in zip(rows.tolist(), indices.tolist()):
+                    yield self.front.candidate(index) + self.back.candidate(offset + row), target
+                    found += 1
+                    if limit is not None and found >= limit:
+                        return
+
+    def report(self):
+        where = f"memory-mapped in {self.path}" if self.path else "in RAM"
+        print(f"  split {self.split}/{self.keyspace.width - self.split}: {len(self.table):,} forward states "
+              f"({self.table.nbytes / 2**20:.1f} MiB {where}) in {self.build_time:.2f}s, "
+              f"{self.probed:,} backward in {self.join_time:.2f}s; "
+              f"covers {self.keyspace.keyspace:,} candidates")
+
+
+def show(solver, expected=None, count=10):
+    hash_function = HASHES[solver.mixer.name]
+    solutions = []
+    for segment, target in solver.solve():
+        value = int(hash_function(as_matrix([segment], len(segment)), signed=solver.signed)[0])
+        if value != target:
+            raise ValueError(f"{segment!r} hashes to 0x{value:08x}, not 0x{target:08x}; "
+                             f"the {solver.mixer.name} unstep does not invert its step")
+        solutions.append(segment)
+    solver.report()
+    print(f"  {len(solutions)} segments hash to the target")
+    for segment in solutions[:count]:
+        print(f"    {segment!r}{'  <-- expected' if segment == expected else ''}")
+    if expected in solutions[count:]:
+        print(f"    ... {expected!r} among the rest")
+    return solutions
+
+
+def main():
+    print("KeyForge Meet-in-the-Middle Solver")
+    print("="*50)
+    fnv, nibble = SEGMENTS
+
+    print(f"\n{fnv.name} -> 0x{fnv.targets[0]:08x} over the whole grammar mask:")
+    show(MeetInTheMiddle.for_segment(fnv), "41d_y0")
+
+    # 64^10 would leave ~2^28 collisions, so pin the separator the
+    # strings suggest and search lowercase around it; memory=0 forces
+    # the memory-mapped table
+    mask = sys.argv[1] if len(sys.argv) > 1 else "?l?l_?l?l?l?l?l?l?l"
+    print(f"\n{nibble.name} -> 0x{nibble.targets[0]:08x} over {mask}:")
+    show(MeetInTheMiddle.for_segment(nibble, mask, memory=0), "ri_hgsklra")
+
+
+if __name__ == "__main__":
+    main()
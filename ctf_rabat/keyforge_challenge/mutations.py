@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Leetspeak / case / separator mutation engine for KeyForge
+Streams the full substitution lattice of a phrase from a mixed-radix index,
+fewest mutations first, without ever storing the lattice
+"""
+import itertools
+import math
+import sys
+
+# Both directions, so leet bases like "k3y_f0rg3" mutate back towards plain text
+LEET = {
+    'a': '4@', 'b': '8', 'e': '3', 'g': '9', 'i': '1!', 'l': '1', 'o': '0',
+    's': '5$', 't': '7', 'z': '2',
+    '0': 'o', '1': 'il', '2': 'z', '3': 'e', '4': 'a', '5': 's', '7': 't', '8': 'b', '9': 'g',
+}
+SEPARATORS = "_-."
+
+
+class Mutations:
+    """Substitution lattice of one phrase
+
+    Every position gets an option list whose entry 0 is the original char,
+    followed by its case toggle, leet forms and (for separators) the other
+    separators. A variant is a mixed-radix number over those lists, so the
+    lattice is just the list of radices: `variant(i)` and `index(s)` map
+    between the two in O(len), and `len()` is the product of the radices.
+
+    Options at a position are distinct single chars, so different indices
+    always give different strings; no seen-set is needed to avoid repeats.
+    """
+
+    def __init__(self, phrase, leet=LEET, case=True, separators=SEPARATORS):
+        self.phrase = phrase
+        self.options = []
+        for ch in phrase:
+            options = [ch]
+            alternates = []
+            if case and ch.swapcase() != ch:
+                alternates.append(ch.swapcase())
+            if leet:
+                alternates.extend(leet.get(ch.lower(), ""))
+            if separators and ch in separators:
+                alternates.extend(separators)
+            for alternate in alternates:
+                if alternate not in options:
+                    options.append(alternate)
+            self.options.append(options)
+        self.mutable = [pos for pos, options in enumerate(self.options) if len(options) > 1]
+
+    def __len__(self):
+        return math.prod(len(options) for options in self.options)
+
+    def variant(self, index):
+        """Decode a lattice index (0 is the phrase itself)"""
+        chars = []
+        for options in self.options:
+            index, digit = divmod(index, len(options))
+            chars.append(options[digit])
+        return "".join(chars)
+
+    def index(self, variant):
+        """Encode a variant back to its lattice index"""
+        index = 0
+        for options, ch in zip(reversed(self.options), reversed(variant)):
+            index = index * len(options) + options.index(ch)
+        return index
+
+    def count(self, mutations):
+        """Number of variants with exactly `mutations` changed positions"""
+        # coefficient of x^k in prod(1 + (r_i - 1) x)
+        coefficients = [1]
+        for pos in self.mutable:
+            extra = len(self.options[pos]) - 1
+            coefficients = [a + extra * b for a, b in
+                            zip(coefficients + [0], [0] + coefficients)]
+        return coefficients[mutations] if mutations < len(coefficients) else 0
+
+    def ranked(self, max_mutations=None, min_mutations=0):
+        """Yield variants by mutation count: the phrase, then every single change, ...
+
+        For each k, every k-subset of mutable positions is combined with
+        every non-original option at those positions, which visits each
+        lattice point exactly once.
+        """
+        limit = len(self.mutable) if max_mutations is None else min(max_mutations, len(self.mutable))
+        base = list(self.phrase)
+        for k in range(min_mutations, limit + 1):
+            for positions in itertools.combinations(self.mutable, k):
+                choices = [self.options[pos][1:] for pos in positions]
+                for replacement in itertools.product(*choices):
+                    chars = base[:]
+                    for pos, ch in zip(positions, replacement):
+                        chars[pos] = ch
+                    yield "".join(chars)
+
+
+def main():
+    print("KeyForge Mutation Engine")
+    print("="*50)
+    phrase = sys.argv[1] if len(sys.argv) > 1 else "wh0_s41d_y0ahhrmiri_hgsklra"
+    lattice = Mutations(phrase)
+    print(f"  {phrase}: {len(lattice.mutable)} mutable positions, {len(lattice):,} variants")
+    for k in range(4):
+        print(f"    {k} mutations: {lattice.count(k):,}")
+    print()
+    for variant in itertools.islice(lattice.ranked(min_mutations=1), 8):
+        print(f"  {variant}  (index {lattice.index(variant)})")
+
+
+if __name__ == "__main__":
+    main()
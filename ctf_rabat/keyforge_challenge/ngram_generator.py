@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Character n-gram candidate generator for KeyForge
+Train on the challenge text, then emit 27-char contents most probable first
+"""
+import heapq
+import itertools
+import math
+import os
+import re
+import sys
+import time
+from collections import Counter, defaultdict
+
+from oracle import CONTENT_LENGTH
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+INSTRUCTIONS = os.path.join(HERE, '..', 'instructions.txt')
+STRING_DUMPS = [os.path.join(HERE, 'all_strings.txt'), os.path.join(HERE, 'unpacked_strings.txt')]
+
+# Known tetouan-style flags and the leet guesses built from them
+LEET_FLAGS = [
+    "wh0_s41d_y0ahhrmiri_hgsklra",
+    "r4b4t_ctf_f1n4ls_k3yf0rg3_1",
+    "k3y_f0rg3_1s_th3_4nsw3r_h3r",
+    "v01d_b0x_1s_3mpty_n0w_fu11_1",
+    "h4ck_th3_b1n4ry_4nd_w1n_17",
+    "y0u_f0und_1t_h3r3_1n_th3_v01d",
+]
+
+START = "^"
+WORDLIKE = re.compile(r"[A-Za-z][a-z]{3,}(?:_[a-z]+)*")
+CONSONANT_RUN = re.compile(r"[^aeiouy_]{4}")
+
+
+def normalize(text, fold_case=True):
+    """Runs of anything outside [A-Za-z0-9] become a single '_'"""
+    text = re.sub(r"[^A-Za-z0-9]+", "_", text).strip("_")
+    return text.lower() if fold_case else text
+
+
+def wordlike_tokens(text):
+    """Pronounceable tokens from a strings(1) dump, skipping packed-data noise"""
+    for token in WORDLIKE.findall(text):
+        lower = token.lower()
+        vowels = sum(ch in "aeiouy" for ch in lower)
+        if vowels >= len(lower) / 4 and not CONSONANT_RUN.search(lower):
+            yield token
+
+
+class NGramModel:
+    """Witten-Bell interpolated character n-gram model
+
+    P(c | h) = (count(h, c) + T(h) * P(c | h[1:])) / (count(h) + T(h)),
+    where T(h) is the number of distinct chars seen after h, bottoming out
+    in an add-one unigram over the alphabet. Ranked next-char lists are
+    built lazily per context and cached.
+    """
+
+    def __init__(self, order=4, fold_case=True):
+        self.order = order
+        self.fold_case = fold_case
+        self.counts = defaultdict(Counter)
+        self.alphabet = set()
+        self._ranked = {}
+
+    def train(self, text, weight=1):
+        text = normalize(text, self.fold_case)
+        if not text:
+            return
+        self.alphabet.update(text)
+        padded = START * (self.order - 1) + text
+        for i in range(self.order - 1, len(padded)):
+            ch = padded[i]
+            for k in range(self.order):
+                self.counts[padded[i - k:i]][ch] += weight
+        self._ranked.clear()
+
+    def _prob(self, history, ch):
+        if not history:
+            unigram = self.counts[""]
+            return (unigram[ch] + 1) / (sum(unigram.values()) + len(self.alphabet))
+        lower = self._prob(history[1:], ch)
+        seen = self.counts.get(history)
+        if not seen:
+            return lower
+        types = len(seen)
+        return (seen[ch] + types * lower) / (sum(seen.values()) + types)
+
+    def ranked(self, history):
+        """[(log p, char)] for the next char after `history`, most likely first"""
+        history = history[-(self.order - 1):] if self.order > 1 else ""
+        cached = self._ranked.get(history)
+        if cached is None:
+            cached = sorted(((math.log(self._prob(history, ch)), ch) for ch in self.alphabet),
+                            reverse=True)
+            self._ranked[history] = cached
+        return cached
+
+    def logprob(self, text):
+        """Natural-log probability of a whole content under the model"""
+        padded = START * (self.order - 1) + text
+        return sum(math.log(self._prob(padded[i - self.order + 1:i], padded[i]))
+                   for i in range(self.order - 1, len(padded)))
+
+    def generate(self, length=CONTENT_LENGTH, max_heap=1_000_000):
+        """Yield (content, log p) in approximately decreasing probability
+
+        Best-first search where a node is a prefix plus the rank of its
+        last char. Popping a node pushes only two successors: its best
+        child and its next-ranked sibling, so the frontier grows by at
+        most one per pop. The priority adds an admissible bound on the
+        remaining chars, which makes the order exact until the frontier
+        exceeds `max_heap`; it is then cut to its best half, trading
+        completeness for bounded memory.
+        """
+        # Any history backs off to a seen suffix, so the best next-char
+        # probability over all seen histories bounds every step
+        best_step = max(self.ranked(history)[0][0] for history in list(self.counts))
+        bound = [remaining * best_step for remaining in range(length + 1)]
+        start = START * (self.order - 1)
+
+        first_logp, first_ch = self.ranked(start)[0]
+        heap = [(-(first_logp + bound[length - 1]), first_ch, first_logp, 0)]
+        while heap:
+            neg_f, prefix, logp, rank = heapq.heappop(heap)
+            history = start + prefix
+
+            # Sibling: same parent, next-ranked last char
+            options = self.ranked(history[:-1])
+            if rank + 1 < len(options):
+                parent_logp = logp - options[rank][0]
+                sibling_logp, sibling_ch = options[rank + 1]
+                total = parent_logp + sibling_logp
+                heapq.heappush(heap, (-(total + bound[length - len(prefix)]),
+                                      prefix[:-1] + sibling_ch, total, rank + 1))
+
+            if len(prefix) == length:
+                yield prefix, logp
+            else:
+                child_logp, child_ch = self.ranked(history)[0]
+                total = logp + child_logp
+                heapq.heappush(heap, (-(total + bound[length - len(prefix) - 1]),
+                                      prefix + child_ch, total, 0))
+
+            if len(heap) > max_heap:
+                heap = heapq.nsmallest(max_heap // 2, heap)
+
+
+def default_corpus(wordlist=None):
+    """(text, weight) pairs: instructions, leet flags, binary strings, wordlist"""
+    corpus = []
+    if os.path.exists(INSTRUCTIONS):
+        with open(INSTRUCTIONS, errors="ignore") as f:
+            text = f.read()
+        corpus.extend((flag, 20) for flag in re.findall(r"\{([^}]+)\}", text))
+        corpus.extend((line, 5) for line in text.splitlines() if line.strip())
+    corpus.extend((flag, 20) for flag in LEET_FLAGS)
+    for path in STRING_DUMPS:
+        if os.path.exists(path):
+            with open(path, errors="ignore") as f:
+                corpus.extend((token, 1) for token in wordlike_tokens(f.read()))
+    if wordlist and os.path.exists(wordlist):
+        with open(wordlist, errors="ignore") as f:
+            corpus.extend((line.split()[0], 3) for line in f if line.strip())
+    return corpus
+
+
+def main():
+    print("KeyForge N-gram Generator")
+    print("="*50)
+    model = NGramModel(order=int(os.environ.get("NGRAM_ORDER", 4)))
+    corpus = default_corpus(sys.argv[1] if len(sys.argv) > 1 else None)
+    for text, weight in corpus:
+        model.train(text, weight)
+    print(f"  Trained on {len(corpus)} texts, alphabet of {len(model.alphabet)}, "
+          f"{len(model.counts)} contexts\n")
+
+    start = time.perf_counter()
+    stream = model.generate()
+    for content, logp in itertools.islice(stream, 15):
+        print(f"  {logp:8.2f}  {content}")
+    produced = 15 + sum(1 for _ in itertools.islice(stream, 20000))
+    elapsed = time.perf_counter() - start
+    print(f"\n  {produced} candidates in {elapsed:.2f}s ({produced / elapsed:,.0f}/s)")
+
+
+if __name__ == "__main__":
+    main()
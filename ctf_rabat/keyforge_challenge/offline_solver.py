@@ -7,6 +7,8 @@ import subprocess
 import os
 import sys
 
+from outcome_classifier import is_success
+
 BINARY = '/workspaces/ctf/ctf_rabat/keyforge/KeyForge'
 OUTPUT_FILE = '/workspaces/ctf/ctf_rabat/keyforge/solver_output.txt'
 
@@ -80,7 +82,7 @@ for name, test_input in test_cases:
             log(f"  STDERR: {stderr}")
         
         # Check for success indicators
-        if any(word in stdout.lower() for word in ['valid', 'correct', 'success', 'congratulations', 'flag']):
+        if is_success(result.stdout):
             log(f"\n{'='*60}")
             log(f"POSSIBLE FLAG FOUND: {test_input}")
             log(f"{'='*60}")
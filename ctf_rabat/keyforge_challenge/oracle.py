@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+KeyForge oracle backends
+Shared replacement for the per-script subprocess.run(['./KeyForge']) calls
+"""
+import atexit
+import ctypes
+import fcntl
+import os
+import select
+import signal
+import subprocess
+import time
+
+import ptrace_tools
+import result_cache
+from ptrace_tools import SYS_FORK, SYS_READ, SYS_WAIT4
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PACKED_BINARY = os.path.join(HERE, 'KeyForge')
+UNPACKED_BINARY = os.path.join(HERE, 'KeyForge_unpacked')
+
+FLAG_PREFIX = "VoidBox{"
+FLAG_SUFFIX = "}"
+CONTENT_LENGTH = 27
+
+
+def make_flag(content_27):
+    """Wrap raw content in the VoidBox{...} format"""
+    return f"{FLAG_PREFIX}{content_27}{FLAG_SUFFIX}"
+
+
+class SubprocessOracle:
+    """One full exec of the binary per candidate (the original behaviour)"""
+
+    name = "subprocess"
+
+    def __init__(self, binary=PACKED_BINARY, timeout=2, cache=True):
+        self.binary = binary
+        self.timeout = timeout
+        self.cache = result_cache.get_cache(binary) if cache else None
+        self.last_stderr = b''
+
+    def run(self, data):
+        """Feed raw bytes to the binary; returns (stdout bytes, returncode)"""
+        result = subprocess.run([self.binary], input=data, capture_output=True,
+                                timeout=self.timeout)
+        self.last_stderr = result.stderr
+        return result.stdout, result.returncode
+
+    def probe(self, data):
+        """Uncached run with everything a response signature needs
+
+        Returns (stdout, stderr, returncode, seconds); returncode is None on
+        a timeout. Backends with no stderr pipe report b''. The result is
+        still recorded in the cache so later runs skip the input.
+        """
+        self.last_stderr = b''
+        start = time.perf_counter()
+        try:
+            stdout, rc = self.run(data)
+        except subprocess.TimeoutExpired as e:
+            stdout, rc = e.output or b'', None
+        elapsed = time.perf_counter() - start
+        if self.cache is not None and rc is not None:
+            self.cache.put(data, stdout, rc, elapsed)
+        return stdout, self.last_stderr, rc, elapsed
+
+    def cached_run(self, data):
+        """run() behind the result cache; misses are timed and recorded"""
+        if self.cache is not None:
+            hit = self.cache.get(data)
+            if hit is not None:
+                return hit[0], hit[1]
+        start = time.perf_counter()
+        stdout, rc = self.run(data)
+        if self.cache is not None:
+            self.cache.put(data, stdout, rc, time.perf_counter() - start)
+        return stdout, rc
+
+    def check(self, flag):
+        """Test a full flag string; returns (output, returncode)"""
+        stdout, rc = self.cached_run(flag.encode() + b'\n')
+        return stdout.decode('utf-8', errors='ignore').strip(), rc
+
+    def close(self):
+        pass
+
+
+class ForkServerOracle(SubprocessOracle):
+    """Start KeyForge_unpacked once, park it on the license read, fork per candidate
+
+    The parent is held at the entry of read(0, ...) under ptrace. For each
+    candidate a fork() is injected in place of that read; the child is given
+    the candidate as the read result and released, while the parent is
+    rewound onto the same read for the next round.
+    """
+
+    name = "forkserver"
+
+    def __init__(self, binary=UNPACKED_BINARY, timeout=2, cache=True):
+        super().__init__(binary, timeout, cache)
+        self.server = None
+        self.owner = os.getpid()
+        self._start()
+        atexit.register(self.close)
+
+    def _start(self):
+        stdin_r, self._stdin_w = os.pipe()
+        self._stdout_r, stdout_w = os.pipe()
+        self._stderr_r, stderr_w = os.pipe()
+        self.server = ptrace_tools.TracedProcess(
+            [self.binary], stdin=stdin_r, stdout=stdout_w, stderr=stderr_w,
+            options=ptrace_tools.PTRACE_O_TRACEFORK)
+        for fd in (stdin_r, stdout_w, stderr_w):
+            os.close(fd)
+        for fd in (self._stdout_r, self._stderr_r):
+            flags = fcntl.fcntl(fd, fcntl.F_GETFL)
+            fcntl.fcntl(fd, fcntl.F_SETFL, flags | os.O_NONBLOCK)
+
+        self.read_regs = self.server.run_to_syscall_entry(
+            SYS_READ, lambda regs: regs.rdi == 0)
+        if self.read_regs is None:
+            raise OSError("KeyForge exited before reading the license key")
+        # Scratch space for wait4's status word, well below the red zone
+        self.scratch = self.read_regs.rsp - 4096
+        self.prompt = self._drain()
+        self._drain(self._stderr_r)
+
+    def _drain(self, fd=None):
+        chunks = []
+        while True:
+            try:
+                chunk = os.read(self._stdout_r if fd is None else fd, 65536)
+            except BlockingIOError:
+                break
+            if not chunk:
+                break
+            chunks.append(chunk)
+        return b''.join(chunks)
+
+    def run(self, data):
+        if len(data) > self.read_regs.rdx:
+            data = data[:self.read_regs.rdx]
+
+        pid = self.server.inject_syscall(self.read_regs, SYS_FORK)
+        if pid <= 0:
+            raise OSError(-pid, "fork injection failed")
+
+        # The auto-attached child starts in a SIGSTOP; hand it the candidate
+        # as if read() had just returned, then let it run untraced.
+        os.waitpid(pid, ptrace_tools.WALL)
+        child = self.read_regs.copy()
+        child.rax = len(data)
+        child.orig_rax = 0xFFFFFFFFFFFFFFFF
+        with open(f"/proc/{pid}/mem", "r+b", buffering=0) as mem:
+            mem.seek(self.read_regs.rsi)
+            mem.write(data)
+        ptrace_tools.ptrace(ptrace_tools.PTRACE_SETREGS, pid, 0, ctypes.addressof(child))
+        ptrace_tools.ptrace(ptrace_tools.PTRACE_DETACH, pid, 0, 0)
+
+        timed_out = False
+        pidfd = os.pidfd_open(pid)
+        try:
+            ready, _, _ = select.select([pidfd], [], [], self.timeout)
+            if not ready:
+                timed_out = True
+                os.kill(pid, signal.SIGKILL)
+                select.select([pidfd], [], [])
+        finally:
+            os.close(pidfd)
+
+        # Reap from inside the server so no zombies pile up under it
+        self.server.write(self.scratch, b'\0' * 4)
+        self.server.inject_syscall(self.read_regs, SYS_WAIT4, pid, self.scratch, 0, 0)
+        status = int.from_bytes(self.server.read(self.scratch, 4), 'little')
+
+        stdout = self.prompt + self._drain()
+        self.last_stderr = self._drain(self._stderr_r)
+        if timed_out:
+            raise subprocess.TimeoutExpired([self.binary], self.timeout, output=stdout)
+        return stdout, os.waitstatus_to_exitcode(status)
+
+    def close(self):
+        if self.server is not None and self.owner == os.getpid():
+            self.server.kill()
+            os.close(self._stdin_w)
+            os.close(self._stdout_r)
+            os.close(self._stderr_r)
+            self.server = None
+
+
+def _snapshot_oracle(**kwargs):
+    from snapshot_oracle import SnapshotOracle
+    return SnapshotOracle(**kwargs)
+
+
+BACKENDS = {
+    "subprocess": SubprocessOracle,
+    "unpacked": lambda **kwargs: SubprocessOracle(UNPACKED_BINARY, **kwargs),
+    "forkserver": ForkServerOracle,
+    "snapshot": _snapshot_oracle,
+}
+
+_default = None
+_default_pid = None
+
+
+def make_oracle(backend=None):
+    """Build a fresh oracle, preferring the fork server when ptrace is usable
+
+    `backend` is a BACKENDS name or a zero-argument factory, e.g. one that
+    turns the result cache off.
+    """
+    if callable(backend):
+        return backend()
+    if backend is not None:
+        return BACKENDS[backend]()
+    if ptrace_tools.ptrace_available():
+        try:
+            return ForkServerOracle()
+        except OSError as e:
+            print(f"[-] Fork server unavailable ({e}), falling back to subprocess")
+    return SubprocessOracle()
+
+
+def get_oracle(backend=None):
+    """Return the process-wide oracle (a fresh one per backend if given)
+
+    A fork server is only usable from the process that traces it, so forked
+    workers transparently get their own instance.
+    """
+    global _default, _default_pid
+    if backend is not None:
+        return make_oracle(backend)
+    if _default is None or _default_pid != os.getpid():
+        _default = make_oracle()
+        _default_pid = os.getpid()
+    return _default
+
+
+def use_backend(backend):
+    """Make `backend` the process-wide oracle returned by get_oracle()"""
+    global _default, _default_pid
+    _default = make_oracle(backend)
+    _default_pid = os.getpid()
+    return _default
+
+
+def test_flag_content(content_27):
+    """Test a 27-character content in VoidBox format"""
+    if len(content_27) != CONTENT_LENGTH:
+        return f"Wrong length: {len(content_27)}", -1
+    try:
+        return get_oracle().check(make_flag(content_27))
+    except Exception as e:
+        return f"ERROR: {e}", -1
+
+
+def main():
+    print("KeyForge Oracle Self-Test")
+    print("="*50)
+    samples = ["a" * 27, "wh0_s41d_y0ahhrmiri_hgsklra", "short"]
+    for backend in ("unpacked", "forkserver"):
+        oracle = BACKENDS[backend](cache=False)
+        start = time.perf_counter()
+        for content in samples * 20:
+            output, rc = oracle.check(make_flag(content))
+        elapsed = time.perf_counter() - start
+        print(f"  {backend:12}: {len(samples) * 20 / elapsed:8.1f} candidates/sec  last: {output} ({rc})")
+        oracle.close()
+
+
+if __name__ == "__main__":
+    main()
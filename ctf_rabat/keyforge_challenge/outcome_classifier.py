@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Unified KeyForge outcome classifier
+One byte-level matcher instead of a different success keyword list per script
+"""
+import enum
+import re
+
+
+class Outcome(enum.Enum):
+    INVALID_FORMAT = "invalid_format"
+    VALIDATION_FAILED = "validation_failed"
+    SUCCESS = "success"
+    NEW_RESPONSE = "new_response"
+    CRASH = "crash"
+    TIMEOUT = "timeout"
+
+
+# Exact stdout of the responses we already know (raw bytes, and the stripped
+# text the test_flag_content helpers return); the hot path is one dict hit
+PROMPT = b"Enter license key: "
+KNOWN_RESPONSES = {}
+for _message, _outcome in ((b"Invalid format.", Outcome.INVALID_FORMAT),
+                           (b"License validation failed.", Outcome.VALIDATION_FAILED),
+                           (b"License valid!", Outcome.SUCCESS)):
+    KNOWN_RESPONSES[PROMPT + _message + b"\n"] = _outcome
+    KNOWN_RESPONSES[(PROMPT + _message).decode()] = _outcome
+
+# Anything else goes through one compiled alternation. Failure messages are
+# listed first and "valid" only counts as a whole word followed by "!"
+# ("License valid!", "Key valid!"), so "License validation failed." and
+# "Invalid format." can never read as a success.
+_PATTERNS = [
+    ("invalid_format", r"invalid format"),
+    ("validation_failed", r"validation failed|incorrect|wrong (?:key|license)|access denied"),
+    ("timeout", r"timed out|timeout"),
+    ("success", r"\bvalid!|(?<!in)correct|congratulations|well done|you win"
+                r"|flag accepted|access granted|(?<!un)success"),
+]
+_GROUPS = {name: Outcome(name) for name, _ in _PATTERNS}
+_REGEX = "|".join(f"(?P<{name}>{pattern})" for name, pattern in _PATTERNS)
+BYTES_MATCHER = re.compile(_REGEX.encode(), re.IGNORECASE)
+TEXT_MATCHER = re.compile(_REGEX, re.IGNORECASE)
+_PRECEDENCE = [Outcome.INVALID_FORMAT, Outcome.VALIDATION_FAILED, Outcome.TIMEOUT, Outcome.SUCCESS]
+
+
+# Distinct response signatures remembered (and cached) per classifier, so a
+# binary that echoes its input cannot grow them without bound
+MAX_SIGNATURES = 4096
+
+
+class OutcomeClassifier:
+    """Classify raw oracle output; remembers every response signature it sees
+
+    Works on the stdout bytes straight from the oracle (str output from the
+    existing test_flag_content helpers is accepted too). A response that
+    matches none of the known messages is NEW_RESPONSE, and the first time
+    any signature shows up it is recorded in `novel`. Both stop growing
+    after `limit` signatures; later ones are only counted in `overflow`.
+    """
+
+    def __init__(self, limit=MAX_SIGNATURES):
+        self.limit = limit
+        self.responses = dict(KNOWN_RESPONSES)
+        self.seen = set(KNOWN_RESPONSES)
+        self.novel = []
+        self.overflow = 0
+
+    def classify(self, stdout, rc=None, timed_out=False):
+        if timed_out:
+            return Outcome.TIMEOUT
+        # -1 is what the helpers return for their own "ERROR: ..." cases;
+        # anything below is a signal from the binary itself, and a crash
+        # after a known message is still a crash
+        if rc is not None and rc < -1:
+            outcome = Outcome.CRASH
+        else:
+            outcome = self.responses.get(stdout)
+            if outcome is not None:
+                return outcome
+            matcher = BYTES_MATCHER if isinstance(stdout, bytes) else TEXT_MATCHER
+            found = {_GROUPS[m.lastgroup] for m in matcher.finditer(stdout)}
+            outcome = next((candidate for candidate in _PRECEDENCE if candidate in found),
+                           Outcome.NEW_RESPONSE)
+
+        if stdout not in self.seen:
+            if len(self.novel) < self.limit:
+                self.seen.add(stdout)
+                self.novel.append((stdout, rc, outcome))
+            else:
+                self.overflow += 1
+        if outcome is not Outcome.NEW_RESPONSE and outcome is not Outcome.CRASH \
+                and len(self.responses) < len(KNOWN_RESPONSES) + self.limit:
+            self.responses[stdout] = outcome
+        return outcome
+
+    def is_novel(self, stdout):
+        return stdout not in self.seen
+
+
+_shared = OutcomeClassifier()
+
+
+def classify(stdout, rc=None, timed_out=False):
+    """Classify with the process-wide classifier"""
+    return _shared.classify(stdout, rc, timed_out)
+
+
+def is_success(output):
+    """Check if output indicates success"""
+    return _shared.classify(output) is Outcome.SUCCESS
+
+
+def novel_responses():
+    """Every (stdout, rc, outcome) signature seen for the first time so far"""
+    return list(_shared.novel)
@@ -3,19 +3,18 @@
 KeyForge Pattern Solver
 Since we know VoidBox{27 chars} works, let's systematically find the right content
 """
-import subprocess
 import itertools
 import string
 import sys
 
+from oracle import get_oracle
+from outcome_classifier import is_success
+
 def test_flag(content_27):
     """Test a 27-character content in VoidBox format"""
     flag = f"VoidBox{{{content_27}}}"
     try:
-        result = subprocess.run(['./KeyForge'], input=flag.encode() + b'\n',
-                              capture_output=True, timeout=2)
-        output = result.stdout.decode('utf-8', errors='ignore').strip()
-        return output, result.returncode
+        return get_oracle().check(flag)
     except:
         return "ERROR", -1
 
@@ -66,7 +65,7 @@ def main():
             print(f"  {pattern[:30]:35} -> {output}")
             
             # Check for success indicators
-            if "valid" in output.lower() or "correct" in output.lower() or "success" in output.lower():
+            if is_success(output):
                 print(f"\n*** FOUND FLAG: VoidBox{{{pattern}}} ***")
                 return f"VoidBox{{{pattern}}}"
     
@@ -83,7 +82,7 @@ def main():
             output, rc = test_flag(substr)
             print(f"  {substr[:35]:35} -> {output}")
             
-            if "valid" in output.lower() or "correct" in output.lower():
+            if is_success(output):
                 print(f"\n*** FOUND FLAG: VoidBox{{{substr}}} ***")
                 return f"VoidBox{{{substr}}}"
     
@@ -104,7 +103,7 @@ def main():
             output, rc = test_flag(pattern)
             print(f"  {pattern[:35]:35} -> {output}")
             
-            if "valid" in output.lower() or "correct" in output.lower():
+            if is_success(output):
                 print(f"\n*** FOUND FLAG: VoidBox{{{pattern}}} ***")
                 return f"VoidBox{{{pattern}}}"
     
@@ -125,7 +124,7 @@ def main():
             output, rc = test_flag(pattern)
             print(f"  {pattern[:35]:35} -> {output}")
             
-            if "valid" in output.lower() or "correct" in output.lower():
+            if is_success(output):
                 print(f"\n*** FOUND FLAG: VoidBox{{{pattern}}} ***")
                 return f"VoidBox{{{pattern}}}"
     
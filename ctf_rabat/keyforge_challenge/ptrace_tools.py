@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Minimal ptrace helpers for driving KeyForge_unpacked from the outside
+x86_64 Linux only - used by the persistent oracle backends
+"""
+import ctypes
+import os
+import signal
+
+libc = ctypes.CDLL(None, use_errno=True)
+libc.ptrace.argtypes = [ctypes.c_long, ctypes.c_long, ctypes.c_void_p, ctypes.c_void_p]
+libc.ptrace.restype = ctypes.c_long
+
+PTRACE_TRACEME = 0
+PTRACE_PEEKUSER = 3
+PTRACE_CONT = 7
+PTRACE_KILL = 8
+PTRACE_SINGLESTEP = 9
+PTRACE_GETREGS = 12
+PTRACE_SETREGS = 13
+PTRACE_DETACH = 17
+PTRACE_SYSCALL = 24
+PTRACE_SETOPTIONS = 0x4200
+PTRACE_GETEVENTMSG = 0x4201
+
+PTRACE_O_TRACESYSGOOD = 0x1
+PTRACE_O_TRACEFORK = 0x2
+PTRACE_O_EXITKILL = 0x100000
+
+PTRACE_EVENT_FORK = 1
+
+SYS_READ = 0
+SYS_WRITE = 1
+SYS_MMAP = 9
+SYS_MUNMAP = 11
+SYS_BRK = 12
+SYS_FORK = 57
+SYS_WAIT4 = 61
+SYS_EXIT = 60
+SYS_EXIT_GROUP = 231
+
+WALL = 0x40000000
+
+SYSCALL_TRAP = signal.SIGTRAP | 0x80
+
+
+class Regs(ctypes.Structure):
+    """struct user_regs_struct for x86_64"""
+    _fields_ = [(name, ctypes.c_ulonglong) for name in (
+        "r15 r14 r13 r12 rbp rbx r11 r10 r9 r8 rax rcx rdx rsi rdi orig_rax "
+        "rip cs eflags rsp ss fs_base gs_base ds es fs gs").split()]
+
+    def copy(self):
+        """Return an independent copy of the register set"""
+        clone = Regs()
+        ctypes.pointer(clone)[0] = self
+        return clone
+
+
+def ptrace(request, pid, addr=0, data=0):
+    """Call ptrace(2) and raise OSError on failure"""
+    ctypes.set_errno(0)
+    result = libc.ptrace(request, pid, addr, data)
+    if result == -1 and ctypes.get_errno():
+        err = ctypes.get_errno()
+        raise OSError(err, os.strerror(err))
+    return result
+
+
+def signed(value):
+    """Interpret a 64-bit register value as a signed integer"""
+    return value - (1 << 64) if value & (1 << 63) else value
+
+
+class TracedProcess:
+    """A child process started under PTRACE_TRACEME and stopped after execve"""
+
+    def __init__(self, argv, stdin=None, stdout=None, stderr=None, options=0):
+        self.pid = os.fork()
+        if self.pid == 0:
+            try:
+                for fd, target in ((stdin, 0), (stdout, 1), (stderr, 2)):
+                    if fd is not None:
+                        os.dup2(fd, target)
+                libc.ptrace(PTRACE_TRACEME, 0, None, None)
+                os.execv(argv[0], argv)
+            finally:
+                os._exit(127)
+
+        _, status = os.waitpid(self.pid, WALL)
+        if not os.WIFSTOPPED(status):
+            raise OSError(f"tracee did not stop after exec (status {status:#x})")
+        ptrace(PTRACE_SETOPTIONS, self.pid, 0,
+               PTRACE_O_TRACESYSGOOD | PTRACE_O_EXITKILL | options)
+        self.mem = open(f"/proc/{self.pid}/mem", "r+b", buffering=0)
+        self.in_syscall = False
+        self.exit_status = None
+
+    def getregs(self):
+        regs = Regs()
+        ptrace(PTRACE_GETREGS, self.pid, 0, ctypes.addressof(regs))
+        return regs
+
+    def setregs(self, regs):
+        ptrace(PTRACE_SETREGS, self.pid, 0, ctypes.addressof(regs))
+
+    def read(self, addr, size):
+        self.mem.seek(addr)
+        return self.mem.read(size)
+
+    def write(self, addr, data):
+        self.mem.seek(addr)
+        self.mem.write(data)
+
+    def resume(self, request=PTRACE_SYSCALL, sig=0):
+        ptrace(request, self.pid, 0, sig)
+
+    def wait(self):
+        """Wait for the next stop; returns the raw waitpid status"""
+        _, status = os.waitpid(self.pid, WALL)
+        if os.WIFEXITED(status) or os.WIFSIGNALED(status):
+            self.exit_status = status
+        return status
+
+    def next_syscall_stop(self):
+        """Run to the next syscall entry/exit stop, forwarding real signals
+
+        Returns the stopped register set, or None if the tracee has exited.
+        Fork events are reported as ('fork', child_pid).
+        """
+        sig = 0
+        while True:
+            self.resume(PTRACE_SYSCALL, sig)
+            status = self.wait()
+            if self.exit_status is not None:
+                return None
+            sig = 0
+            stopsig = os.WSTOPSIG(status)
+            if stopsig == SYSCALL_TRAP:
+                self.in_syscall = not self.in_syscall
+                return self.getregs()
+            if stopsig == signal.SIGTRAP and status >> 16 == PTRACE_EVENT_FORK:
+                child = ctypes.c_ulong()
+                ptrace(PTRACE_GETEVENTMSG, self.pid, 0, ctypes.addressof(child))
+                return ("fork", child.value)
+            if stopsig not in (signal.SIGCHLD, signal.SIGTRAP):
+                sig = stopsig
+
+    def run_to_syscall_entry(self, nr, predicate=None):
+        """Resume until the entry stop of syscall `nr` (and predicate(regs))"""
+        while True:
+            regs = self.next_syscall_stop()
+            if regs is None:
+                return None
+            if isinstance(regs, tuple):
+                continue
+            if self.in_syscall and regs.orig_rax == nr and (predicate is None or predicate(regs)):
+                return regs
+
+    def inject_syscall(self, entry_regs, nr, *args, on_event=None):
+        """Replace the syscall at an entry stop with `nr(*args)`
+
+        The tracee must be stopped at the entry described by `entry_regs`.
+        Afterwards it is rewound so the original syscall is re-issued and
+        stopped at its entry again. Returns the injected syscall's result.
+        """
+        regs = entry_regs.copy()
+        regs.orig_rax = nr
+        for name, value in zip(("rdi", "rsi", "rdx", "r10", "r8", "r9"), args):
+            setattr(regs, name, value & 0xFFFFFFFFFFFFFFFF)
+        self.setregs(regs)
+
+        while True:
+            stop = self.next_syscall_stop()
+            if stop is None:
+                raise OSError("tracee exited during injected syscall")
+            if isinstance(stop, tuple):
+                if on_event is not None:
+                    on_event(stop)
+                continue
+            if not self.in_syscall:
+                break
+        result = signed(stop.rax)
+
+        rewind = entry_regs.copy()
+        rewind.rax = entry_regs.orig_rax
+        rewind.rip = entry_regs.rip - 2
+        self.setregs(rewind)
+        again = self.next_syscall_stop()
+        if again is None or isinstance(again, tuple) or not self.in_syscall:
+            raise OSError("tracee did not re-enter the interrupted syscall")
+        return result
+
+    def kill(self):
+        if self.exit_status is None:
+            try:
+                os.kill(self.pid, signal.SIGKILL)
+                while self.exit_status is None:
+                    self.wait()
+            except (ProcessLookupError, ChildProcessError):
+                pass
+        self.mem.close()
+
+
+def ptrace_available():
+    """True when this process is allowed to trace its own children"""
+    pid = os.fork()
+    if pid == 0:
+        os._exit(0 if libc.ptrace(PTRACE_TRACEME, 0, None, None) == 0 else 1)
+    _, status = os.waitpid(pid, 0)
+    return os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0
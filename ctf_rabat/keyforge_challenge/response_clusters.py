@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Response-signature clustering for KeyForge probe runs
+Every run is reduced to (stdout, stderr, exit code, latency bucket); each new
+response is announced as it appears, with counts and example inputs kept
+"""
+import hashlib
+import math
+import sys
+import time
+
+from oracle import get_oracle, make_flag
+from outcome_classifier import classify
+
+# Latency buckets are decades above the median of the first
+# BASELINE_PROBES runs, so ordinary jitter (even across a round number
+# like 1ms) stays in bucket 0 while a hang or a slow path does not
+BASELINE_PROBES = 32
+LATENCY_BASE = 10
+TIMEOUT = "timeout"
+
+
+def latency_bucket(seconds, baseline=None):
+    if seconds is None:
+        return None
+    if not baseline:
+        return 0
+    return max(0, int(math.log(max(seconds, 1e-9) / baseline, LATENCY_BASE)))
+
+
+def bucket_range(bucket):
+    if bucket is None:
+        return "?"
+    if bucket == 0:
+        return f"<{LATENCY_BASE}x median"
+    return f"{LATENCY_BASE ** bucket}-{LATENCY_BASE ** (bucket + 1)}x median"
+
+
+class Cluster:
+    """One response signature: how often it was seen and a few inputs that produced it"""
+
+    __slots__ = ("number", "stdout", "stderr", "rc", "bucket", "count", "exemplars", "first_seen")
+
+    def __init__(self, number, stdout, stderr, rc, bucket, first_seen):
+        self.number = number
+        self.stdout = stdout
+        self.stderr = stderr
+        self.rc = rc
+        self.bucket = bucket
+        self.count = 0
+        self.exemplars = []
+        self.first_seen = first_seen
+
+    def describe(self):
+        rc = TIMEOUT if self.rc is None else self.rc
+        text = f"#{self.number} rc={rc} latency {bucket_range(self.bucket)} stdout={self.stdout[:80]!r}"
+        if self.stderr:
+            text += f" stderr={self.stderr[:80]!r}"
+        return text
+
+
+class ResponseClusters:
+    """Constant-cost clustering of probe responses
+
+    The key is (stdout, stderr, exit code, latency bucket), with any output
+    longer than `sample` bytes replaced by its 8-byte BLAKE2b digest, so a
+    lookup costs one bounded hash and one dict hit whatever the output
+    size, and memory grows with the number of distinct signatures rather
+    than the number of probes. Only the first `exemplars` inputs of each
+    cluster are kept.
+
+    `on_new` is called with each new cluster the moment it first appears;
+    by default it prints an alert line. A cluster whose response matches
+    an existing one and differs only in latency bucket is kept but not
+    announced.
+    """
+
+    def __init__(self, exemplars=3, on_new=None, sample=256):
+        self.exemplars = exemplars
+        self.on_new = on_new if on_new is not None else self.alert
+        self.sample = sample
+        self.clusters = {}
+        self.responses = set()
+        self.latencies = []
+        self.baseline = None
+        self.probes = 0
+
+    def bucket(self, seconds):
+        """Latency bucket relative to the median of the first runs"""
+        if seconds is not None and self.baseline is None:
+            self.latencies.append(seconds)
+            if len(self.latencies) >= BASELINE_PROBES:
+                self.baseline = sorted(self.latencies)[len(self.latencies) // 2]
+                self.latencies = []
+        return latency_bucket(seconds, self.baseline)
+
+    def key(self, stdout, stderr, rc, bucket):
+        if len(stdout) > self.sample:
+            stdout = hashlib.blake2b(stdout, digest_size=8).digest()
+        if len(stderr) > self.sample:
+            stderr = hashlib.blake2b(stderr, digest_size=8).digest()
+        return stdout, stderr, rc, bucket
+
+    def observe(self, data, stdout, stderr=b"", rc=None, seconds=None):
+        """Add one run; returns its cluster (cluster.count == 1 means it is new)
+
+        Only a new (stdout, stderr, rc) triggers on_new; a known response
+        landing in a new latency bucket opens a silent cluster.
+        """
+        self.probes += 1
+        bucket = self.bucket(seconds)
+        key = self.key(stdout, stderr, rc, bucket)
+        cluster = self.clusters.get(key)
+        announce = False
+        if cluster is None:
+            cluster = Cluster(len(self.clusters) + 1, stdout[:self.sample], stderr[:self.sample],
+                              rc, bucket, self.probes)
+            self.clusters[key] = cluster
+            response = key[:3]
+            announce = response not in self.responses
+            self.responses.add(response)
+        cluster.count += 1
+        if len(cluster.exemplars) < self.exemplars:
+            cluster.exemplars.append(data)
+        if announce:
+            self.on_new(cluster)
+        return cluster
+
+    def probe(self, data, oracle=None):
+        """Run `data` through the oracle's probe() and cluster the response"""
+        stdout, stderr, rc, seconds = (oracle or get_oracle()).probe(data)
+        return self.observe(data, stdout, stderr, rc, seconds)
+
+    def probe_flag(self, flag, oracle=None):
+        return self.probe(flag.encode() + b'\n', oracle)
+
+    def alert(self, cluster):
+        outcome = classify(cluster.stdout, -1 if cluster.rc is None else cluster.rc)
+        print(f"[!] New response cluster after {self.probes} probes ({outcome.value}): "
+              f"{cluster.describe()}", flush=True)
+        print(f"    input: {cluster.exemplars[0][:80]!r}", flush=True)
+
+    def __len__(self):
+        return len(self.clusters)
+
+    def summary(self):
+        """One line per cluster, most frequent first"""
+        lines = []
+        for cluster in sorted(self.clusters.values(), key=lambda c: -c.count):
+            lines.append(f"  {cluster.count:9} x {cluster.describe()}")
+            for exemplar in cluster.exemplars:
+                lines.append(f"              e.g. {exemplar[:80]!r}")
+        return lines
+
+
+def main():
+    print("KeyForge Response Clusters")
+    print("="*50)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    clusters = ResponseClusters()
+    oracle = get_oracle()
+
+    inputs = [b"", b"\n", b"A" * 4096 + b"\n", b"VoidBox{}\n"]
+    inputs += [(make_flag(f"{i:027d}") + "\n").encode() for i in range(count)]
+    inputs += [(make_flag(f"{i:026d}") + "\n").encode() for i in range(count)]
+    start = time.perf_counter()
+    for data in inputs:
+        clusters.probe(data, oracle)
+    elapsed = time.perf_counter() - start
+
+    print(f"\n  {clusters.probes} probes, {len(clusters)} clusters in {elapsed:.2f}s "
+          f"({clusters.probes / elapsed:,.0f} probes/sec)")
+    print("\n".join(clusters.summary()))
+
+    # Cost of the clustering itself, without the binary
+    stdout = b"Enter license key: License validation failed.\n"
+    quiet = ResponseClusters(on_new=lambda cluster: None)
+    start = time.perf_counter()
+    for i in range(200_000):
+        quiet.observe(b"x", stdout, b"", 1, 0.0002)
+    per_probe = (time.perf_counter() - start) / 200_000
+    print(f"\n  observe() overhead: {per_probe * 1e9:.0f}ns per probe")
+
+
+if __name__ == "__main__":
+    main()
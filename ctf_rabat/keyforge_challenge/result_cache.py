@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache of oracle results
+Keyed by SHA-256(KeyForge binary) + exact input bytes; survives crashes and reruns
+"""
+import collections
+import hashlib
+import mmap
+import os
+import struct
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(HERE, '.oracle_cache')
+
+# key, returncode, latency (seconds), stdout length - followed by stdout
+RECORD = struct.Struct('<32sidI')
+
+
+def file_sha256(path):
+    """SHA-256 hex digest of a file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Append-only record log, memory-mapped for reads, with an LRU in front
+
+    Every record is written with a single O_APPEND write, so several worker
+    processes can share one log; records appended by others are picked up
+    on the next miss.
+    """
+
+    def __init__(self, binary, directory=CACHE_DIR, lru_size=65536):
+        self.binary_hash = file_sha256(binary)
+        self.salt = bytes.fromhex(self.binary_hash)
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{self.binary_hash}.log")
+        self.fd = os.open(self.path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        self.lru = collections.OrderedDict()
+        self.lru_size = lru_size
+        self.index = {}
+        self.indexed = 0
+        self.map = None
+        self.hits = 0
+        self.misses = 0
+        self._refresh()
+        if self.indexed < os.fstat(self.fd).st_size:
+            os.ftruncate(self.fd, self.indexed)
+
+    def key(self, data):
+        return hashlib.sha256(self.salt + data).digest()
+
+    def _refresh(self):
+        """Index any records appended since the last scan"""
+        size = os.fstat(self.fd).st_size
+        if size == self.indexed:
+            return
+        if self.map is not None:
+            self.map.close()
+        self.map = mmap.mmap(self.fd, size, prot=mmap.PROT_READ)
+        offset = self.indexed
+        while offset + RECORD.size <= size:
+            key, rc, latency, length = RECORD.unpack_from(self.map, offset)
+            if offset + RECORD.size + length > size:
+                break  # torn write from a crash; ignore the tail
+            self.index[key] = offset
+            offset += RECORD.size + length
+        self.indexed = offset
+
+    def _load(self, key):
+        offset = self.index.get(key)
+        if offset is None:
+            return None
+        _, rc, latency, length = RECORD.unpack_from(self.map, offset)
+        start = offset + RECORD.size
+        return self.map[start:start + length], rc, latency
+
+    def _remember(self, key, entry):
+        self.lru[key] = entry
+        self.lru.move_to_end(key)
+        if len(self.lru) > self.lru_size:
+            self.lru.popitem(last=False)
+
+    def get(self, data):
+        """Return (stdout, returncode, latency) for an input, or None"""
+        return self.get_by_key(self.key(data))
+
+    def get_by_key(self, key):
+        entry = self.lru.get(key)
+        if entry is not None:
+            self.lru.move_to_end(key)
+            self.hits += 1
+            return entry
+        if key not in self.index:
+            self._refresh()
+        entry = self._load(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._remember(key, entry)
+        self.hits += 1
+        return entry
+
+    def put(self, data, stdout, rc, latency):
+        key = self.key(data)
+        if key in self.index:
+            return
+        os.write(self.fd, RECORD.pack(key, rc, latency, len(stdout)) + stdout)
+        self._remember(key, (stdout, rc, latency))
+
+    def keys(self):
+        """Every key currently in the log"""
+        self._refresh()
+        return list(self.index)
+
+    def __len__(self):
+        self._refresh()
+        return len(self.index)
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        os.close(self.fd)
+
+
+_caches = {}
+
+
+def get_cache(binary):
+    """Shared cache for a binary path (one per process)"""
+    key = (os.getpid(), os.path.abspath(binary))
+    if key not in _caches:
+        _caches[key] = ResultCache(binary)
+    return _caches[key]
+
+
+def main():
+    binary = sys.argv[1] if len(sys.argv) > 1 else os.path.join(HERE, 'KeyForge_unpacked')
+    cache = get_cache(binary)
+    print("KeyForge Result Cache")
+    print("="*50)
+    print(f"Binary:  {binary}")
+    print(f"SHA-256: {cache.binary_hash}")
+    print(f"Log:     {cache.path}")
+    print(f"Entries: {len(cache)}")
+    print(f"Size:    {cache.indexed} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,8 @@ import re
 import os
 from pathlib import Path
 
+from hash_fingerprint import load_segments
+
 BINARY_PATH = "/workspaces/ctf/ctf_rabat/keyforge/KeyForge"
 OUTPUT_DIR = "/workspaces/ctf/ctf_rabat/keyforge"
 
@@ -159,6 +161,31 @@ def analyze_data_section():
                 if val != '00000000':
                     print(f"    0x{val}")
 
+COMPARE = re.compile(r'cmp\s+\w+,\s*(QWORD|DWORD|WORD|BYTE) PTR \[rip\+0x[0-9a-f]+\]\s+#\s*0x([0-9a-f]+)')
+PTR_SIZES = {'QWORD': 8, 'DWORD': 4, 'WORD': 2, 'BYTE': 1}
+
+def compare_targets(disasm, binary=BINARY_PATH):
+    """Constants compared against a register through a rip-relative load
+    
+    Parses `cmp reg, SIZE PTR [rip+...]  # addr` lines of intel-syntax
+    disassembly and reads each operand from the file image. Returns
+    {address: (size, value)} for non-zero operands backed by the file.
+    """
+    with open(binary, 'rb') as f:
+        data = f.read()
+    segments = load_segments(data)
+    targets = {}
+    for size, address in COMPARE.findall(disasm):
+        address, size = int(address, 16), PTR_SIZES[size]
+        for segment in segments:
+            if segment.vaddr <= address and address + size <= segment.vaddr + segment.filesz:
+                offset = segment.offset + address - segment.vaddr
+                value = int.from_bytes(data[offset:offset + size], 'little')
+                if value:
+                    targets[address] = (size, value)
+                break
+    return targets
+
 def test_format_variations():
     """Test different input formats to understand expected format"""
     print("\n[*] Testing input format variations...")
@@ -209,6 +236,12 @@ def main():
         
         # Find validation functions
         find_validation_functions(disasm)
+        
+        # Operands of register/memory compares are the likeliest targets
+        targets = compare_targets(disasm)
+        print("\n[+] Potential hash targets (compare operands):")
+        for address, (size, value) in sorted(targets.items()):
+            print(f"    0x{address:x}: {size}-byte 0x{value:0{size * 2}x}")
     
     # Analyze data section
     analyze_data_section()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Concurrent strategy scheduler for KeyForge
+Every registered strategy feeds one shared oracle pool, interleaved by priority
+under time and candidate budgets; the first success cancels the rest
+"""
+import heapq
+import itertools
+import time
+from collections import deque
+
+from candidate_pool import CandidatePool
+from oracle import get_oracle, make_flag
+from outcome_classifier import Outcome, classify, is_success
+
+
+class Strategy:
+    """One candidate source and its share of the pool
+
+    `priority` is a weight: a strategy with priority 4 is handed four
+    candidates for every one of a priority-1 strategy. `time_budget` is
+    wall-clock seconds from its first candidate, `candidate_budget` the
+    most candidates it may submit in this run. An optional checkpoint
+    StrategyState records every result and is finished only when the
+    source runs out, so a budget stop stays resumable.
+    """
+
+    def __init__(self, name, candidates, priority=1, time_budget=None, candidate_budget=None,
+                 state=None, on_result=None, on_done=None):
+        self.name = name
+        self.iterator = iter(candidates)
+        self.priority = priority
+        self.time_budget = time_budget
+        self.candidate_budget = candidate_budget
+        self.state = state
+        self.on_result = on_result
+        self.on_done = on_done
+        self.status = "pending"
+        self.submitted = 0
+        self.completed = 0
+        self.started = None
+        self.stopped = None
+
+    def stop_reason(self, now):
+        if self.candidate_budget is not None and self.submitted >= self.candidate_budget:
+            return "candidate budget"
+        if self.time_budget is not None and self.started is not None and now - self.started >= self.time_budget:
+            return "time budget"
+        return None
+
+    @property
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.stopped or time.monotonic()) - self.started
+
+
+class StrategyScheduler:
+    """Run every strategy at once over one CandidatePool
+
+    Candidates are drawn by stride scheduling: each strategy carries a pass
+    value that grows by 1/priority per candidate, and the lowest pass is
+    drawn next. The pool returns results in submission order, so a FIFO
+    of owners maps each result back to its strategy with no lookups; each
+    entry also carries the checkpoint's source count at draw time, so the
+    saved position includes candidates filtered out after skip().
+    The first success cancels the pool and every other strategy, and the
+    flag is then verified once with a fresh, uncached run.
+    """
+
+    def __init__(self, pool=None, verify=True):
+        self.pool = pool
+        self.verify = verify
+        self.strategies = []
+        self.owners = deque()
+        self.found = None
+
+    def add(self, name, candidates, **options):
+        strategy = Strategy(name, candidates, **options)
+        self.strategies.append(strategy)
+        return strategy
+
+    def _interleave(self):
+        heap = [(0.0, order, strategy) for order, strategy in enumerate(self.strategies)]
+        heapq.heapify(heap)
+        while heap:
+            pass_value, order, strategy = heapq.heappop(heap)
+            now = time.monotonic()
+            reason = strategy.stop_reason(now)
+            if reason:
+                self._stop(strategy, reason)
+                continue
+            try:
+                content = next(strategy.iterator)
+            except StopIteration:
+                self._stop(strategy, "exhausted")
+                continue
+            if strategy.started is None:
+                strategy.started = now
+                strategy.status = "running"
+            strategy.submitted += 1
+            drawn = strategy.state.drawn if strategy.state is not None else None
+            self.owners.append((strategy, drawn))
+            yield content
+            heapq.heappush(heap, (pass_value + 1.0 / strategy.priority, order, strategy))
+
+    def _stop(self, strategy, reason):
+        # Runs in the pool's feeder thread: only mark the strategy here;
+        # the "done" transition and its callbacks belong to the consumer
+        strategy.status = reason
+        strategy.stopped = time.monotonic()
+
+    def _maybe_done(self, strategy):
+        """Consumer thread only: finish an exhausted strategy whose results are all in"""
+        if strategy.status != "exhausted" or strategy.completed != strategy.submitted:
+            return
+        strategy.status = "done"
+        if strategy.state is not None:
+            strategy.state.finish()
+        if strategy.on_done is not None:
+            strategy.on_done()
+
+    def run(self):
+        """Returns the verified flag, or None"""
+        pool = self.pool or CandidatePool()
+        try:
+            for content, output, rc in pool.imap(self._interleave(), is_success, ordered=True):
+                strategy, drawn = self.owners.popleft()
+                strategy.completed += 1
+                if strategy.state is not None:
+                    strategy.state.record(content, output, rc, drawn)
+                if strategy.on_result is not None:
+                    strategy.on_result(content, output, rc)
+                if is_success(output):
+                    self.found = (strategy, content)
+                    break
+                self._maybe_done(strategy)
+        finally:
+            if self.pool is None:
+                pool.close()
+        # A strategy can run dry after its last result was consumed
+        for strategy in self.strategies:
+            self._maybe_done(strategy)
+
+        if self.found is None:
+            return None
+        winner, content = self.found
+        winner.status = "found"
+        for strategy in self.strategies:
+            if strategy.status in ("pending", "running"):
+                strategy.status = "cancelled"
+        print(f"\n[+] {winner.name} found VoidBox{{{content}}}; cancelled the other strategies")
+        if self.verify and not self.verified(content):
+            return None
+        return make_flag(content)
+
+    def verified(self, content):
+        """One fresh run of the hit, bypassing the result cache"""
+        stdout, stderr, rc, _ = get_oracle().probe(make_flag(content).encode() + b'\n')
+        outcome = classify(stdout, rc)
+        print(f"VERIFICATION: {stdout.decode('utf-8', errors='ignore').strip()} ({outcome.value})")
+        return outcome is Outcome.SUCCESS
+
+    def report(self):
+        print(f"  {'strategy':28} {'prio':>4} {'status':>16} {'tested':>8} {'time':>8}")
+        for strategy in self.strategies:
+            print(f"  {strategy.name[:28]:28} {strategy.priority:4} {strategy.status:>16} "
+                  f"{strategy.completed:8} {strategy.elapsed:7.1f}s")
+
+
+def main():
+    print("KeyForge Strategy Scheduler")
+    print("="*50)
+    scheduler = StrategyScheduler()
+    counter = itertools.count()
+    scheduler.add("digits", (f"{i:027d}" for i in counter), priority=1, candidate_budget=300)
+    scheduler.add("letters", ("a" * 24 + f"{i:03d}" for i in range(2000)), priority=3, time_budget=0.5)
+    scheduler.add("underscores", ("_" * 27 for _ in range(10)), priority=5)
+    start = time.perf_counter()
+    flag = scheduler.run()
+    print(f"  Finished in {time.perf_counter() - start:.2f}s, flag: {flag}\n")
+    scheduler.report()
+
+
+if __name__ == "__main__":
+    main()
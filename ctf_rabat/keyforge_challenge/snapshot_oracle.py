@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Snapshot/restore KeyForge oracle (AFL persistent mode, driven from outside)
+One traced process, rewound to the license read after every candidate
+"""
+import array
+import ctypes
+import mmap
+import os
+import signal
+import subprocess
+import threading
+import time
+
+import ptrace_tools
+from oracle import BACKENDS, UNPACKED_BINARY, SubprocessOracle, make_flag
+from ptrace_tools import (SYS_BRK, SYS_EXIT, SYS_EXIT_GROUP, SYS_MUNMAP, SYS_READ,
+                          SYS_WRITE)
+
+PAGE = 4096
+SOFT_DIRTY = 1 << 55
+SKIP_SYSCALL = 0xFFFFFFFFFFFFFFFF
+
+
+def writable_mappings(pid):
+    """[(start, end)] of the writable mappings in /proc/pid/maps"""
+    ranges = []
+    with open(f"/proc/{pid}/maps") as f:
+        for line in f:
+            fields = line.split()
+            if 'w' in fields[1]:
+                start, end = (int(x, 16) for x in fields[0].split('-'))
+                ranges.append((start, end))
+    return ranges
+
+
+def soft_dirty_supported():
+    """Probe whether the kernel really tracks soft-dirty pages
+
+    Kernels without CONFIG_MEM_SOFT_DIRTY accept clear_refs "4" silently and
+    report the bit as always clear, so test it on a page of our own.
+    """
+    page = mmap.mmap(-1, PAGE)
+    try:
+        page[0] = 1
+        view = ctypes.c_char.from_buffer(page)
+        addr = ctypes.addressof(view)
+        del view
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("4")
+        page[0] = 2
+        with open("/proc/self/pagemap", "rb") as f:
+            f.seek(addr // PAGE * 8)
+            entry = int.from_bytes(f.read(8), 'little')
+        return bool(entry & SOFT_DIRTY)
+    except (OSError, TypeError):
+        return False
+    finally:
+        page.close()
+
+
+class _Watchdog(threading.Thread):
+    """Single long-lived thread that SIGKILLs a run that blows its deadline"""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.cond = threading.Condition()
+        self.deadline = None
+        self.pid = None
+        self.fired = False
+        self.start()
+
+    def arm(self, pid, timeout):
+        with self.cond:
+            self.pid = pid
+            self.deadline = time.monotonic() + timeout
+            self.fired = False
+            self.cond.notify()
+
+    def disarm(self):
+        with self.cond:
+            self.deadline = None
+
+    def run(self):
+        with self.cond:
+            while True:
+                if self.deadline is None:
+                    self.cond.wait()
+                    continue
+                remaining = self.deadline - time.monotonic()
+                if remaining > 0:
+                    self.cond.wait(remaining)
+                    continue
+                self.deadline = None
+                self.fired = True
+                try:
+                    os.kill(self.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+
+
+class SnapshotOracle(SubprocessOracle):
+    """Replay candidates in place inside one ptrace'd KeyForge_unpacked
+
+    At the entry of read(0, ...) the registers, writable memory and program
+    break are snapshotted. Each candidate is written straight into the read
+    buffer, write(1, ...) calls are captured without reaching the kernel,
+    and exit_group() is turned into a rewind: only the pages marked
+    soft-dirty since the snapshot are copied back (all writable pages when
+    the kernel lacks soft-dirty tracking), extra mappings are unmapped and
+    the break is reset.
+    """
+
+    name = "snapshot"
+
+    def __init__(self, binary=UNPACKED_BINARY, timeout=2, cache=True):
+        super().__init__(binary, timeout, cache)
+        self.server = None
+        self.watchdog = _Watchdog()
+        self._start()
+
+    def _start(self):
+        devnull = os.open(os.devnull, os.O_RDWR)
+        self.prompt = b''
+        try:
+            self.server = ptrace_tools.TracedProcess(
+                [self.binary], stdin=devnull, stdout=devnull, stderr=devnull)
+        finally:
+            os.close(devnull)
+
+        while True:
+            regs = self.server.next_syscall_stop()
+            if regs is None:
+                raise OSError("KeyForge exited before reading the license key")
+            if isinstance(regs, tuple) or not self.server.in_syscall:
+                continue
+            if regs.orig_rax == SYS_WRITE and regs.rdi == 1:
+                self.prompt += self.server.read(regs.rsi, regs.rdx)
+            elif regs.orig_rax == SYS_READ and regs.rdi == 0:
+                break
+        self.read_regs = regs
+        self.brk = self.server.inject_syscall(regs, SYS_BRK, 0)
+        self.mappings = writable_mappings(self.server.pid)
+        self.snapshot = {rng: self.server.read(rng[0], rng[1] - rng[0])
+                         for rng in self.mappings}
+        self.pagemap = open(f"/proc/{self.server.pid}/pagemap", "rb", buffering=0)
+        self.soft_dirty = soft_dirty_supported()
+        if self.soft_dirty:
+            self._clear_refs()
+
+    def _clear_refs(self):
+        with open(f"/proc/{self.server.pid}/clear_refs", "w") as f:
+            f.write("4")
+
+    def _dirty_runs(self, start, end):
+        """Yield (addr, size) runs of soft-dirty pages in [start, end)"""
+        if not self.soft_dirty:
+            yield start, end - start
+            return
+        self.pagemap.seek(start // PAGE * 8)
+        entries = array.array('Q', self.pagemap.read((end - start) // PAGE * 8))
+        run = None
+        for i, entry in enumerate(entries):
+            addr = start + i * PAGE
+            if entry & SOFT_DIRTY:
+                if run is None:
+                    run = addr
+            elif run is not None:
+                yield run, addr - run
+                run = None
+        if run is not None:
+            yield run, end - run
+
+    def _restore(self):
+        regs = self.read_regs
+        current = writable_mappings(self.server.pid)
+        for start, end in current:
+            if (start, end) in self.snapshot:
+                continue
+            if any(start < e and s < end for s, e in self.snapshot):
+                continue  # grown stack/heap; the extra pages are dead
+            self.server.inject_syscall(regs, SYS_MUNMAP, start, end - start)
+        if self.server.inject_syscall(regs, SYS_BRK, 0) != self.brk:
+            self.server.inject_syscall(regs, SYS_BRK, self.brk)
+
+        restored = 0
+        for (start, end), image in self.snapshot.items():
+            for addr, size in self._dirty_runs(start, end):
+                offset = addr - start
+                self.server.write(addr, image[offset:offset + size])
+                restored += size
+        if self.soft_dirty:
+            self._clear_refs()
+        return restored
+
+    def _restart(self):
+        self.server.kill()
+        self.pagemap.close()
+        self._start()
+
+    def _skip(self, entry, result):
+        """Skip the syscall at an entry stop and make it return `result`"""
+        entry.orig_rax = SKIP_SYSCALL
+        self.server.setregs(entry)
+        stop = self.server.next_syscall_stop()
+        if stop is None:
+            return False
+        stop.rax = result
+        self.server.setregs(stop)
+        return True
+
+    def _rewind(self, exit_entry):
+        """Turn an exit_group() entry stop back into the parked read()"""
+        exit_entry.orig_rax = SKIP_SYSCALL
+        self.server.setregs(exit_entry)
+        if self.server.next_syscall_stop() is None:
+            raise OSError("tracee died while rewinding")
+        rewind = self.read_regs.copy()
+        rewind.rax = self.read_regs.orig_rax
+        rewind.rip = self.read_regs.rip - 2
+        self.server.setregs(rewind)
+        if self.server.next_syscall_stop() is None or not self.server.in_syscall:
+            raise OSError("tracee did not return to the license read")
+        self._restore()
+
+    def run(self, data):
+        server = self.server
+        data = data[:self.read_regs.rdx]
+        stdout = [self.prompt]
+        rc = None
+
+        server.write(self.read_regs.rsi, data)
+        self.watchdog.arm(server.pid, self.timeout)
+        try:
+            alive = self._skip(self.read_regs.copy(), len(data))
+            while alive:
+                stop = server.next_syscall_stop()
+                if stop is None:
+                    break
+                if isinstance(stop, tuple) or not server.in_syscall:
+                    continue
+                if stop.orig_rax == SYS_WRITE and stop.rdi in (1, 2):
+                    if stop.rdi == 1:
+                        stdout.append(server.read(stop.rsi, stop.rdx))
+                    alive = self._skip(stop, stop.rdx)
+                elif stop.orig_rax in (SYS_EXIT_GROUP, SYS_EXIT):
+                    rc = stop.rdi & 0xFF
+                    break
+        finally:
+            self.watchdog.disarm()
+        stdout = b''.join(stdout)
+
+        if rc is not None:
+            try:
+                self._rewind(stop)
+                return stdout, rc
+            except OSError:
+                pass  # lost a race with the watchdog; fall through to restart
+
+        # Crashed or killed: start over from a fresh process
+        status = server.exit_status
+        timed_out = self.watchdog.fired
+        self._restart()
+        if rc is not None:
+            return stdout, rc
+        if timed_out:
+            raise subprocess.TimeoutExpired([self.binary], self.timeout, output=stdout)
+        return stdout, os.waitstatus_to_exitcode(status)
+
+    def close(self):
+        if self.server is not None:
+            self.server.kill()
+            self.pagemap.close()
+            self.server = None
+
+
+def benchmark(count=2000):
+    """candidates/sec of each backend on uncached, distinct inputs"""
+    backends = [
+        ("subprocess (packed)", lambda: SubprocessOracle(cache=False)),
+        ("subprocess (unpacked)", lambda: SubprocessOracle(UNPACKED_BINARY, cache=False)),
+        ("forkserver", lambda: BACKENDS["forkserver"](cache=False)),
+        ("snapshot", lambda: SnapshotOracle(cache=False)),
+    ]
+    results = {}
+    for name, factory in backends:
+        try:
+            oracle = factory()
+        except OSError as e:
+            print(f"  {name:22}: unavailable ({e})")
+            continue
+        rounds = count if name in ("forkserver", "snapshot") else count // 10
+        start = time.perf_counter()
+        try:
+            for i in range(rounds):
+                output, rc = oracle.check(make_flag(f"{i:027d}"))
+        except OSError as e:
+            print(f"  {name:22}: failed ({e})")
+            continue
+        finally:
+            oracle.close()
+        rate = rounds / (time.perf_counter() - start)
+        results[name] = rate
+        print(f"  {name:22}: {rate:9.1f} candidates/sec  ({output!r}, rc={rc})")
+    baseline = results.get("subprocess (packed)") or results.get("subprocess (unpacked)")
+    if "snapshot" in results and baseline:
+        print(f"\n  snapshot vs subprocess.run: {results['snapshot'] / baseline:.1f}x")
+    return results
+
+
+def main():
+    print("KeyForge Snapshot Oracle Benchmark")
+    print("="*50)
+    oracle = SnapshotOracle(cache=False)
+    for content in ["a" * 27, "wh0_s41d_y0ahhrmiri_hgsklra", "a" * 27]:
+        print(f"  {content}: {oracle.check(make_flag(content))}")
+    print(f"  soft-dirty tracking: {oracle.soft_dirty}")
+    oracle.close()
+    print()
+    benchmark()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Wall-clock timing attack engine for KeyForge
+For boxes where perf counters are not allowed: many pinned, interleaved samples
+per candidate, trimmed, then a Mann-Whitney U test per character
+"""
+import json
+import math
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import time
+
+from instruction_counter import PRINTABLE
+from oracle import CONTENT_LENGTH, UNPACKED_BINARY, ForkServerOracle, make_flag
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RANKING_PATH = os.path.join(HERE, 'timing_ranking.json')
+
+
+def _order(rankings):
+    return {pos: ''.join(entry["char"] for entry in ranking) for pos, ranking in rankings.items()}
+
+
+def load_ranking(path=RANKING_PATH):
+    """{position: chars ordered by evidence} from a saved ranking, {} if none
+
+    Feed it to Mask.reorder() so the mask generators try the
+    slowest-running chars first.
+    """
+    try:
+        with open(path) as f:
+            saved = json.load(f)
+    except FileNotFoundError:
+        return {}
+    return _order({int(pos): ranking for pos, ranking in saved.items()})
+
+
+def _pin(cpu):
+    os.sched_setaffinity(0, {cpu})
+
+
+def sample_once(binary, data, cpu=None):
+    """One run's wall-clock latency in ns (child pinned to `cpu` if given), None on timeout"""
+    start = time.perf_counter_ns()
+    try:
+        subprocess.run([binary], input=data, stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL, timeout=2,
+                       preexec_fn=(lambda: _pin(cpu)) if cpu is not None else None)
+    except subprocess.TimeoutExpired:
+        return None
+    return time.perf_counter_ns() - start
+
+
+def _sample_worker(args):
+    """Time a shard of the schedule on one pinned core
+
+    A fork server (pinned to the same core, so its forked children are too)
+    removes exec and loader noise from every sample; plain pinned
+    subprocess runs are the fallback when ptrace is unavailable. Runs
+    that time out are dropped rather than recorded as slow.
+    """
+    binary, cpu, schedule = args
+    _pin(cpu)
+    try:
+        server = ForkServerOracle(binary, cache=False)
+        os.sched_setaffinity(server.server.pid, {cpu})
+    except OSError:
+        samples = [(label, sample_once(binary, data, cpu)) for label, data in schedule]
+        return [(label, ns) for label, ns in samples if ns is not None]
+
+    samples = []
+    try:
+        for label, data in schedule:
+            start = time.perf_counter_ns()
+            try:
+                server.run(data)
+            except subprocess.TimeoutExpired:
+                # A hung run says nothing about the compare depth
+                continue
+            samples.append((label, time.perf_counter_ns() - start))
+    finally:
+        server.close()
+    return samples
+
+
+def trim(samples, fraction=0.1):
+    """Drop the lowest and highest `fraction` of samples"""
+    ordered = sorted(samples)
+    cut = int(len(ordered) * fraction)
+    return ordered[cut:len(ordered) - cut] if len(ordered) > 2 * cut else ordered
+
+
+def mann_whitney_u(xs, ys):
+    """One-sided Mann-Whitney U test that xs tends to be larger than ys
+
+    Returns (U, p) using the normal approximation with tie correction,
+    which is accurate for the hundreds of samples collected here.
+    """
+    n1, n2 = len(xs), len(ys)
+    if not n1 or not n2:
+        return 0.0, 1.0
+    combined = sorted([(x, 0) for x in xs] + [(y, 1) for y in ys])
+    rank_sum = 0.0
+    tie_term = 0.0
+    i = 0
+    while i < len(combined):
+        j = i
+        while j + 1 < len(combined) and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        rank = (i + j) / 2 + 1
+        rank_sum += rank * sum(1 for k in range(i, j + 1) if combined[k][1] == 0)
+        ties = j - i + 1
+        tie_term += ties ** 3 - ties
+        i = j + 1
+
+    u = rank_sum - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    mean = n1 * n2 / 2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1)))
+    if variance <= 0:
+        return u, 1.0
+    z = (u - mean - 0.5) / math.sqrt(variance)
+    return u, 0.5 * math.erfc(z / math.sqrt(2))
+
+
+class TimingAttack:
+    """Per-position character ranking from repeated, pinned, shuffled timings"""
+
+    def __init__(self, binary=UNPACKED_BINARY, repetitions=200, cpus=None,
+                 trim_fraction=0.1, alpha=0.001):
+        self.binary = binary
+        self.repetitions = repetitions
+        self.cpus = cpus or sorted(os.sched_getaffinity(0))
+        self.trim_fraction = trim_fraction
+        self.alpha = alpha
+        self.rankings = {}
+
+    def collect(self, candidates):
+        """{content: [ns, ...]} with all repetitions interleaved at random
+
+        The schedule is shuffled as a whole so drift (thermal, frequency,
+        neighbours) is spread evenly over every candidate, then dealt out
+        round-robin to one pinned worker per core.
+        """
+        schedule = [(content, make_flag(content).encode() + b'\n')
+                    for content in candidates for _ in range(self.repetitions)]
+        random.shuffle(schedule)
+        shards = [(self.binary, cpu, schedule[i::len(self.cpus)])
+                  for i, cpu in enumerate(self.cpus)]
+
+        samples = {content: [] for content in candidates}
+        if len(shards) == 1:
+            affinity = os.sched_getaffinity(0)
+            try:
+                results = [_sample_worker(shards[0])]
+            finally:
+                os.sched_setaffinity(0, affinity)
+        else:
+            with multiprocessing.get_context("fork").Pool(len(shards)) as pool:
+                results = pool.map(_sample_worker, shards)
+        for shard in results:
+            for content, ns in shard:
+                samples[content].append(ns)
+        return samples
+
+    def rank_position(self, known="", alphabet=PRINTABLE, filler="a"):
+        """Rank every char at position len(known); slowest (deepest) first
+
+        Each char's trimmed samples are tested against the pooled samples of
+        all other chars; `significant` marks p < alpha after a Bonferroni
+        correction over the alphabet.
+        """
+        pos = len(known)
+        pad = filler * (CONTENT_LENGTH - pos - 1)
+        by_char = {ch: known + ch + pad for ch in alphabet}
+        samples = self.collect(list(by_char.values()))
+        trimmed = {ch: trim(samples[content], self.trim_fraction)
+                   for ch, content in by_char.items()}
+
+        ranking = []
+        for ch in alphabet:
+            others = [ns for other, values in trimmed.items() if other != ch for ns in values]
+            u, p = mann_whitney_u(trimmed[ch], others)
+            values = trimmed[ch]
+            ranking.append({
+                "char": ch,
+                "median_ns": values[len(values) // 2] if values else 0,
+                "u": u,
+                "p": p,
+                "significant": p < self.alpha / len(alphabet),
+            })
+        ranking.sort(key=lambda entry: (entry["p"], -entry["median_ns"]))
+        self.rankings[pos] = ranking
+        return ranking
+
+    def recover(self, known="", alphabet=PRINTABLE, filler="a", verbose=True):
+        """Extend `known` while each position has a significant winner"""
+        while len(known) < CONTENT_LENGTH:
+            ranking = self.rank_position(known, alphabet, filler)
+            best = ranking[0]
+            if verbose:
+                top = ", ".join(f"{e['char']!r}:{e['median_ns'] / 1000:.0f}us"
+                                for e in ranking[:5])
+                print(f"  Position {len(known):2}: {top}  p={best['p']:.2e}")
+            if not best["significant"]:
+                if verbose:
+                    print(f"  [-] No significant character at position {len(known)}")
+                break
+            known += best["char"]
+        return known
+
+    def ordered_alphabets(self):
+        """{position: chars ordered by evidence} for the candidate generators"""
+        return _order(self.rankings)
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump({str(pos): ranking for pos, ranking in self.rankings.items()}, f, indent=1)
+
+
+def main():
+    print("KeyForge Timing Attack")
+    print("="*50)
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    attack = TimingAttack(repetitions=repetitions)
+    print(f"Pinned cores: {attack.cpus}, {repetitions} samples per candidate\n")
+
+    start = time.perf_counter()
+    ranking = attack.rank_position("", alphabet="abcdefghijklmnopqrstuvwxyz0123456789_")
+    elapsed = time.perf_counter() - start
+    for entry in ranking[:10]:
+        flag = "*" if entry["significant"] else " "
+        print(f"  {flag} {entry['char']!r}: median {entry['median_ns'] / 1000:8.1f}us  p={entry['p']:.3e}")
+    print(f"\n{repetitions * len(ranking)} samples in {elapsed:.1f}s")
+    attack.save(RANKING_PATH)
+    print(f"Ranking saved to {RANKING_PATH}")
+
+
+if __name__ == "__main__":
+    main()
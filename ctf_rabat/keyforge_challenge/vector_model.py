@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Vectorised model harness for the KeyForge license check
+Express recovered validation logic as numpy operations over an (N, 27) uint8
+candidate matrix, and test the model against the real binary
+"""
+import random
+import sys
+import time
+
+import numpy as np
+
+from candidate_pool import CandidatePool
+from grammar_inference import load_grammar
+from instruction_counter import PRINTABLE
+from mask_attack import as_strings
+from oracle import CONTENT_LENGTH
+from outcome_classifier import Outcome, classify
+
+# Model predictions are uint8 codes into this list
+OUTCOMES = [Outcome.INVALID_FORMAT, Outcome.VALIDATION_FAILED, Outcome.SUCCESS]
+INVALID, FAILED, SUCCESS = range(3)
+
+
+def as_matrix(contents, width=CONTENT_LENGTH):
+    """(N, width) uint8 matrix from an array, or a list of str/bytes of equal length"""
+    if isinstance(contents, np.ndarray):
+        return contents.astype(np.uint8, copy=False)
+    data = b"".join(c.encode('latin-1') if isinstance(c, str) else bytes(c) for c in contents)
+    return np.frombuffer(data, np.uint8).reshape(-1, width)
+
+
+def lanes(matrix, little=True):
+    """Pack each row into 32-bit words, zero-padding the tail (27 bytes -> 7 words)"""
+    width = -(-matrix.shape[1] // 4) * 4
+    padded = np.zeros((matrix.shape[0], width), np.uint8)
+    padded[:, :matrix.shape[1]] = matrix
+    return padded.view('<u4' if little else '>u4').astype(np.uint32)
+
+
+def _unsigned(x, k):
+    """k as the dtype of x, wrapped, so scalar constants never overflow"""
+    bits = x.dtype.itemsize * 8
+    return np.asarray(k, dtype=np.uint64).astype(x.dtype) if np.ndim(k) else x.dtype.type(int(k) % (1 << bits))
+
+
+def rotl(x, r):
+    """Rotate left by r (scalar or per-column array) within the dtype's width"""
+    bits = x.dtype.itemsize * 8
+    r = np.asarray(r) % bits
+    return ((x << r.astype(x.dtype)) | (x >> ((bits - r) % bits).astype(x.dtype))).astype(x.dtype)
+
+
+def rotr(x, r):
+    bits = x.dtype.itemsize * 8
+    return rotl(x, (bits - np.asarray(r) % bits) % bits)
+
+
+def xor(x, k):
+    return np.bitwise_xor(x, _unsigned(x, k))
+
+
+def add(x, k):
+    """Addition modulo 2^bits of the dtype (2^32 on lanes(), 2^8 on the byte matrix)"""
+    return np.add(x, _unsigned(x, k), dtype=x.dtype)
+
+
+def mul(x, k):
+    return np.multiply(x, _unsigned(x, k), dtype=x.dtype)
+
+
+def lookup(table, x):
+    """table[x] elementwise, e.g. an S-box or a per-char class table"""
+    return np.asarray(table)[x]
+
+
+def compare(x, constants, positions=None):
+    """Rows whose selected columns equal the constants at every position
+
+    A 1-D result, such as one hash state per row, is one column.
+    """
+    x = np.asarray(x)
+    if x.ndim == 1:
+        x = x.reshape(len(x), -1)
+    if positions is not None:
+        x = x[:, positions]
+    return (x == np.asarray(constants, dtype=x.dtype)).all(axis=1)
+
+
+class FormatGate:
+    """The format check learned by grammar_inference, as one table lookup
+
+    predict() returns one OUTCOMES code per row.
+
+    allowed[pos, byte] is true when `byte` passes at body position `pos`,
+    so gathering allowed[arange(width), matrix] and AND-ing across the row
+    checks every candidate at once.
+    """
+
+    name = "format gate"
+
+    def __init__(self, grammar=None):
+        self.grammar = grammar or load_grammar()
+        self.allowed = np.zeros((len(self.grammar.classes), 256), dtype=bool)
+        for pos, chars in enumerate(self.grammar.classes):
+            self.allowed[pos, np.frombuffer(chars.encode('latin-1'), np.uint8)] = True
+
+    def passes(self, matrix):
+        return self.allowed[np.arange(matrix.shape[1]), matrix].all(axis=1)
+
+    def predict(self, matrix):
+        return np.where(self.passes(matrix), FAILED, INVALID).astype(np.uint8)
+
+
+class LiftedCheck(FormatGate):
+    """Format gate followed by a recovered transform and a constant compare
+
+    `transform` maps the (N, 27) matrix to any array (bytes, lanes(), a
+    hash state) built from the primitives above, and `target` is what the
+    binary compares it against. A row is SUCCESS when every column of the
+    transformed row matches the target. With no transform only the gate
+    is modelled and every accepted row is VALIDATION_FAILED.
+    """
+
+    name = "lifted check"
+
+    def __init__(self, transform=None, target=None, grammar=None):
+        super().__init__(grammar)
+        self.transform = transform
+        self.target = target
+
+    def predict(self, matrix):
+        codes = super().predict(matrix)
+        if self.transform is not None:
+            hit = compare(self.transform(matrix), self.target)
+            codes[hit & (codes == FAILED)] = SUCCESS
+        return codes
+
+
+def sample_candidates(grammar, count, seed=0):
+    """A mix that exercises both sides of the format gate
+
+    A third each: random rows from the grammar's keyspace, the same rows
+    with one char swapped for random printable ASCII, and fully random
+    printable ASCII.
+    """
+    rng = random.Random(seed)
+    keyspace = grammar.keyspace()
+    samples = []
+    for i in range(count):
+        content = keyspace.candidate(rng.randrange(keyspace.keyspace))
+        if i % 3 == 1:
+            pos = rng.randrange(len(content))
+            content = content[:pos] + rng.choice(PRINTABLE) + content[pos + 1:]
+        elif i % 3 == 2:
+            content = "".join(rng.choice(PRINTABLE) for _ in range(len(content)))
+        samples.append(content)
+    return samples
+
+
+def differential(model, candidates, pool=None, show=10):
+    """Run candidates through the model and the binary; report every disagreement
+
+    Returns (agreed, disagreements, confusion) where confusion counts
+    (model outcome, binary outcome) pairs.
+    """
+    predicted = model.predict(as_matrix(candidates))
+    expected = dict(zip(candidates, predicted))
+    confusion = {}
+    disagreements = []
+    owned = pool is None
+    pool = pool or CandidatePool()
+    try:
+        for content, output, rc in pool.imap(candidates):
+            actual = classify(output, rc)
+            guess = OUTCOMES[expected[content]]
+            confusion[(guess, actual)] = confusion.get((guess, actual), 0) + 1
+            if guess is not actual:
+                disagreements.append((content, guess, actual, output))
+    finally:
+        if owned:
+            pool.close()
+
+    agreed = sum(count for (guess, actual), count in confusion.items() if guess is actual)
+    print(f"  {model.name}: {agreed}/{len(candidates)} agree, {len(disagreements)} disagree")
+    for (guess, actual), count in sorted(confusion.items(), key=lambda item: -item[1]):
+        mark = "" if guess is actual else "  <-- mismatch"
+        print(f"    model {guess.value:18} binary {actual.value:18} {count:6}{mark}")
+    for content, guess, actual, output in disagreements[:show]:
+        print(f"    {content!r}: model {guess.value}, binary {output!r}")
+    return agreed, disagreements, confusion
+
+
+def main():
+    print("KeyForge Vectorised Model Harness")
+    print("="*50)
+    model = FormatGate()
+    mask, custom = model.grammar.content_mask()
+    print(f"  Format gate from grammar: {mask[:12]}... {custom}")
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    keyspace = model.grammar.keyspace()
+    batch = keyspace.batch(keyspace.keyspace // 3, count)
+    batch[::2, 5] = ord(' ')                           # every other row fails the gate
+    start = time.perf_counter()
+    codes = model.predict(batch)
+    elapsed = time.perf_counter() - start
+    print(f"  {count:,} candidates in {elapsed * 1000:.0f}ms ({count / elapsed:,.0f}/sec), "
+          f"{int((codes == FAILED).sum()):,} past the gate")
+
+    lanes_batch = lanes(batch)
+    start = time.perf_counter()
+    state = add(rotl(xor(lanes_batch, 0x9E3779B9), 5), 0x7F4A7C15)
+    elapsed = time.perf_counter() - start
+    print(f"  xor/rotl/add over {lanes_batch.size:,} 32-bit lanes in {elapsed * 1000:.0f}ms")
+
+    # A transform ending in one hash state per row, checked against the
+    # same fold written per candidate in plain Python
+    def fold(matrix):
+        state = np.full(len(matrix), 0x811C9DC5, dtype=np.uint32)
+        for column in lanes(matrix).T:
+            state = mul(state ^ column, 0x01000193)
+        return state
+
+    def fold_scalar(content):
+        state = 0x811C9DC5
+        data = content.encode('latin-1').ljust(-(-len(content) // 4) * 4, b'\0')
+        for i in range(0, len(data), 4):
+            state = ((state ^ int.from_bytes(data[i:i + 4], 'little')) * 0x01000193) & 0xFFFFFFFF
+        return state
+
+    rows = as_strings(batch[1::2][:2000])
+    target = fold_scalar(rows[0])
+    lifted = LiftedCheck(fold, target, model.grammar)
+    predicted = lifted.predict(as_matrix(rows))
+    expected = [SUCCESS if fold_scalar(row) == target else FAILED for row in rows]
+    agree = int((predicted == np.array(expected, dtype=np.uint8)).sum())
+    print(f"  hash-state transform vs scalar model: {agree}/{len(rows)} agree\n")
+
+    print("Differential test against the binary:")
+    samples = sample_candidates(model.grammar, int(sys.argv[2]) if len(sys.argv) > 2 else 3000)
+    print(f"  {len(set(as_strings(as_matrix(samples))))} distinct samples")
+    differential(model, samples)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,11 @@
 """
 Verify the found flag and test variations
 """
-import subprocess
+import itertools
+
+from mutations import Mutations
+from oracle import get_oracle
+from outcome_classifier import is_success
 
 def test_flag_content(content_27):
     """Test a 27-character content in VoidBox format"""
@@ -10,10 +14,7 @@ def test_flag_content(content_27):
     print(f"Testing: {flag}")
     
     try:
-        result = subprocess.run(['./KeyForge'], input=flag.encode() + b'\n',
-                              capture_output=True, timeout=2)
-        output = result.stdout.decode('utf-8', errors='ignore').strip()
-        return output, result.returncode
+        return get_oracle().check(flag)
     except Exception as e:
         return f"ERROR: {e}", -1
 
@@ -32,7 +33,7 @@ def main():
     print(f"Output: {output}")
     print(f"Return code: {rc}")
     
-    if "License valid!" in output:
+    if is_success(output):
         print("\n" + "="*50)
         print("SUCCESS! This is the correct flag!")
         print(f"FLAG: VoidBox{{{found_content}}}")
@@ -40,22 +41,18 @@ def main():
     else:
         print("\nFlag verification failed. Checking variations...")
         
-        # Test some variations just in case
-        variations = [
-            found_content.upper(),
-            found_content.lower(),
-            found_content.replace('0', 'o'),
-            found_content.replace('1', 'l'),
-        ]
+        # Whole-phrase case forms, then every variant one or two leet, case
+        # or separator substitutions away from the found content
+        lattice = Mutations(found_content)
+        variations = itertools.chain([found_content.upper(), found_content.lower()],
+                                     lattice.ranked(min_mutations=1, max_mutations=2))
+        print(f"Testing {2 + lattice.count(1) + lattice.count(2)} variations...")
         
         for var in variations:
-            if len(var) == 27:
-                output, rc = test_flag_content(var)
-                print(f"  {var}: {output}")
-                
-                if "License valid!" in output:
-                    print(f"\nSUCCESS with variation: VoidBox{{{var}}}")
-                    break
+            output, rc = test_flag_content(var)
+            if is_success(output):
+                print(f"\nSUCCESS with variation: VoidBox{{{var}}}")
+                break
 
 if __name__ == "__main__":
     main()
\ No newline at end of file